@@ -6,5 +6,7 @@ from .datatypes import ( Scalar, Vector, Matrix, Sampler, BasicType
 from .variable import Variable
 from .interface_block import BlockLayout, MatrixLayout
 from .uniform_block import UniformBlock, UniformBlockMember
+from .shader_storage_block import ShaderStorageBlock, ShaderStorageBlockMember
 from .vertex_attribute import VertexAttribute
 from .transform_feedback import FeedbackVarying
+from .parser import ShaderInterface, parse, programArguments
@@ -230,10 +230,22 @@ class Struct:
 		return iter(self.contents.values())
 
 	def __hash__(self):
-		return hash((self.name, tuple(self.contents.items())))
+		# Structs are used as keys of the layout cache, so avoid rehashing nested members
+		try:
+			return self._hash
+		except AttributeError:
+			self._hash = hash((self.name, tuple(self.contents.items())))
+			return self._hash
+
+	def __getstate__(self):
+		# String hashes differ between processes, so the cached hash must not be pickled
+		state = self.__dict__.copy()
+		state.pop('_hash', None)
+		return state
 
-	def __eq___(self):
-		return self.name == other.name and self.contents == other.contents
+	def __eq__(self, other):
+		return ( isinstance(other, Struct) and self.name == other.name
+		         and self.contents == other.contents )
 
 def formatShape(shape):
 	array = ']['.join(str(s) for s in shape)
@@ -1,34 +1,25 @@
 from .datatypes import Scalar, Vector, Matrix, Array, Struct, BasicType
 from .variable import Variable
+from .layout import BlockLayout, MatrixLayout, typeLayout
 
 from util.misc import roundUp
 from numpy import dtype
 
-from enum import Enum
 from collections import OrderedDict
+from functools import lru_cache
 
-class BlockLayout(Enum):
-	'''The valid layouts for interface blocks.
+@lru_cache(maxsize=None)
+def containsOpaque(datatype):
+	'''Whether a type is, or contains, an opaque type. Unlike checking each resource, this does not
+	depend on the length of arrays. The result is cached by datatype, as it is checked for every
+	member (and every element and member of a member that is accessed).
 
-	Defines the following attributes:
-
-	*standardized*
-	  Whether the memory layout of a a block of this layout can be determined in advance (i.e.
-	  without runtime queries)
+	:rtype: :py:obj:`bool`
 	'''
-	def __init__(self, value):
-		self.standardized = self.name.startswith('std')
-
-	shared = 'shared'
-	packed = 'packed'
-	std140 = 'std140'
-	std430 = 'std430'
-
-class MatrixLayout(Enum):
-	'''The valid options for matrix layouts in interface blocks and interface block members.'''
-
-	column_major = 'column_major'
-	row_major = 'row_major'
+	base = getattr(datatype, 'base', datatype)
+	if isinstance(base, Struct):
+		return any(containsOpaque(m.datatype) for m in base)
+	return base.opaque
 
 class InterfaceBlockMember(Variable):
 	'''A variable that is a member of an interface block.
@@ -45,7 +36,7 @@ class InterfaceBlockMember(Variable):
 		super().__init__(name, datatype)
 		self.shader_matrix_layout = matrix_layout
 		self.block = block
-		if any(getattr(r.datatype, 'base', r.datatype).opaque for r in self.resources):
+		if containsOpaque(self.datatype):
 			raise TypeError("Interface blocks may not contain opaque types.")
 
 	@classmethod
@@ -102,18 +93,27 @@ class InterfaceBlockMember(Variable):
 		return (self.name if not self.block.instance_name
 		        else '.'.join((self.block.name, self.name)))
 
+	@property
+	def type_layout(self):
+		'''The memory layout of the member's datatype, shared by all members of the same type in
+		blocks of the same layout (see :py:func:`.typeLayout`).
+
+		:rtype: :py:class:`.TypeLayout`
+		:raises TypeError: If the block layout is not a standard layout.
+		'''
+		return typeLayout(self.datatype, self.layout, self.matrix_layout)
+
 	@property
 	def matrix_stride(self):
 		if not (isinstance(self.datatype, Matrix) and self.layout.standardized):
 			raise TypeError("Not a matrix with standardized layout.")
-		# FIXME: doubles?
-		return self.alignment
+		return self.type_layout.matrix_stride
 
 	@property
 	def array_stride(self):
 		if not (isinstance(self.datatype, Array) and self.layout.standardized):
 			raise TypeError("Not an array with standardized layout.")
-		return roundUp(self[0].dtype.itemsize, self.alignment)
+		return self.type_layout.array_stride
 
 	@property
 	def layout(self):
@@ -126,42 +126,28 @@ class InterfaceBlockMember(Variable):
 
 		:rtype: :py:obj:`int` or :py:obj:`None`
 		'''
-
-		if self.layout not in (BlockLayout.std140, BlockLayout.std430):
+		if not self.layout.standardized:
 			return None
+		return self.type_layout.alignment
 
-		if self.layout == BlockLayout.std140:
-			alignment_rounding = Vector.vec4.machine_type.itemsize
-		else:
-			alignment_rounding = 1
-
-		# Rule 1
-		if isinstance(self.datatype, Scalar):
-			return self.datatype.machine_type.itemsize
-		# Rule 2 & 3
-		elif isinstance(self.datatype, Vector):
-			item_type, (components,) = self.datatype.machine_type.subdtype
-			if components == 3:
-				components = 4
-			return item_type.itemsize * components
-
-		# Rule 4, 6, 7 & 10
-		if isinstance(self.datatype, Array):
-			return roundUp(self[0].alignment, alignment_rounding)
-
-		# Rules 5 & 7
-		if isinstance(self.datatype, Matrix):
-			if self.matrix_layout == MatrixLayout.column_major:
-				items, components = self.datatype.shape
-			elif self.matrix_layout == MatrixLayout.row_major:
-				components, items = self.datatype.shape
-			align_type = Array(Vector.fromType(self.datatype.scalar_type, components), items)
-			return InterfaceBlockMember(self.block, self.name, align_type).alignment
+	@property
+	def element_dtype(self):
+		'''The numpy datatype of one element of an array member, padded to the array stride.
 
-		# Rule 9
-		if isinstance(self.datatype, Struct):
-			alignment = max(c.alignment for c in self)
-			return roundUp(alignment, alignment_rounding)
+		:rtype: :py:class:`numpy.dtype`
+		:raises TypeError: If the member is not an array, or the block layout is not a standard
+		  layout.
+		'''
+		if self.layout.standardized:
+			if not isinstance(self.datatype, Array):
+				raise TypeError("Not an array.")
+			return self.type_layout.element_dtype
+		element = self[0]
+		item_dtype = element.dtype
+		if isinstance(element.datatype, BasicType):
+			item_dtype = dtype({'names': [element.datatype.name], 'formats': [item_dtype],
+			                    'itemsize': self.array_stride})
+		return item_dtype
 
 	@property
 	def dtype(self):
@@ -171,24 +157,17 @@ class InterfaceBlockMember(Variable):
 		:raises TypeError: If the block layout is not a standard layout.
 		'''
 
-		# Rule 1, 2 & 3
+		if self.layout.standardized:
+			return self.type_layout.dtype
+
+		# Non-standard layouts are only defined for subclasses that can query the strides (see
+		# :py:class:`.ProgramUniformBlockMember`)
 		if isinstance(self.datatype, (Scalar, Vector)):
 			return self.datatype.machine_type
 
-		# Rule 10 could be defined separately to be consisted with packed/shared layout dtypes.
-		# However, all members are guaranteed to be preserved in standard formats, and this produces
-		# dtypes that are easier to work with
-
-		# Rule 4, 6, 8 & 10
 		if isinstance(self.datatype, Array):
-			element = self[0]
-			item_dtype = element.dtype
-			if isinstance(element.datatype, BasicType):
-				item_dtype = dtype({'names': [element.datatype.name], 'formats': [item_dtype],
-									'itemsize': self.array_stride})
-			return dtype((item_dtype, len(self)))
-
-		# Rules 5 & 7
+			return dtype((self.element_dtype, (len(self),)))
+
 		if isinstance(self.datatype, Matrix):
 			if self.matrix_layout == MatrixLayout.column_major:
 				item_dim = 'column'
@@ -201,19 +180,7 @@ class InterfaceBlockMember(Variable):
 			                    'formats': [item_dtype], 'itemsize': self.matrix_stride})
 			return dtype((item_dtype, items))
 
-		# Rule 9
-		if isinstance(self.datatype, Struct):
-			names = [c.name for c in self]
-			dtypes = [c.dtype for c in self]
-			offsets = []
-			offset = 0
-			for c in self:
-				offset = roundUp(offset, c.alignment)
-				offsets.append(offset)
-				offset += c.dtype.itemsize
-			struct_size = roundUp(offset, self.alignment)
-			return dtype({'names': names, 'formats': dtypes, 'offsets': offsets,
-			              'itemsize': struct_size})
+		raise TypeError("The layout for this interface block is not defined.")
 
 class InterfaceBlock:
 	'''A generic interface block.
@@ -258,14 +225,15 @@ class InterfaceBlock:
 		'''
 
 		if self.layout.standardized:
-			offsets = []
+			names, formats, offsets = [], [], []
 			offset = 0
 			for m in self:
 				offset = roundUp(offset, m.alignment)
+				names.append(m.name)
+				formats.append(m.dtype)
 				offsets.append(offset)
 				offset += m.dtype.itemsize
-			names, formats = zip(*((m.name, m.dtype) for m in self))
-			return dtype({'names': list(names), 'formats': list(formats), 'offsets': offsets})
+			return dtype({'names': names, 'formats': formats, 'offsets': offsets})
 		else:
 			raise TypeError("The layout for this interface block is not defined.")
 
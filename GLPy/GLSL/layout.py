@@ -0,0 +1,228 @@
+'''The memory layout of GLSL types in interface blocks with a standardized layout (``std140`` and
+``std430``).
+
+Layouts only depend on the datatype, the block layout and the matrix layout, so they are computed
+once per combination and cached. Nested types (e.g. arrays of structs) reuse the cached layouts of
+their members.
+
+.. testsetup::
+
+   from GLPy.GLSL import Array
+   from GLPy.GLSL.layout import typeLayout
+
+>>> typeLayout(Array('float', 4), 'std140', 'column_major').array_stride
+16
+>>> typeLayout(Array('float', 4), 'std430', 'column_major').array_stride
+4
+
+The fields of struct datatypes are named by member name only (e.g. ``'position'``, not
+``'particles[0].position'``), and arrays keep their dimensions even if they have a single element.
+
+Matrices are laid out as arrays of padded column (or row) records. :py:func:`packMatrices` and
+:py:func:`unpackMatrices` convert between these and stacks of dense matrices.
+'''
+
+from .datatypes import Scalar, Vector, Matrix, Array, Struct, BasicType
+
+from util.misc import roundUp
+from numpy import dtype
+import numpy
+
+from enum import Enum
+from collections import namedtuple
+from functools import lru_cache
+
+class BlockLayout(Enum):
+	'''The valid layouts for interface blocks.
+
+	Defines the following attributes:
+
+	*standardized*
+	  Whether the memory layout of a a block of this layout can be determined in advance (i.e.
+	  without runtime queries)
+	'''
+	def __init__(self, value):
+		self.standardized = self.name.startswith('std')
+
+	shared = 'shared'
+	packed = 'packed'
+	std140 = 'std140'
+	std430 = 'std430'
+
+class MatrixLayout(Enum):
+	'''The valid options for matrix layouts in interface blocks and interface block members.'''
+
+	column_major = 'column_major'
+	row_major = 'row_major'
+
+TypeLayout = namedtuple('TypeLayout', ['alignment', 'dtype', 'array_stride', 'matrix_stride',
+                                       'element_dtype'])
+TypeLayout.__doc__ = '''The memory layout of a GLSL type.
+
+:ivar int alignment: The base alignment of the type
+:ivar dtype: The numpy datatype representing the type. Its ``itemsize`` is the size of the type.
+:ivar array_stride: The distance between array elements, if the type is an array
+:ivar matrix_stride: The distance between matrix columns (or rows), if the type is a matrix
+:ivar element_dtype: The numpy datatype of one array element (padded to the array stride), if the
+  type is an array
+'''
+
+def typeLayout(datatype, layout, matrix_layout):
+	'''Calculate the memory layout of a type, using the rules of the OpenGL specification (section
+	7.6.2.2 of OpenGL 4.5). The result is cached, see :py:func:`cachedTypeLayout`.
+
+	:param datatype: The GLSL type
+	:type datatype: :py:class:`.BasicType`, :py:class:`.Array` or :py:class:`.Struct`
+	:param layout: The block layout, either ``std140`` or ``std430``
+	:type layout: :py:class:`.BlockLayout` or :py:obj:`str`
+	:param matrix_layout: The layout of matrices in the type
+	:type matrix_layout: :py:class:`.MatrixLayout` or :py:obj:`str`
+	:rtype: :py:class:`TypeLayout`
+	:raises TypeError: If the layout is not a standardized layout, or the type is opaque
+	'''
+	return cachedTypeLayout(datatype, BlockLayout(layout), MatrixLayout(matrix_layout))
+
+@lru_cache(maxsize=None)
+def cachedTypeLayout(datatype, layout, matrix_layout):
+	'''The implementation of :py:func:`typeLayout`, cached by datatype, layout and matrix layout.
+	The layouts must be passed as enums, so equivalent arguments share cache entries. Use
+	``cachedTypeLayout.cache_info()`` to inspect the cache.
+	'''
+	if not layout.standardized:
+		raise TypeError("The memory layout of '{}' blocks is not defined.".format(layout.value))
+
+	if layout == BlockLayout.std140:
+		alignment_rounding = Vector.vec4.machine_type.itemsize
+	else:
+		alignment_rounding = 1
+
+	# Rule 1
+	if isinstance(datatype, Scalar):
+		return TypeLayout(datatype.machine_type.itemsize, datatype.machine_type, None, None, None)
+
+	# Rule 2 & 3
+	if isinstance(datatype, Vector):
+		item_type, (components,) = datatype.machine_type.subdtype
+		if components == 3:
+			components = 4
+		return TypeLayout(item_type.itemsize * components, datatype.machine_type, None, None, None)
+
+	# Rule 4, 6, 8 & 10
+	if isinstance(datatype, Array):
+		element = cachedTypeLayout(datatype.element, layout, matrix_layout)
+		alignment = roundUp(element.alignment, alignment_rounding)
+		stride = roundUp(element.dtype.itemsize, alignment)
+		item_dtype = element.dtype
+		if isinstance(datatype.element, BasicType):
+			item_dtype = dtype({'names': [datatype.element.name], 'formats': [item_dtype],
+			                    'itemsize': stride})
+		return TypeLayout(alignment, dtype((item_dtype, (len(datatype),))), stride, None,
+		                  item_dtype)
+
+	# Rules 5 & 7
+	if isinstance(datatype, Matrix):
+		if matrix_layout == MatrixLayout.column_major:
+			item_dim = 'column'
+			items, components = datatype.shape
+		else:
+			item_dim = 'row'
+			components, items = datatype.shape
+		vector = Vector.fromType(datatype.scalar_type, components)
+		alignment = cachedTypeLayout(Array(vector, items), layout, matrix_layout).alignment
+		item_dtype = dtype({'names': ['-'.join((datatype.name, item_dim))],
+		                    'formats': [vector.machine_type], 'itemsize': alignment})
+		return TypeLayout(alignment, dtype((item_dtype, items)), None, alignment, None)
+
+	# Rule 9
+	if isinstance(datatype, Struct):
+		names, formats, offsets = [], [], []
+		offset = 0
+		alignment = 0
+		for member in datatype:
+			member_layout = cachedTypeLayout(member.datatype, layout, matrix_layout)
+			offset = roundUp(offset, member_layout.alignment)
+			names.append(member.name)
+			formats.append(member_layout.dtype)
+			offsets.append(offset)
+			offset += member_layout.dtype.itemsize
+			alignment = max(alignment, member_layout.alignment)
+		alignment = roundUp(alignment, alignment_rounding)
+		struct_dtype = dtype({'names': names, 'formats': formats, 'offsets': offsets,
+		                      'itemsize': roundUp(offset, alignment)})
+		return TypeLayout(alignment, struct_dtype, None, None, None)
+
+	raise TypeError("'{}' has no memory layout.".format(datatype))
+
+def matrixItems(records):
+	'''The columns (or rows) of padded matrix records.
+
+	:param records: An array of padded matrices, e.g. a matrix member of a block
+	:type records: :py:class:`numpy.ndarray`
+	:returns: A view of the matrix items, with shape ``(..., items, components)``, and the layout
+	  of the matrices. Matrices that are not padded are column-major.
+	:rtype: (:py:class:`numpy.ndarray`, :py:class:`MatrixLayout`)
+	:raises TypeError: If the records are not matrices
+	'''
+	while records.dtype.names is not None:
+		if len(records.dtype.names) != 1:
+			raise TypeError("{} is not a matrix datatype.".format(records.dtype))
+		name, = records.dtype.names
+		records = records[name]
+		if name.endswith('-row'):
+			return records, MatrixLayout.row_major
+		if name.endswith('-column'):
+			return records, MatrixLayout.column_major
+	if records.ndim < 2:
+		raise TypeError("{} is not a matrix datatype.".format(records.dtype))
+	return records, MatrixLayout.column_major
+
+def unpackMatrices(records):
+	'''A view of padded matrix records as dense matrices, indexed by row and then column. No
+	data is copied, so writing to the view writes the records.
+
+	>>> from GLPy.GLSL import Matrix
+	>>> records = packMatrices([[[1, 2], [3, 4]]], Matrix.mat2)
+	>>> records['mat2-column'].tolist()
+	[[[1.0, 3.0], [2.0, 4.0]]]
+	>>> unpackMatrices(records).tolist()
+	[[[1.0, 2.0], [3.0, 4.0]]]
+
+	:param records: An array of padded matrices
+	:type records: :py:class:`numpy.ndarray`
+	:returns: An array of shape ``(..., rows, columns)``
+	:rtype: :py:class:`numpy.ndarray`
+	'''
+	items, matrix_layout = matrixItems(records)
+	if matrix_layout == MatrixLayout.column_major:
+		return items.swapaxes(-1, -2)
+	return items
+
+def packMatrices(matrices, datatype=None, layout='std140', matrix_layout='column_major', out=None):
+	'''Convert a stack of dense matrices to padded matrix records.
+
+	The matrices are written into a strided view of the records, so they are cast to the scalar
+	type of the records in a single pass, without intermediate copies.
+
+	:param matrices: The matrices, indexed by row and then column
+	:type matrices: :py:class:`numpy.ndarray` of shape ``(..., rows, columns)``
+	:param datatype: The matrix type. It defaults to a ``float`` matrix of the shape of the
+	  matrices.
+	:type datatype: :py:class:`.Matrix`, :py:obj:`str` or :py:obj:`None`
+	:param layout: The block layout, either ``std140`` or ``std430``
+	:param matrix_layout: The layout of the matrices
+	:param out: Records to write the matrices to (e.g. a member of a block), instead of creating
+	  them. The type and layouts are then those of the records.
+	:type out: :py:class:`numpy.ndarray` or :py:obj:`None`
+	:returns: The records
+	:rtype: :py:class:`numpy.ndarray`
+	'''
+	matrices = numpy.asarray(matrices)
+	if out is None:
+		if datatype is None:
+			rows, columns = matrices.shape[-2:]
+			datatype = Matrix.fromType(Scalar.float, (columns, rows))
+		matrix_dtype = cachedTypeLayout(Matrix(datatype), BlockLayout(layout),
+		                                MatrixLayout(matrix_layout)).dtype
+		out = numpy.zeros(matrices.shape[:-2], matrix_dtype)
+	unpackMatrices(out)[...] = matrices
+	return out
@@ -0,0 +1,420 @@
+'''A parser for the global declarations of GLSL shaders.
+
+Only declarations are parsed: function bodies are skipped, and preprocessor directives are ignored
+(so sources should be expanded, e.g. with :py:class:`.Preprocessor`, before parsing them if they
+contain conditionals or macros).
+
+.. testsetup::
+
+   from GLPy.GLSL.parser import parse
+
+>>> interface = parse("""
+... layout(std140) uniform Camera { mat4 view; vec3 position; } camera;
+... in vec3 position;
+... void main(){}
+... """)
+>>> interface.uniform_blocks[0].dtype.names
+('view', 'position')
+>>> interface.inputs[0]
+<VertexAttribute name=position, datatype=vec3, location=None, normalized=False>
+'''
+
+from .datatypes import BasicType, Array, Struct
+from .variable import Variable
+from .interface_block import BlockLayout, MatrixLayout
+from .uniform_block import UniformBlock
+from .shader_storage_block import ShaderStorageBlock
+from .vertex_attribute import VertexAttribute
+
+from collections import OrderedDict
+import re
+
+comment_pattern = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+directive_pattern = re.compile(r'^[ \t]*#(?:[^\n]*\\\n)*[^\n]*', re.MULTILINE)
+token_pattern = re.compile(r'[A-Za-z_]\w*|\d[\w.]*|\S')
+integer_pattern = re.compile(r'^(0[xX][0-9a-fA-F]+|\d+)[uU]?$')
+
+storage_qualifiers = {'const', 'in', 'out', 'inout', 'attribute', 'varying', 'uniform', 'buffer',
+                      'shared'}
+other_qualifiers = {'centroid', 'sample', 'patch', 'flat', 'smooth', 'noperspective', 'invariant',
+                    'precise', 'highp', 'mediump', 'lowp', 'coherent', 'volatile', 'restrict',
+                    'readonly', 'writeonly'}
+
+def tokenize(source):
+	'''Split a GLSL source into tokens, removing comments and preprocessor directives.
+
+	:rtype: [:py:obj:`str`]
+	'''
+	source = comment_pattern.sub(' ', source)
+	source = directive_pattern.sub(' ', source)
+	return token_pattern.findall(source)
+
+class ShaderInterface:
+	'''The global declarations of a shader, as :py:mod:`GLPy.GLSL` descriptors. Instances can be
+	pickled, so the result of parsing (and the layouts of standardized blocks) can be cached.
+
+	:ivar structs: The structs defined in the shader
+	:vartype structs: {:py:obj:`str`: :py:class:`.Struct`}
+	:ivar uniforms: The uniforms in the default uniform block
+	:vartype uniforms: [:py:class:`.Variable`]
+	:ivar uniform_blocks: The uniform blocks
+	:vartype uniform_blocks: [:py:class:`.UniformBlock`]
+	:ivar shader_storage_blocks: The shader storage blocks
+	:vartype shader_storage_blocks: [:py:class:`.ShaderStorageBlock`]
+	:ivar inputs: The input variables. Inputs of basic types (or arrays thereof) are
+	  :py:class:`.VertexAttribute`\\ s.
+	:vartype inputs: [:py:class:`.Variable`]
+	:ivar outputs: The output variables
+	:vartype outputs: [:py:class:`.Variable`]
+	:ivar constants: The values of constant integers, as they may be used as array sizes
+	:vartype constants: {:py:obj:`str`: :py:obj:`int`}
+	'''
+
+	def __init__(self):
+		self.structs = OrderedDict()
+		self.uniforms = []
+		self.uniform_blocks = []
+		self.shader_storage_blocks = []
+		self.inputs = []
+		self.outputs = []
+		self.constants = {}
+
+class Parser:
+	'''Parses the declarations in a GLSL source into a :py:class:`ShaderInterface`.
+
+	:param str source: The GLSL source
+	'''
+
+	def __init__(self, source):
+		self.tokens = tokenize(source)
+		self.position = 0
+		self.interface = ShaderInterface()
+		# Set by default layout declarations, e.g. ``layout(std140) uniform;``
+		self.default_layouts = {'uniform': {}, 'buffer': {}}
+
+	def peek(self, offset=0):
+		try:
+			return self.tokens[self.position + offset]
+		except IndexError:
+			return None
+
+	def next(self):
+		token = self.peek()
+		if token is None:
+			raise ValueError("Unexpected end of GLSL source.")
+		self.position += 1
+		return token
+
+	def expect(self, expected):
+		token = self.next()
+		if token != expected:
+			raise ValueError("Expected '{}' but found '{}' in GLSL source.".format(expected, token))
+		return token
+
+	def skipBalanced(self, opening, closing):
+		'''Skip tokens up to and including the closing token matching an opening token.'''
+		self.expect(opening)
+		depth = 1
+		while depth:
+			token = self.next()
+			if token == opening:
+				depth += 1
+			elif token == closing:
+				depth -= 1
+
+	def parse(self):
+		''':rtype: :py:class:`ShaderInterface`'''
+		while self.peek() is not None:
+			self.declaration()
+		return self.interface
+
+	def layout(self):
+		'''Parse a layout qualifier. Qualifiers without a value are mapped to :py:obj:`None`.
+
+		:rtype: {:py:obj:`str`: :py:obj:`str` or :py:obj:`None`}
+		'''
+		layout = {}
+		self.expect('layout')
+		self.expect('(')
+		while True:
+			name = self.next()
+			value = None
+			if self.peek() == '=':
+				self.next()
+				value = self.next()
+			layout[name] = value
+			if self.next() == ')':
+				return layout
+
+	def qualifiers(self):
+		''':returns: The layout and other qualifiers of a declaration
+		:rtype: ({:py:obj:`str`: :py:obj:`str`}, {:py:obj:`str`})
+		'''
+		layout = {}
+		qualifiers = set()
+		while True:
+			token = self.peek()
+			if token == 'layout':
+				layout.update(self.layout())
+			elif token in storage_qualifiers or token in other_qualifiers:
+				qualifiers.add(self.next())
+			elif token == 'precision':
+				# Not a qualifier, but a statement with no effect on the interface
+				while self.next() != ';':
+					pass
+				return None
+			else:
+				return layout, qualifiers
+
+	def integer(self, token):
+		match = integer_pattern.match(token)
+		if match:
+			return int(match.group(1), 0)
+		try:
+			return self.interface.constants[token]
+		except KeyError:
+			raise ValueError("Can not determine the value of array size '{}'.".format(token))
+
+	def arrayShape(self, unsized=False):
+		'''Parse the array dimensions following a type or name.
+
+		:param bool unsized: Whether the first dimension may be unsized, in which case it is
+		  :py:obj:`None`.
+		:rtype: [:py:obj:`int`]
+		'''
+		shape = []
+		while self.peek() == '[':
+			self.next()
+			if self.peek() == ']':
+				if not (unsized and not shape):
+					raise ValueError("Unsized arrays are not supported.")
+				shape.append(None)
+			else:
+				shape.append(self.integer(self.next()))
+			self.expect(']')
+		return shape
+
+	def datatype(self, name):
+		try:
+			return self.interface.structs[name]
+		except KeyError:
+			pass
+		try:
+			return BasicType(name)
+		except ValueError:
+			raise ValueError("Unknown GLSL type '{}'.".format(name))
+
+	def struct(self):
+		'''Parse a struct definition, after the ``struct`` keyword.
+
+		:rtype: :py:class:`.Struct`
+		'''
+		name = self.next()
+		struct = Struct(name, *self.members()[0])
+		self.interface.structs[name] = struct
+		return struct
+
+	def members(self, unsized=False):
+		'''Parse the members of a struct or block, including the braces.
+
+		:param bool unsized: Whether the last member may be an unsized array, as in shader storage
+		  blocks.
+		:returns: The members, the layout qualifiers of each member, and the unsized array (as a
+		  variable of its element type) if there is one
+		:rtype: ([:py:class:`.Variable`], [{:py:obj:`str`: :py:obj:`str`}],
+		  :py:class:`.Variable` or :py:obj:`None`)
+		'''
+		self.expect('{')
+		members = []
+		layouts = []
+		unsized_member = None
+		while self.peek() != '}':
+			if unsized_member is not None:
+				raise ValueError("Only the last member of a block may be an unsized array.")
+			layout, _ = self.qualifiers()
+			type_name = self.next()
+			if type_name == 'struct':
+				datatype = self.struct()
+			else:
+				datatype = self.datatype(type_name)
+			type_shape = self.arrayShape(unsized)
+			while True:
+				if unsized_member is not None:
+					raise ValueError("Only the last member of a block may be an unsized array.")
+				name = self.next()
+				shape = type_shape + self.arrayShape(unsized and not type_shape)
+				if shape and shape[0] is None:
+					unsized_member = self.variable(name, datatype, shape[1:])
+				else:
+					members.append(self.variable(name, datatype, shape))
+					layouts.append(layout)
+				if self.next() == ';':
+					break
+		self.expect('}')
+		return members, layouts, unsized_member
+
+	@staticmethod
+	def variable(name, datatype, shape):
+		if shape:
+			datatype = Array(datatype, shape)
+		return Variable(name, datatype)
+
+	def declaration(self):
+		'''Parse one global declaration or function definition.'''
+		qualifiers = self.qualifiers()
+		if qualifiers is None:
+			return
+		layout, qualifiers = qualifiers
+		storage = qualifiers & storage_qualifiers
+
+		token = self.next()
+		if token == ';':
+			# Default layout declaration
+			for s in storage:
+				self.default_layouts.setdefault(s, {}).update(layout)
+			return
+		if token == 'struct':
+			datatype = self.struct()
+		elif self.peek() == '{':
+			self.block(token, layout, storage)
+			return
+		else:
+			datatype = self.datatype(token) if token in self.interface.structs else token
+
+		type_shape = self.arrayShape()
+		if self.peek() == ';':
+			# A struct definition without declarators
+			self.next()
+			return
+		name = self.next()
+		if self.peek() == '(':
+			# Function declaration or definition
+			self.skipBalanced('(', ')')
+			if self.peek() == '{':
+				self.skipBalanced('{', '}')
+			else:
+				self.expect(';')
+			return
+
+		while True:
+			shape = type_shape + self.arrayShape()
+			initializer = []
+			if self.peek() == '=':
+				self.next()
+				depth = 0
+				while depth or self.peek() not in (',', ';'):
+					token = self.next()
+					depth += (token in '([{') - (token in ')]}')
+					initializer.append(token)
+			self.addVariable(name, datatype, shape, layout, storage, initializer)
+			if self.next() == ';':
+				return
+			name = self.next()
+
+	def addVariable(self, name, datatype, shape, layout, storage, initializer):
+		if 'const' in storage:
+			if datatype in ('int', 'uint') and not shape and len(initializer) == 1:
+				try:
+					self.interface.constants[name] = self.integer(initializer[0])
+				except ValueError:
+					pass
+			return
+		if not storage & {'uniform', 'in', 'attribute', 'out', 'varying'}:
+			# Global variables are not part of the interface
+			return
+
+		if isinstance(datatype, str):
+			datatype = self.datatype(datatype)
+		variable = self.variable(name, datatype, shape)
+		if 'uniform' in storage:
+			self.interface.uniforms.append(variable)
+		elif storage & {'in', 'attribute'}:
+			base = getattr(variable.datatype, 'base', variable.datatype)
+			if isinstance(base, BasicType):
+				location = layout.get('location')
+				location = None if location is None else self.integer(location)
+				variable = VertexAttribute(name, variable.datatype, location)
+			self.interface.inputs.append(variable)
+		elif storage & {'out', 'varying'}:
+			self.interface.outputs.append(variable)
+
+	def block(self, name, layout, storage):
+		'''Parse an interface block, after the block name.'''
+		members, member_layouts, unsized = self.members('buffer' in storage)
+		instance_name = ''
+		if self.peek() != ';':
+			instance_name = self.next()
+			if self.arrayShape():
+				raise ValueError("Arrays of interface blocks are not supported.")
+		self.expect(';')
+
+		if 'uniform' in storage:
+			storage = 'uniform'
+		elif 'buffer' in storage:
+			storage = 'buffer'
+		else:
+			# Other interface blocks (e.g. between shader stages) are not described
+			return
+
+		block_layout = dict(self.default_layouts[storage])
+		block_layout.update(layout)
+		kwargs = {}
+		for qualifier in block_layout:
+			if qualifier in BlockLayout.__members__:
+				kwargs['layout'] = qualifier
+			elif qualifier in MatrixLayout.__members__:
+				kwargs['matrix_layout'] = qualifier
+		if block_layout.get('binding') is not None:
+			kwargs['binding'] = self.integer(block_layout['binding'])
+
+		if storage == 'uniform':
+			block = UniformBlock(name, *members, instance_name=instance_name, **kwargs)
+			self.interface.uniform_blocks.append(block)
+		else:
+			block = ShaderStorageBlock(name, *members, unsized=unsized,
+			                           instance_name=instance_name, **kwargs)
+			self.interface.shader_storage_blocks.append(block)
+		for member, member_layout in zip(members, member_layouts):
+			for qualifier in member_layout:
+				if qualifier in MatrixLayout.__members__:
+					block.members[member.name].shader_matrix_layout = MatrixLayout(qualifier)
+
+def parse(source):
+	'''Parse the global declarations of a GLSL source.
+
+	:param str source: The GLSL source
+	:rtype: :py:class:`ShaderInterface`
+	:raises ValueError: If the source can not be parsed, or contains declarations that can not be
+	  described (e.g. unsupported types, or unsized arrays outside of shader storage blocks).
+	'''
+	return Parser(source).parse()
+
+def programArguments(vertex, *others):
+	'''Combine the interfaces of the shaders of a program into the keyword arguments for
+	:py:class:`.Program`. Uniforms and interface blocks shared between stages are included once.
+
+	.. code-block:: python
+
+	   interfaces = [parse(sources['vertex']), parse(sources['fragment'])]
+	   program = Program.fromSources(sources, **programArguments(*interfaces))
+
+	:param vertex: The interface of the vertex shader
+	:type vertex: :py:class:`ShaderInterface`
+	:param others: The interfaces of the other shaders
+	:type others: [:py:class:`ShaderInterface`]
+	:rtype: {:py:obj:`str`: [:py:class:`.Variable`]}
+	'''
+	uniforms = OrderedDict()
+	uniform_blocks = OrderedDict()
+	shader_storage_blocks = OrderedDict()
+	for interface in (vertex,) + others:
+		for uniform in interface.uniforms:
+			uniforms.setdefault(uniform.name, uniform)
+		for block in interface.uniform_blocks:
+			uniform_blocks.setdefault(block.name, block)
+		for block in interface.shader_storage_blocks:
+			shader_storage_blocks.setdefault(block.name, block)
+	vertex_attributes = [v for v in vertex.inputs if isinstance(v, VertexAttribute)]
+	return { 'vertex_attributes': vertex_attributes, 'uniforms': list(uniforms.values())
+	       , 'uniform_blocks': list(uniform_blocks.values())
+	       , 'shader_storage_blocks': list(shader_storage_blocks.values()) }
@@ -0,0 +1,133 @@
+'''Shader storage blocks, which are backed by buffers that shaders can write to.
+
+.. testsetup::
+
+   from GLPy.GLSL import ShaderStorageBlock, Variable
+'''
+
+from .interface_block import InterfaceBlock, InterfaceBlockMember, BlockLayout, MatrixLayout
+from .datatypes import Array
+from .variable import Variable
+
+from util.misc import roundUp
+from numpy import dtype
+
+class ShaderStorageBlockMember(InterfaceBlockMember):
+	@classmethod
+	def fromInterfaceBlockMember(cls, member):
+		return cls(member.block, member.name, member.datatype, member.shader_matrix_layout)
+
+	def __iter__(self):
+		yield from (ShaderStorageBlockMember.fromInterfaceBlockMember(m)
+		            for m in super().__iter__())
+
+	def __getitem__(self, idx):
+		return ShaderStorageBlockMember.fromInterfaceBlockMember(super().__getitem__(idx))
+
+class ShaderStorageBlock(InterfaceBlock):
+	'''An OpenGL Shader Storage Block (declared with the ``buffer`` storage qualifier).
+
+	The last member of a shader storage block may be an array without a size, whose length is
+	determined by the size of the buffer bound to the block. It is passed separately as
+	``unsized``, with the type of one element of the array, e.g. ``float values[];`` is
+	``unsized=Variable('values', 'float')``.
+
+	>>> block = ShaderStorageBlock('Particles', Variable('count', 'uint'),
+	...                            unsized=Variable('positions', 'vec3'), layout='std430')
+	>>> block.sizedDtype(2).fields['positions'][1]
+	16
+	>>> block.length(64)
+	3
+
+	:param unsized: The trailing array without a size, if any.
+	:type unsized: :py:class:`.Variable` or :py:obj:`None`
+	:param binding: The binding index declared in the shader, if any.
+	:type binding: :py:obj:`int` or :py:obj:`None`
+	:raises: See :py:class:`.InterfaceBlock`
+	'''
+
+	member_type = ShaderStorageBlockMember
+	def __init__(self, name, *members, unsized=None, instance_name='', layout='shared',
+	             matrix_layout='column_major', binding=None):
+		super().__init__(name, *members, instance_name=instance_name, layout=layout,
+		                 matrix_layout=matrix_layout)
+		self.shader_binding = binding
+		self.unsized = unsized
+		if unsized is not None and unsized.name in self.members:
+			raise ValueError("Duplicate block member '{}'.".format(unsized.name))
+
+	@property
+	def unsized_member(self):
+		'''The unsized array, as a member holding a single element. Used to calculate the
+		alignment and stride of the array.
+
+		:rtype: :py:class:`ShaderStorageBlockMember` or :py:obj:`None`
+		'''
+		if self.unsized is None:
+			return None
+		return self.member_type(self, self.unsized.name, Array(self.unsized.datatype, 1))
+
+	@property
+	def array_offset(self):
+		'''The offset of the unsized array from the start of the block.
+
+		:rtype: :py:obj:`int`
+		:raises TypeError: If the block has no unsized array, or the block layout is not a
+		  standard layout.
+		'''
+		if self.unsized is None:
+			raise TypeError("The block has no unsized array.")
+		fixed = super().dtype
+		end = max((offset + format.itemsize for format, offset in fixed.fields.values()),
+		          default=0)
+		return roundUp(end, self.unsized_member.alignment)
+
+	def sizedDtype(self, length):
+		'''The memory layout of the block, with a given number of elements in the unsized array.
+
+		:param int length: The number of elements in the unsized array
+		:rtype: :py:class:`numpy.dtype`
+		:raises TypeError: If the block has no unsized array, or the block layout is not a
+		  standard layout.
+		'''
+		fixed = super().dtype
+		offset = self.array_offset
+		member = self.unsized_member
+		names = list(fixed.names) + [member.name]
+		formats = [fixed.fields[n][0] for n in fixed.names]
+		formats.append(dtype((member.element_dtype, (length,))))
+		offsets = [fixed.fields[n][1] for n in fixed.names] + [offset]
+		return dtype({'names': names, 'formats': formats, 'offsets': offsets,
+		              'itemsize': offset + length * member.array_stride})
+
+	def length(self, nbytes):
+		'''The number of elements of the unsized array that fit in a buffer of a given size, as
+		returned by ``length()`` in GLSL.
+
+		:param int nbytes: The size of the buffer bound to the block
+		:rtype: :py:obj:`int`
+		'''
+		return max(nbytes - self.array_offset, 0) // self.unsized_member.array_stride
+
+	@property
+	def dtype(self):
+		'''The memory layout of the block. The unsized array, if any, has no elements (see
+		:py:meth:`sizedDtype`).
+
+		:rtype: :py:class:`numpy.dtype`
+		:raises TypeError: If the block layout is not a standard layout.
+		'''
+		if self.unsized is None:
+			return super().dtype
+		return self.sizedDtype(0)
+
+	def __getitem__(self, idx):
+		if self.unsized is not None and idx == self.unsized.name:
+			return self.unsized_member
+		return super().__getitem__(idx)
+
+	def __str__(self):
+		members = ['{};'.format(m) for m in self]
+		if self.unsized is not None:
+			members.append('{}[];'.format(self.unsized))
+		return "buffer {} {{{}}} {};".format(self.name, ' '.join(members), self.instance_name)
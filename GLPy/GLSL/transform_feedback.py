@@ -4,6 +4,8 @@ from .datatypes import Struct, Array
 from numpy import dtype
 
 class FeedbackVarying(Variable):
+	"""A varying captured with transform feedback."""
+
 	def __init__(self, name, datatype):
 		super().__init__(name, datatype)
 
@@ -13,14 +15,20 @@ class FeedbackVarying(Variable):
 			return max(m.alignment for m in self)
 		else:
 			base_type = getattr(self.datatype, 'base', self.datatype)
-			return base_type.scalar_type.machine_time.itemsize
+			return base_type.scalar_type.machine_type.itemsize
 
 	@property
 	def dtype(self):
+		"""The numpy datatype of one captured value of this varying. Captured values are tightly
+		packed.
+
+		:rtype: :py:class:`numpy.dtype`
+		"""
 		if isinstance(self.datatype, Array):
-			return dtype((self.datatype[0].dtype, len(self.datatype)))
+			return dtype((self[0].dtype, len(self.datatype)))
 		elif isinstance(self.datatype, Struct):
-			dtype([(m.name, m.dtype) for m in self])
+			return dtype([(m.name, FeedbackVarying(m.name, m.datatype).dtype)
+			              for m in self.datatype])
 		else:
 			return self.datatype.machine_type
 
@@ -28,5 +36,5 @@ class FeedbackVarying(Variable):
 		var = super().__getitem__(idx)
 		return FeedbackVarying(var.name, var.datatype)
 
-	def __iter__(self, idx):
-		yield from (FeedbackVarying(var.name, var.dtatype) for var in super().__iter__())
+	def __iter__(self):
+		yield from (FeedbackVarying(var.name, var.datatype) for var in super().__iter__())
@@ -16,9 +16,10 @@ class UniformBlock(InterfaceBlock):
 	'''An OpenGL Uniform Block.'''
 
 	member_type = UniformBlockMember
-	def __init__(self, name, *members, instance_name='', layout='shared', matrix_layout='row_major',
-	             binding=None):
-		super().__init__(name, *members, instance_name=instance_name, layout=layout)
+	def __init__(self, name, *members, instance_name='', layout='shared',
+	             matrix_layout='column_major', binding=None):
+		super().__init__(name, *members, instance_name=instance_name, layout=layout,
+		                 matrix_layout=matrix_layout)
 		if self.layout == BlockLayout.std430:
 			raise ValueError("Uniform Blocks may not have a 'std430' layout.")
 		self.shader_binding = binding
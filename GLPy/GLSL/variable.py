@@ -80,12 +80,13 @@ class Variable:
 		:rtype: [:py:class:`Variable`] where the type of each variable is :py:class:`BasicType`, or
 		  a :py:class:`Array` of basic types.
 		'''
+		# Subclasses may only iterate over active members, so use the unfiltered iteration
 		if isinstance(self.datatype, Array):
 			if isinstance(self.datatype.element, BasicType):
 				return [Variable(''.join((self.name, '[0]')), self.datatype)]
 			else:
-				return list(chain.from_iterable(v.resources for v in self))
+				return list(chain.from_iterable(v.resources for v in Variable.__iter__(self)))
 		elif isinstance(self.datatype, Struct):
-			return list(chain.from_iterable(v.resources for v in self))
+			return list(chain.from_iterable(v.resources for v in Variable.__iter__(self)))
 		else:
 			return [self]
@@ -1,5 +1,13 @@
 from . import GLSL
-from .program import Program, Shader
+from .program import Program, Shader, ShaderCache
 from .vertex import VAO
-from .texture import ImmutableTexture
+from .texture import ImmutableTexture, UnpackBufferRing
 from .buffers import Buffer
+from .cache import ProgramBinaryCache, CompressedTextureCache
+from .state import State
+from .preprocessor import Preprocessor
+from .transform_feedback import TransformFeedback, FeedbackSimulation
+from .arena import BlockArena
+from .block_view import BlockView
+from .binding import BindingRegistry
+from .multibuffer import MultiBuffer
@@ -0,0 +1,186 @@
+from OpenGL import GL
+from numpy import dtype
+import numpy
+
+from .buffers import Buffer, deleteBuffers
+
+from util.misc import roundUp
+
+offset_alignments = { GL.GL_UNIFORM_BUFFER: GL.GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT
+                    , GL.GL_SHADER_STORAGE_BUFFER: GL.GL_SHADER_STORAGE_BUFFER_OFFSET_ALIGNMENT }
+
+def offsetAlignment(target):
+	'''The alignment required of the offset of a buffer range bound to an indexed target.
+
+	:param target: :py:obj:`GL.GL_UNIFORM_BUFFER` or :py:obj:`GL.GL_SHADER_STORAGE_BUFFER`
+	:rtype: :py:obj:`int`
+	'''
+	return int(GL.glGetIntegerv(offset_alignments[target]))
+
+def slotDtype(block_dtype, alignment):
+	'''The datatype of one slot of an arena: the block datatype, padded to a multiple of the
+	alignment.
+
+	:param block_dtype: The datatype of the block
+	:type block_dtype: :py:class:`numpy.dtype`
+	:param int alignment: The offset alignment of the buffer target
+	:rtype: :py:class:`numpy.dtype`
+	'''
+	names = list(block_dtype.names)
+	formats = [block_dtype.fields[name][0] for name in names]
+	offsets = [block_dtype.fields[name][1] for name in names]
+	return dtype({'names': names, 'formats': formats, 'offsets': offsets,
+	              'itemsize': roundUp(block_dtype.itemsize, alignment)})
+
+class BlockArena:
+	'''Many instances of an interface block, packed into a single buffer.
+
+	Each instance occupies a *slot*, padded to the offset alignment of the target so that any slot
+	can be bound to an indexed target with ``glBindBufferRange``. The contents of the slots are
+	kept in a host array, which is written with vectorized numpy assignments and uploaded with one
+	``glBufferSubData`` per write.
+
+	.. code-block:: python
+
+	   arena = BlockArena.fromBlock(program.uniform_blocks['Object'], capacity=1000)
+	   slots = arena.allocate(len(objects))
+	   arena.write(slots, model=model_matrices, color=colors)
+	   for slot, obj in zip(slots, objects):
+	       with arena.bind(slot, program.uniform_blocks['Object'].binding):
+	           obj.draw()
+
+	:param block_dtype: The datatype of one instance of the block. The block should have a
+	  standardized layout (``std140`` or ``std430``), or a layout queried from a program.
+	:type block_dtype: :py:class:`numpy.dtype`
+	:param int capacity: The initial number of slots
+	:param target: The indexed target slots are bound to, either :py:obj:`GL.GL_UNIFORM_BUFFER`
+	  or :py:obj:`GL.GL_SHADER_STORAGE_BUFFER`
+	:param usage: The usage of the buffer
+	:param alignment: The alignment of slots. It is queried for the target if it is
+	  :py:obj:`None`.
+	:type alignment: :py:obj:`int` or :py:obj:`None`
+	'''
+
+	def __init__(self, block_dtype, capacity=64, target=GL.GL_UNIFORM_BUFFER,
+	             usage=GL.GL_DYNAMIC_DRAW, alignment=None):
+		if alignment is None:
+			alignment = offsetAlignment(target)
+		self.target = target
+		self.block_dtype = block_dtype
+		self.dtype = slotDtype(block_dtype, alignment)
+		self.buffer = Buffer(usage=usage)
+		self.host = numpy.zeros(0, self.dtype)
+		self.free_slots = []
+		self.allocated = 0
+		self.reserve(capacity)
+
+	@classmethod
+	def fromBlock(cls, block, *args, **kwargs):
+		'''Create an arena holding instances of an interface block.
+
+		:param block: The block
+		:type block: :py:class:`.UniformBlock` or :py:class:`.ProgramUniformBlock`
+		:rtype: :py:class:`BlockArena`
+		'''
+		return cls(block.dtype, *args, **kwargs)
+
+	@property
+	def capacity(self):
+		''':returns: The number of slots the buffer can hold
+		:rtype: :py:obj:`int`
+		'''
+		return len(self.host)
+
+	def reserve(self, capacity):
+		'''Make sure the buffer can hold at least ``capacity`` slots. The buffer is reallocated
+		(and the contents of all slots uploaded again) if it is too small.'''
+		if capacity <= self.capacity:
+			return
+		host = numpy.zeros(capacity, self.dtype)
+		host[:self.capacity] = self.host
+		self.host = host
+		with self.buffer.bind(self.target):
+			self.buffer[...] = dtype((self.dtype, (capacity,)))
+		self.upload()
+
+	def allocate(self, count=None):
+		'''Allocate slots, growing the buffer if necessary. The contents of new slots are
+		undefined until they are written.
+
+		:param count: The number of slots to allocate, or :py:obj:`None` for a single slot
+		:type count: :py:obj:`int` or :py:obj:`None`
+		:returns: The index of the slot, or an array of indices if ``count`` is given
+		:rtype: :py:obj:`int` or :py:class:`numpy.ndarray`
+		'''
+		n = 1 if count is None else count
+		reused = self.free_slots[max(len(self.free_slots) - n, 0):]
+		del self.free_slots[len(self.free_slots) - len(reused):]
+		new = n - len(reused)
+		if self.allocated + new > self.capacity:
+			self.reserve(max(self.allocated + new, 2 * self.capacity))
+		slots = numpy.array(reused + list(range(self.allocated, self.allocated + new)),
+		                    dtype='intp')
+		self.allocated += new
+		return int(slots[0]) if count is None else slots
+
+	def free(self, slots):
+		'''Return slots to the arena, to be reused by :py:meth:`allocate`.
+
+		:param slots: The slot or slots to free
+		:type slots: :py:obj:`int` or [:py:obj:`int`]
+		'''
+		self.free_slots.extend(int(s) for s in numpy.atleast_1d(slots))
+
+	def offset(self, slot):
+		''':returns: The offset (in bytes) of a slot in the buffer
+		:rtype: :py:obj:`int`
+		'''
+		return slot * self.dtype.itemsize
+
+	def write(self, slots, values=None, **fields):
+		'''Set the contents of slots, and upload them.
+
+		The values are assigned to the host array with one numpy assignment per field, and the
+		range of the buffer spanning all written slots is uploaded with a single
+		``glBufferSubData``.
+
+		:param slots: The slot or slots to write
+		:type slots: :py:obj:`int`, :py:obj:`slice` or [:py:obj:`int`]
+		:param values: Complete block instances to write, with the datatype of the block
+		:type values: :py:class:`numpy.ndarray` or :py:obj:`None`
+		:param fields: Values of individual block members to write, by member name
+		'''
+		if values is not None:
+			for name in self.block_dtype.names:
+				self.host[name][slots] = values[name]
+		for name, value in fields.items():
+			self.host[name][slots] = value
+		written = numpy.arange(self.capacity)[slots]
+		if written.size:
+			self.upload(int(written.min()), int(written.max()) + 1)
+
+	def upload(self, start=0, stop=None):
+		'''Upload a range of slots from the host array to the buffer.
+
+		:param int start: The first slot to upload
+		:param stop: The slot after the last slot to upload, or :py:obj:`None` for all slots
+		:type stop: :py:obj:`int` or :py:obj:`None`
+		'''
+		with self.buffer.bind(self.target):
+			self.buffer[start:stop].data = self.host[start:stop]
+
+	def bind(self, slot, index):
+		'''Bind a slot to an indexed target, restoring the previous binding on exit. See
+		:py:meth:`.Buffer.bind`.
+
+		:param int slot: The slot to bind
+		:param int index: The binding index, e.g. :py:attr:`.ProgramUniformBlock.binding`
+		'''
+		return self.buffer.bind(self.target, index, self.offset(slot), self.block_dtype.itemsize)
+
+	def delete(self):
+		deleteBuffers([self.buffer])
+		self.buffer = None
+		self.host = numpy.zeros(0, self.dtype)
+		self.free_slots = []
+		self.allocated = 0
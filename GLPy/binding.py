@@ -0,0 +1,137 @@
+from OpenGL import GL
+
+from . import state
+
+from itertools import count
+from weakref import WeakSet
+
+block_attributes = { GL.GL_UNIFORM_BUFFER: 'uniform_blocks'
+                   , GL.GL_SHADER_STORAGE_BUFFER: 'shader_storage_blocks' }
+max_bindings = { GL.GL_UNIFORM_BUFFER: GL.GL_MAX_UNIFORM_BUFFER_BINDINGS
+               , GL.GL_SHADER_STORAGE_BUFFER: GL.GL_MAX_SHADER_STORAGE_BUFFER_BINDINGS }
+
+class BindingRegistry:
+	'''Allocates binding points for interface blocks, shared by all programs using the registry.
+
+	Each distinct block (by name and memory layout) gets a binding point the first time it is
+	seen, and keeps it in every program it is used in. The bindings are set when a program is
+	created or relinked (see the ``binding_registry`` argument of :py:class:`.Program`). A buffer
+	bound to a block with :py:meth:`bind` then stays bound when switching programs, so blocks
+	shared between programs (e.g. a camera) only need to be bound once per frame.
+
+	.. code-block:: python
+
+	   registry = BindingRegistry()
+	   programs = [Program.fromSources(s, binding_registry=registry, **args) for s, args in ...]
+	   # Once per frame, for all programs
+	   registry.bind(camera_block, camera_buffer)
+
+	Blocks with a binding declared in the shader keep it, and it is never allocated to other
+	blocks. If it was already allocated, the block it was allocated to is moved to a new binding
+	point, in all programs using the registry (and the buffer bound to it with :py:meth:`bind`
+	is bound to the new binding point).
+
+	:param target: The target of the blocks, :py:obj:`GL.GL_UNIFORM_BUFFER` for uniform blocks
+	  or :py:obj:`GL.GL_SHADER_STORAGE_BUFFER` for shader storage blocks
+	:param reserved: Binding points that should not be allocated, e.g. because they are managed
+	  manually
+	:type reserved: [:py:obj:`int`]
+	'''
+
+	def __init__(self, target=GL.GL_UNIFORM_BUFFER, reserved=()):
+		self.target = target
+		self.bindings = {}
+		self.reserved = set(reserved)
+		self.programs = WeakSet()
+		# Blocks and buffers bound with bind(), by binding point
+		self.bound = {}
+		# Multi-buffers bound to each binding point, which are followed when they advance
+		self.followed = {}
+
+	@staticmethod
+	def key(block):
+		'''Blocks with equal keys share a binding point.'''
+		return block.name, block.dtype
+
+	def binding(self, block):
+		'''The binding point of a block, allocating one if the block has not been seen before.
+
+		:param block: The block
+		:type block: :py:class:`.InterfaceBlock`
+		:rtype: :py:obj:`int`
+		:raises RuntimeError: If all binding points are in use
+		'''
+		shader_binding = getattr(block, 'shader_binding', None)
+		if shader_binding is not None:
+			if shader_binding not in self.reserved:
+				self.reserved.add(shader_binding)
+				for key, binding in list(self.bindings.items()):
+					if binding == shader_binding:
+						self.reallocate(key)
+			return shader_binding
+		key = self.key(block)
+		try:
+			return self.bindings[key]
+		except KeyError:
+			return self.allocate(key)
+
+	def allocate(self, key):
+		'''Allocate a free binding point to the blocks with a key.
+
+		:rtype: :py:obj:`int`
+		:raises RuntimeError: If all binding points are in use
+		'''
+		used = self.reserved.union(self.bindings.values())
+		binding = next(i for i in count() if i not in used)
+		if binding >= int(GL.glGetIntegerv(max_bindings[self.target])):
+			name, _ = key
+			raise RuntimeError("No free binding points for block '{}'.".format(name))
+		self.bindings[key] = binding
+		return binding
+
+	def reallocate(self, key):
+		'''Move the blocks with a key to a new binding point, in all programs using the registry,
+		and move the buffer bound to them with :py:meth:`bind`.'''
+		old = self.bindings.pop(key)
+		self.allocate(key)
+		for program in self.programs:
+			self.assign(program)
+		bound = self.bound.pop(old, None)
+		followed = self.followed.pop(old, None)
+		if followed is not None:
+			followed.unobserve((self, old))
+		if bound is not None:
+			self.bind(*bound)
+
+	def assign(self, program):
+		'''Set the bindings of all blocks in a program. Called by the program when it is linked.
+
+		:param program: The program
+		:type program: :py:class:`.Program`
+		'''
+		self.programs.add(program)
+		for block in getattr(program, block_attributes[self.target]).values():
+			binding = self.binding(block)
+			if block.binding != binding:
+				block.binding = binding
+
+	def bind(self, block, buffer):
+		'''Bind a buffer to the binding point of a block, leaving it bound. Binding the same
+		buffer again does not call OpenGL (unless the state was invalidated, see
+		:py:meth:`.State.invalidate`).
+
+		:param block: The block, from any program using the registry, or a block declaration
+		:type block: :py:class:`.InterfaceBlock`
+		:param buffer: The buffer. If it is a :py:class:`.MultiBuffer`, the binding follows the
+		  current copy.
+		:type buffer: :py:class:`.Buffer` or :py:class:`.MultiBuffer`
+		'''
+		binding = self.binding(block)
+		state.current().bindBufferRange(self.target, binding, buffer.handle)
+		self.bound[binding] = (block, buffer)
+		previous = self.followed.pop(binding, None)
+		if previous is not None and previous is not buffer:
+			previous.unobserve((self, binding))
+		if hasattr(buffer, 'observe'):
+			buffer.observe((self, binding), lambda: self.bind(block, buffer))
+			self.followed[binding] = buffer
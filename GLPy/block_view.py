@@ -0,0 +1,206 @@
+from OpenGL import GL
+import numpy
+try:
+	from numpy.lib.array_utils import byte_bounds
+except ImportError:
+	# numpy < 2.0
+	from numpy import byte_bounds
+
+from .buffers import Buffer
+from .GLSL import Scalar, Vector, Matrix
+from .GLSL.layout import unpackMatrices
+
+basic_type_names = {t.value for types in (Scalar, Vector, Matrix) for t in types}
+
+def isPadding(dt):
+	'''Whether a datatype is a single-field record used to pad a basic type in an interface block
+	(an element of an array of basic types, or a matrix column or row), rather than a struct.
+
+	:rtype: :py:obj:`bool`
+	'''
+	if dt.names is None or len(dt.names) != 1:
+		return False
+	name, = dt.names
+	return name in basic_type_names or name.endswith('-column') or name.endswith('-row')
+
+def unpad(array):
+	'''Strip the padding records from an array, returning a view of the values. Matrices are
+	returned as dense matrices, see :py:func:`.unpackMatrices`.
+
+	:rtype: :py:class:`numpy.ndarray`
+	'''
+	while isPadding(array.dtype):
+		name, = array.dtype.names
+		if name.endswith('-column') or name.endswith('-row'):
+			return unpackMatrices(array)
+		array = array[name]
+	return array
+
+def wrap(root, array):
+	'''Wrap part of the host record of a :py:class:`BlockView`.
+
+	:returns: A view of a struct or array of structs, or a read-only array of values.
+	'''
+	array = unpad(array)
+	if array.dtype.names is not None:
+		return RecordView(root, array) if array.ndim == 0 else ArrayView(root, array)
+	array = array.view()
+	array.flags.writeable = False
+	return array
+
+class RecordView:
+	'''A view of a struct in a :py:class:`BlockView`. Members are accessed as attributes, or by
+	name if they clash with an attribute of the view.'''
+
+	def __init__(self, root, array):
+		object.__setattr__(self, '_root', root)
+		object.__setattr__(self, '_array', array)
+
+	def __dir__(self):
+		return list(super().__dir__()) + list(self._array.dtype.names)
+
+	def __getitem__(self, name):
+		try:
+			return wrap(self._root, self._array[name])
+		except ValueError:
+			raise KeyError("No such member: {}".format(name))
+
+	def __setitem__(self, name, value):
+		try:
+			target = unpad(self._array[name])
+		except ValueError:
+			raise KeyError("No such member: {}".format(name))
+		target[...] = value
+		self._root.markDirty(target)
+
+	def __getattr__(self, name):
+		try:
+			return self[name]
+		except KeyError as e:
+			raise AttributeError(*e.args)
+
+	def __setattr__(self, name, value):
+		if name not in self._array.dtype.names:
+			raise AttributeError("No such member: {}".format(name))
+		self[name] = value
+
+class ArrayView:
+	'''A view of an array of structs in a :py:class:`BlockView`. Indexing returns a view of the
+	selected elements.'''
+
+	def __init__(self, root, array):
+		self._root = root
+		self._array = array
+
+	def __len__(self):
+		return len(self._array)
+
+	def __iter__(self):
+		return (self[i] for i in range(len(self)))
+
+	def __getitem__(self, idx):
+		return wrap(self._root, self._array[numpy.index_exp[idx] + (Ellipsis,)])
+
+	def __setitem__(self, idx, value):
+		selected = self._array[numpy.index_exp[idx] + (Ellipsis,)]
+		# Fancy indexing copies, so mark the whole array
+		self._root.markDirty(selected if numpy.may_share_memory(selected, self._array)
+		                     else self._array)
+		self._array[idx] = value
+
+class BlockView(RecordView):
+	'''An attribute-style view of an interface block, backed by a buffer.
+
+	Members are written to a record in host memory, and the range of the record that was written
+	is tracked. :py:meth:`upload` copies everything written since the last upload to the buffer
+	with a single ``glBufferSubData``, so it can be called once per frame regardless of how many
+	members changed.
+
+	.. code-block:: python
+
+	   ubo = BlockView.fromBlock(program.uniform_blocks['Scene'])
+	   ubo.camera_clip = camera_matrix
+	   ubo.lights[3].color = (1, 0, 0)
+	   with ubo.bind(program.uniform_blocks['Scene'].binding):
+	       draw()
+
+	Values of basic types are returned as read-only arrays, as writing to them could not be
+	tracked. Matrices are read and written as dense matrices, indexed by row and then column,
+	whatever their layout in the block (see :py:func:`.packMatrices`). Members with the same name as an attribute of the view (e.g. ``bind``) can be
+	accessed by indexing: ``ubo['bind']``.
+
+	:param block_dtype: The datatype of the block
+	:type block_dtype: :py:class:`numpy.dtype`
+	:param target: The target the buffer is bound to, :py:obj:`GL.GL_UNIFORM_BUFFER` or
+	  :py:obj:`GL.GL_SHADER_STORAGE_BUFFER`
+	:param buffer: The buffer to write to. One is created (with the datatype of the block) if it
+	  is :py:obj:`None`.
+	:type buffer: :py:class:`.Buffer` or :py:obj:`None`
+	:param usage: The usage of the created buffer
+	'''
+
+	def __init__(self, block_dtype, target=GL.GL_UNIFORM_BUFFER, buffer=None,
+	             usage=GL.GL_DYNAMIC_DRAW):
+		host = numpy.zeros((), block_dtype)
+		super().__init__(self, host)
+		object.__setattr__(self, '_target', target)
+		object.__setattr__(self, '_dirty', None)
+		if buffer is None:
+			buffer = Buffer(usage=usage)
+			with buffer.bind(target):
+				buffer[...] = host
+		object.__setattr__(self, '_buffer', buffer)
+
+	@classmethod
+	def fromBlock(cls, block, *args, **kwargs):
+		'''Create a view of an interface block.
+
+		:param block: The block
+		:type block: :py:class:`.UniformBlock` or :py:class:`.ProgramUniformBlock`
+		:rtype: :py:class:`BlockView`
+		'''
+		return cls(block.dtype, *args, **kwargs)
+
+	@property
+	def buffer(self):
+		return self._buffer
+
+	@property
+	def dirty(self):
+		'''The byte range of the block written since the last upload.
+
+		:rtype: (:py:obj:`int`, :py:obj:`int`) or :py:obj:`None`
+		'''
+		return self._dirty
+
+	def markDirty(self, array):
+		'''Mark the memory of part of the host record as written.
+
+		:param array: A view of the host record
+		:type array: :py:class:`numpy.ndarray`
+		'''
+		low, high = byte_bounds(array)
+		base = self._array.ctypes.data
+		start, stop = low - base, high - base
+		if self._dirty is not None:
+			start, stop = min(start, self._dirty[0]), max(stop, self._dirty[1])
+		object.__setattr__(self, '_dirty', (start, stop))
+
+	def upload(self):
+		'''Upload the written members to the buffer, with at most one ``glBufferSubData``.'''
+		if self._dirty is None:
+			return
+		start, stop = self._dirty
+		data = self._array.reshape(1).view('uint8')[start:stop]
+		with self._buffer.bind(self._target):
+			GL.glBufferSubData(self._target, start, stop - start, data)
+		object.__setattr__(self, '_dirty', None)
+
+	def bind(self, index):
+		'''Upload the written members, and bind the buffer to an indexed target. See
+		:py:meth:`.Buffer.bind`.
+
+		:param int index: The binding index, e.g. :py:attr:`.ProgramUniformBlock.binding`
+		'''
+		self.upload()
+		return self._buffer.bind(self._target, index)
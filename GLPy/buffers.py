@@ -6,6 +6,8 @@ from contextlib import contextmanager
 
 from ctypes import c_byte
 
+from . import state
+
 from util.misc import product, contains
 from util.indexing import isContiguous, flatOffset
 
@@ -26,12 +28,24 @@ integer_buffer_types = { GL.GL_BYTE, GL.GL_UNSIGNED_BYTE
 floating_point_buffer_types = { GL.GL_HALF_FLOAT, GL.GL_FLOAT, GL.GL_DOUBLE }
 
 def baseDtype(dtype):
+	if dtype.subdtype is None:
+		# A single element, e.g. a shader storage block
+		return dtype, ()
 	dt, shape = dtype.subdtype
 	while dt.subdtype:
 		dt, new_shape = dt.subdtype
 		shape += new_shape
 	return dt, shape
 
+def deleteBuffers(buffers):
+	'''Delete buffers, and forget their bindings (see :py:meth:`.State.forget`).
+
+	:type buffers: [:py:class:`Buffer`]
+	'''
+	handles = [b.handle for b in buffers]
+	GL.glDeleteBuffers(len(handles), handles)
+	state.current().forget(GL.GL_BUFFER, *handles)
+
 class Buffer:
 	"""An OpenGL buffer.
 
@@ -52,7 +66,8 @@ class Buffer:
 		self.handle = GL.glGenBuffers(1) if handle is None else handle
 		if not self.handle:
 			raise RuntimeError("Failed to generate buffer.")
-		self.active_bindings = set()
+		# A list rather than a set, as bindings to the same target may be nested
+		self.active_bindings = []
 
 	# TODO: Deal with deleting buffers
 	def map(self, access=(GL.GL_MAP_READ_BIT | GL.GL_MAP_WRITE_BIT)):
@@ -131,26 +146,52 @@ class Buffer:
 		return SubBuffer(self, *idxs)
 
 	@contextmanager
-	def bind(self, target, index=None):
-		"""Binds the buffer to a target, with an optional index for an indexed target.
+	def bind(self, target, index=None, offset=None, size=None):
+		"""Binds the buffer to a target, with an optional index for an indexed target. The
+		previous binding is restored on exit (unless :py:attr:`.State.unbind` is unset). Binding a
+		buffer that is already bound does not call OpenGL.
+
+		:param target: The target to bind the buffer to
+		:param index: The index of an indexed target (e.g. :py:obj:`GL.GL_UNIFORM_BUFFER`)
+		:type index: :py:obj:`int` or :py:obj:`None`
+		:param offset: The start (in bytes) of the range of the buffer to bind to the indexed
+		  target. The whole buffer is bound if it is :py:obj:`None`. It must be a multiple of the
+		  offset alignment of the target (e.g. ``GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT``).
+		:type offset: :py:obj:`int` or :py:obj:`None`
+		:param size: The size (in bytes) of the range to bind. Defaults to the rest of the buffer.
+		:type size: :py:obj:`int` or :py:obj:`None`
+		:raises ValueError: If a range is given without an index
 
 		.. warning::
 
-		   It is not allowed to bind two buffers (or one buffer twice) to the same target
-		   simultaneously.
+		   Contexts binding buffers to the same target must be nested, and buffer bindings must
+		   not be changed outside of GLPy (see :py:meth:`.State.invalidate`).
 		"""
 
+		if index is None and (offset is not None or size is not None):
+			raise ValueError("Only indexed targets can be bound to a buffer range.")
+		if size is not None and offset is None:
+			offset = 0
+		if offset is not None and size is None:
+			size = self.nbytes - offset
+
+		current = state.current()
 		if index is None:
-			GL.glBindBuffer(target, self.handle)
-		else:
-			GL.glBindBufferBase(target, index, self.handle)
-		self.active_bindings.add(target)
-		yield
-		if index is None:
-			GL.glBindBuffer(target, 0)
+			previous = current.bindBuffer(target, self.handle)
 		else:
-			GL.glBindBufferBase(target, index, 0)
-		self.active_bindings.remove(target)
+			previous = current.bindBufferRange(target, index, self.handle, offset, size)
+		self.active_bindings.append(target)
+		try:
+			yield
+		finally:
+			self.active_bindings.remove(target)
+			if current.unbind:
+				if index is None:
+					current.bindBuffer(target, previous or 0)
+				elif previous is None:
+					current.bindBufferRange(target, index, 0)
+				else:
+					current.bindBufferRange(target, index, *previous)
 
 	@property
 	def nbytes(self):
@@ -312,6 +353,12 @@ class SubBuffer:
 	def __setitem__(self, idxs, value):
 		raise NotImplementedError("TODO: Allow changing sub-buffer dtypes.")
 
+	def bind(self, target, index):
+		"""Bind the range of the buffer containing the sub-buffer to an indexed target. See
+		:py:meth:`Buffer.bind`.
+		"""
+		return self.buffer.bind(target, index, self.offset, self.nbytes)
+
 	@property
 	def nbytes(self):
 		return self.dtype.itemsize
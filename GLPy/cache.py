@@ -0,0 +1,262 @@
+from OpenGL import GL
+import numpy
+
+from .program import shader_types
+
+import os
+import hashlib
+import struct
+
+def defaultCacheDirectory(*subdirs):
+	'''The default location for on-disk caches, following the XDG base directory specification.
+
+	:rtype: :py:obj:`str`
+	'''
+	base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+	return os.path.join(base, 'GLPy', *subdirs)
+
+class DiskCache:
+	'''A directory of binary blobs, evicted in least-recently-used order.
+
+	Entries are stored one per file, named by their key. The modification time of each file records
+	when it was last used, so the cache state persists between processes.
+
+	:param str directory: The directory to store entries in. It will be created if it does not
+	  exist.
+	:param max_size: The maximum total size of all entries (in bytes), or :py:obj:`None` for no
+	  limit.
+	:type max_size: :py:obj:`int` or :py:obj:`None`
+	:param max_entries: The maximum number of entries, or :py:obj:`None` for no limit.
+	:type max_entries: :py:obj:`int` or :py:obj:`None`
+	'''
+
+	suffix = '.bin'
+
+	def __init__(self, directory, max_size=None, max_entries=None):
+		self.directory = directory
+		self.max_size = max_size
+		self.max_entries = max_entries
+		os.makedirs(self.directory, exist_ok=True)
+
+	def path(self, key):
+		return os.path.join(self.directory, ''.join((key, self.suffix)))
+
+	def __contains__(self, key):
+		return os.path.isfile(self.path(key))
+
+	def __len__(self):
+		return len(self.entries())
+
+	def entries(self):
+		'''All entries in the cache, from least to most recently used.
+
+		:rtype: [(:py:obj:`str`, :py:obj:`os.stat_result`)]
+		'''
+		entries = []
+		for name in os.listdir(self.directory):
+			if not name.endswith(self.suffix):
+				continue
+			try:
+				stat = os.stat(os.path.join(self.directory, name))
+			except FileNotFoundError:
+				continue
+			entries.append((name[:-len(self.suffix)], stat))
+		return sorted(entries, key=lambda e: e[1].st_mtime_ns)
+
+	def get(self, key):
+		'''Return the data stored for a key, marking it as recently used.
+
+		:rtype: :py:obj:`bytes` or :py:obj:`None`
+		'''
+		path = self.path(key)
+		try:
+			with open(path, 'rb') as f:
+				data = f.read()
+		except FileNotFoundError:
+			return None
+		try:
+			os.utime(path)
+		except FileNotFoundError:
+			pass
+		return data
+
+	def put(self, key, data):
+		'''Store data for a key, then evict old entries until the cache is within its limits.'''
+		path = self.path(key)
+		# Write to a temporary file first, so concurrent readers never see a partial entry
+		tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+		with open(tmp_path, 'wb') as f:
+			f.write(data)
+		os.replace(tmp_path, path)
+		self.evict()
+
+	def remove(self, key):
+		try:
+			os.remove(self.path(key))
+		except FileNotFoundError:
+			pass
+
+	def clear(self):
+		for key, _ in self.entries():
+			self.remove(key)
+
+	def evict(self):
+		'''Remove least-recently used entries until the cache is within its limits.'''
+		entries = self.entries()
+		size = sum(stat.st_size for _, stat in entries)
+		for key, stat in entries:
+			if ((self.max_size is None or size <= self.max_size)
+			    and (self.max_entries is None or len(entries) <= self.max_entries)):
+				break
+			self.remove(key)
+			size -= stat.st_size
+			entries = entries[1:]
+
+# Precedes each cached program, contains the binary format
+program_binary_header = struct.Struct('<I')
+
+class ProgramBinaryCache(DiskCache):
+	'''An on-disk cache of linked program binaries, for use with :py:meth:`.Program.fromSources`.
+
+	Entries are keyed by the shader sources, transform feedback varyings and the OpenGL
+	implementation, so changing drivers will not load incompatible binaries. A binary that is
+	rejected by the driver anyway is removed, and the program is compiled from source.
+
+	Requires OpenGL 4.1 or ``ARB_get_program_binary``.
+
+	:param directory: The directory to store program binaries in. Defaults to a ``GLPy/programs``
+	  directory in the user's cache directory.
+	:type directory: :py:obj:`str` or :py:obj:`None`
+	:param max_size: See :py:class:`DiskCache`
+	:param max_entries: See :py:class:`DiskCache`
+	'''
+
+	def __init__(self, directory=None, max_size=64 * 2 ** 20, max_entries=None):
+		if directory is None:
+			directory = defaultCacheDirectory('programs')
+		super().__init__(directory, max_size, max_entries)
+
+	@staticmethod
+	def driver():
+		'''Identifies the current OpenGL implementation and the binary formats it accepts.
+
+		:rtype: :py:obj:`tuple`
+		'''
+		strings = tuple(GL.glGetString(name) for name in (GL.GL_VENDOR, GL.GL_RENDERER,
+		                                                   GL.GL_VERSION))
+		n_formats = int(GL.glGetIntegerv(GL.GL_NUM_PROGRAM_BINARY_FORMATS))
+		formats = tuple(int(f) for f in GL.glGetIntegerv(GL.GL_PROGRAM_BINARY_FORMATS).flat
+		                ) if n_formats else ()
+		return strings + (formats[:n_formats],)
+
+	def key(self, sources, xfb_varyings=None, xfb_mode=GL.GL_INTERLEAVED_ATTRIBS):
+		'''Calculate the cache key for a program.
+
+		:param sources: The shader sources, as passed to :py:meth:`.Program.fromSources`
+		:type sources: {:py:obj:`str` or :py:obj:`int`: :py:obj:`str`}
+		:param xfb_varyings: The transform feedback varyings of the program
+		:type xfb_varyings: [:py:class:`.FeedbackVarying`] or :py:obj:`None`
+		:rtype: :py:obj:`str`
+		'''
+		h = hashlib.sha256()
+		def update(*items):
+			for item in items:
+				if not isinstance(item, bytes):
+					item = str(item).encode()
+				h.update(struct.pack('<Q', len(item)))
+				h.update(item)
+
+		stages = sorted((int(shader_types[t]), s) for t, s in sources.items())
+		for shader_type, source in stages:
+			update(shader_type, source)
+		if xfb_varyings is not None:
+			update(int(xfb_mode), *(v.name for v in xfb_varyings))
+		update(*self.driver())
+		return h.hexdigest()
+
+	def load(self, key):
+		'''Load a program binary.
+
+		:returns: The binary format and binary data, or :py:obj:`None` if there is no such entry.
+		:rtype: (:py:obj:`int`, :py:obj:`bytes`) or :py:obj:`None`
+		'''
+		data = self.get(key)
+		if data is None or len(data) < program_binary_header.size:
+			return None
+		binary_format, = program_binary_header.unpack_from(data)
+		return binary_format, data[program_binary_header.size:]
+
+	def store(self, key, binary_format, binary):
+		'''Store a program binary, as returned by :py:attr:`.Program.binary`.'''
+		self.put(key, program_binary_header.pack(binary_format) + bytes(binary))
+
+# Precedes each cached texture, contains the number of levels and then the size of each level
+texture_header = struct.Struct('<I')
+texture_level_header = struct.Struct('<Q')
+
+class CompressedTextureCache(DiskCache):
+	'''An on-disk cache of textures compressed by the driver, for use with
+	:py:meth:`.ImmutableTexture.compress`.
+
+	Entries are keyed by the image data and the format of the texture. Compressed formats are
+	standardized, so entries are not specific to the OpenGL implementation.
+
+	:param directory: The directory to store textures in. Defaults to a ``GLPy/textures``
+	  directory in the user's cache directory.
+	:type directory: :py:obj:`str` or :py:obj:`None`
+	:param max_size: See :py:class:`DiskCache`
+	:param max_entries: See :py:class:`DiskCache`
+	'''
+
+	def __init__(self, directory=None, max_size=256 * 2 ** 20, max_entries=None):
+		if directory is None:
+			directory = defaultCacheDirectory('textures')
+		super().__init__(directory, max_size, max_entries)
+
+	@staticmethod
+	def key(texture, image, levels=1):
+		'''Calculate the cache key for a texture.
+
+		:param texture: The texture
+		:type texture: :py:class:`.ImmutableTexture`
+		:param image: The uncompressed image data of the base level
+		:type image: :py:class:`numpy.ndarray`
+		:param int levels: The number of levels stored
+		:rtype: :py:obj:`str`
+		'''
+		image = numpy.ascontiguousarray(image)
+		h = hashlib.sha256()
+		h.update(str((int(texture.internal_format), int(texture.target), texture.size,
+		              texture.count, texture.components, levels, image.dtype.str, image.shape)
+		            ).encode())
+		h.update(image.data)
+		return h.hexdigest()
+
+	def load(self, key):
+		'''Load the compressed levels of a texture.
+
+		:returns: The compressed data of each level, or :py:obj:`None` if there is no such entry.
+		:rtype: [:py:obj:`bytes`] or :py:obj:`None`
+		'''
+		data = self.get(key)
+		if data is None or len(data) < texture_header.size:
+			return None
+		n_levels, = texture_header.unpack_from(data)
+		offset = texture_header.size + n_levels * texture_level_header.size
+		levels = []
+		for i in range(n_levels):
+			size, = texture_level_header.unpack_from(data, texture_header.size
+			                                         + i * texture_level_header.size)
+			levels.append(data[offset:offset + size])
+			offset += size
+		if offset != len(data):
+			return None
+		return levels
+
+	def store(self, key, levels):
+		'''Store the compressed levels of a texture, as returned by
+		:py:meth:`.ImmutableTexture.readCompressed`.'''
+		levels = [bytes(level) for level in levels]
+		header = texture_header.pack(len(levels)) + b''.join(texture_level_header.pack(len(level))
+		                                                     for level in levels)
+		self.put(key, header + b''.join(levels))
@@ -0,0 +1,259 @@
+from OpenGL import GL, contextdata
+from numpy import dtype
+import numpy
+
+from .GLSL import Scalar, Vector, BasicType, Variable, VertexAttribute, FeedbackVarying
+from .program import Program
+from .buffers import Buffer, deleteBuffers
+from .vertex import VAO
+from .transform_feedback import TransformFeedback, feedbackDtype
+from . import state
+
+scalar_dtypes = { dtype('float32'): Scalar.float, dtype('float64'): Scalar.double
+                , dtype('int32'): Scalar.int, dtype('uint32'): Scalar.uint }
+
+def glslType(element_dtype):
+	'''The GLSL type of one element of an array, as used for kernel inputs and outputs.
+
+	:param element_dtype: The datatype of the element, either a scalar or a 1-dimensional
+	  subarray of 2 to 4 scalars.
+	:type element_dtype: :py:class:`numpy.dtype`
+	:rtype: :py:class:`.Scalar` or :py:class:`.Vector`
+	:raises TypeError: If there is no corresponding GLSL type
+	'''
+	base, shape = element_dtype.subdtype or (element_dtype, ())
+	try:
+		scalar_type = scalar_dtypes[base]
+	except KeyError:
+		raise TypeError("No GLSL type for elements of type {}".format(base))
+	if not shape:
+		return scalar_type
+	if len(shape) == 1 and 2 <= shape[0] <= 4:
+		return Vector.fromType(scalar_type, shape[0])
+	raise TypeError("No GLSL type for elements of shape {}".format(shape))
+
+def kernelSource(body, inputs, outputs, uniforms=(), preamble=''):
+	'''Generate the vertex shader for a kernel.
+
+	:rtype: :py:obj:`str`
+	'''
+	uses_doubles = any(v.datatype.scalar_type == Scalar.double for v in inputs)
+	lines = ['#version {}'.format(410 if uses_doubles else 330), preamble]
+	for qualifier, declarations in (('uniform', uniforms), ('in', inputs), ('out', outputs)):
+		lines.extend('{} {} {};'.format(qualifier, v.datatype.name, v.name) for v in declarations)
+	lines.extend(['void main() {', body, '}'])
+	return '\n'.join(lines)
+
+def variables(declarations, variable_type=Variable):
+	return [variable_type(name, datatype) for name, datatype in declarations]
+
+class Kernel:
+	'''An elementwise function over arrays, run on the GPU.
+
+	Each element of the input arrays is a vertex: the inputs are uploaded as vertex attributes, the
+	body is run in a generated vertex shader, and the outputs are captured with transform feedback.
+	The compiled program is cached per context by signature, so creating an identical kernel again
+	does not compile anything.
+
+	.. code-block:: python
+
+	   kernel = Kernel('y = a * x + b;', inputs=[('x', 'vec3'), ('b', 'vec3')],
+	                   outputs=[('y', 'vec3')], uniforms=[('a', 'float')])
+	   y = kernel(x, b, a=2)
+
+	:param str body: The GLSL statements computing the outputs from the inputs
+	:param inputs: The name and GLSL type of each input, in order
+	:type inputs: [(:py:obj:`str`, :py:obj:`str`)]
+	:param outputs: The name and GLSL type of each output, in order
+	:type outputs: [(:py:obj:`str`, :py:obj:`str`)]
+	:param uniforms: The name and GLSL type of uniform parameters, which are passed as keyword
+	  arguments when calling the kernel.
+	:type uniforms: [(:py:obj:`str`, :py:obj:`str`)]
+	:param str preamble: GLSL code placed before the declarations, e.g. helper functions
+	:param int chunk_size: The maximum number of elements processed at once. Larger inputs are
+	  processed in several passes, so buffers never exceed this size.
+
+	.. warning:: |program-bind|
+	'''
+
+	def __init__(self, body, inputs, outputs, uniforms=(), preamble='', chunk_size=2 ** 20):
+		self.inputs = variables(inputs, VertexAttribute)
+		self.outputs = variables(outputs, FeedbackVarying)
+		self.uniforms = variables(uniforms)
+		for v in self.inputs + self.outputs:
+			if not isinstance(v.datatype, BasicType):
+				raise TypeError("Kernel inputs and outputs must be of basic types.")
+		self.chunk_size = chunk_size
+		self.source = kernelSource(body, self.inputs, self.outputs, self.uniforms, preamble)
+		self.signature = (self.source, tuple(v.name for v in self.outputs))
+
+	@classmethod
+	def fromExpression(cls, expression, inputs, output_type='float', **kwargs):
+		'''Create a kernel with a single output named ``result``, computed by a GLSL expression.
+
+		:param str expression: The GLSL expression
+		:param inputs: See :py:class:`Kernel`
+		:param output_type: The GLSL type of the expression
+		:rtype: :py:class:`Kernel`
+		'''
+		body = 'result = {};'.format(expression)
+		return cls(body, inputs, [('result', output_type)], **kwargs)
+
+	@property
+	def compiled(self):
+		'''The compiled kernel for the current context, shared by all kernels with the same
+		signature.
+
+		:rtype: :py:class:`CompiledKernel`
+		'''
+		kernels = contextdata.getValue('GLPy.kernels')
+		if kernels is None:
+			kernels = {}
+			contextdata.setValue('GLPy.kernels', kernels)
+		try:
+			return kernels[self.signature]
+		except KeyError:
+			program = Program.fromSources({'vertex': self.source}, vertex_attributes=self.inputs,
+			                              uniforms=self.uniforms, xfb_varyings=self.outputs)
+			compiled = kernels[self.signature] = CompiledKernel(program,
+			                                                    [v.name for v in self.inputs])
+			return compiled
+
+	@property
+	def program(self):
+		'''The program running the kernel.
+
+		:rtype: :py:class:`.Program`
+		'''
+		return self.compiled.program
+
+	def __call__(self, *arrays, **uniforms):
+		'''Run the kernel.
+
+		:param arrays: An array for each input, with one element per vertex. All arrays must have
+		  the same length.
+		:type arrays: [:py:class:`numpy.ndarray`]
+		:param uniforms: The values of the uniforms
+		:returns: An array for each output, or a single array if there is only one output.
+		:rtype: :py:class:`numpy.ndarray` or (:py:class:`numpy.ndarray`)
+		'''
+		if len(arrays) != len(self.inputs):
+			raise ValueError("Expected {} input arrays, got {}."
+			                 .format(len(self.inputs), len(arrays)))
+		arrays = [numpy.asarray(a) for a in arrays]
+		count = len(arrays[0]) if arrays else 0
+		if any(len(a) != count for a in arrays):
+			raise ValueError("Input arrays must all have the same length.")
+
+		results = numpy.empty(count, dtype=feedbackDtype(self.outputs))
+		compiled = self.compiled
+		program = compiled.program
+		for name, value in uniforms.items():
+			program.uniforms[name].data = value
+		compiled.reserve(min(count, self.chunk_size))
+
+		GL.glEnable(GL.GL_RASTERIZER_DISCARD)
+		try:
+			for start in range(0, count, self.chunk_size):
+				stop = min(start + self.chunk_size, count)
+				results[start:stop] = compiled.run([a[start:stop] for a in arrays])
+		finally:
+			GL.glDisable(GL.GL_RASTERIZER_DISCARD)
+
+		outputs = tuple(results[v.name] for v in self.outputs)
+		return outputs[0] if len(outputs) == 1 else outputs
+
+class CompiledKernel:
+	'''The program and buffers running a :py:class:`Kernel` in one context.
+
+	:param program: The kernel program
+	:type program: :py:class:`.Program`
+	:param inputs: The names of the kernel inputs, in order
+	:type inputs: [:py:obj:`str`]
+	'''
+
+	def __init__(self, program, inputs):
+		self.program = program
+		self.inputs = [program.vertex_attributes[name] for name in inputs]
+		self.capacity = 0
+		self.input_buffers = {}
+		self.vao = None
+		self.feedback = None
+
+	def reserve(self, capacity):
+		'''Make sure the buffers can hold at least ``capacity`` elements.'''
+		if capacity <= self.capacity:
+			return
+		self.delete()
+		for attribute in self.inputs:
+			buf = Buffer(usage=GL.GL_STREAM_DRAW)
+			with buf.bind(GL.GL_ARRAY_BUFFER):
+				buf[...] = dtype((dtype([(attribute.name, attribute.datatype.machine_type)]),
+				                  (capacity,)))
+			self.input_buffers[attribute.name] = buf
+		# Inputs that are not used by the kernel are not active
+		active = [a for a in self.inputs if a.location >= 0]
+		self.vao = VAO(*active)
+		for a in active:
+			self.vao[a.name].data = self.input_buffers[a.name].items[a.name]
+		self.feedback = TransformFeedback.fromProgram(self.program, capacity,
+		                                              usage=GL.GL_STREAM_READ)
+		self.capacity = capacity
+
+	def run(self, arrays):
+		'''Run the kernel over at most :py:attr:`capacity` elements. Rasterization should be
+		disabled.
+
+		:param arrays: The input arrays, in order of the kernel inputs
+		:type arrays: [:py:class:`numpy.ndarray`]
+		:returns: The captured outputs
+		:rtype: :py:class:`numpy.ndarray`
+		'''
+		count = len(arrays[0])
+		for attribute, array in zip(self.inputs, arrays):
+			buf = self.input_buffers[attribute.name]
+			chunk = numpy.empty(count, dtype=buf.dtype.base)
+			chunk[attribute.name] = array
+			with buf.bind(GL.GL_ARRAY_BUFFER):
+				buf[:count].data = chunk
+		with self.vao, self.program, self.feedback.feedback(GL.GL_POINTS):
+			GL.glDrawArrays(GL.GL_POINTS, 0, count)
+		output_buffer, = self.feedback.buffers
+		with output_buffer.bind(GL.GL_COPY_READ_BUFFER):
+			return output_buffer[:count].data
+
+	def delete(self):
+		'''Delete the buffers, keeping the program.'''
+		if self.feedback is not None:
+			self.feedback.delete()
+			deleteBuffers(self.input_buffers.values())
+			GL.glDeleteVertexArrays(1, [self.vao.handle])
+			state.current().forget(GL.GL_VERTEX_ARRAY, self.vao.handle)
+		self.input_buffers = {}
+		self.vao = None
+		self.feedback = None
+		self.capacity = 0
+
+def elementwise(expression, output_type=None, **arrays):
+	'''Evaluate a GLSL expression for each element of some arrays on the GPU. The GLSL types of
+	the inputs are derived from the arrays.
+
+	.. code-block:: python
+
+	   elementwise('x * 2 + y', x=numpy.arange(4, dtype='float32'), y=numpy.ones(4, 'float32'))
+	   # array([ 1.,  3.,  5.,  7.], dtype=float32)
+
+	:param str expression: The GLSL expression
+	:param output_type: The GLSL type of the expression. Defaults to the type of the first input,
+	  in order of name.
+	:type output_type: :py:obj:`str` or :py:obj:`None`
+	:param arrays: The inputs, by name
+	:type arrays: {:py:obj:`str`: :py:class:`numpy.ndarray`}
+	:rtype: :py:class:`numpy.ndarray`
+	'''
+	names = sorted(arrays)
+	arrays = [numpy.asarray(arrays[name]) for name in names]
+	inputs = [(name, glslType(dtype((a.dtype, a.shape[1:])))) for name, a in zip(names, arrays)]
+	if output_type is None:
+		output_type = inputs[0][1]
+	return Kernel.fromExpression(expression, inputs, output_type)(*arrays)
@@ -0,0 +1,139 @@
+from OpenGL import GL
+
+from .buffers import Buffer, SubBuffer, BufferItem, deleteBuffers
+from .sync import Fence
+
+class MultiBuffer:
+	'''Several copies of a buffer, rotated once per frame, so that writing a frame's data never
+	waits for the GPU to finish reading the previous frame's data.
+
+	All reads and writes go to the current copy. :py:meth:`advance` (called at the end of each
+	frame) inserts a fence after the commands using the current copy, and moves on to the next
+	copy, waiting for its fence if the GPU is still using it. Users of the buffer that hold on to
+	it (vertex attributes, and bindings made through a :py:class:`.BindingRegistry`) are told
+	when the current copy changes, and follow it.
+
+	.. code-block:: python
+
+	   instances = MultiBuffer(copies=3)
+	   with instances.bind(GL.GL_ARRAY_BUFFER):
+	       instances[...] = dtype((instance_dtype, (count,)))
+	   vao['offset'].data = instances.items['offset']
+	   while running:
+	       with instances.bind(GL.GL_ARRAY_BUFFER):
+	           instances.data = instance_data
+	       draw()
+	       instances.advance()
+
+	As each frame writes a different copy, the whole buffer should be written every frame.
+
+	:param int copies: The number of copies
+	:param usage: The usage of the buffers
+	'''
+
+	def __init__(self, copies=3, usage=GL.GL_STREAM_DRAW):
+		if copies < 1:
+			raise ValueError("A multi-buffer needs at least one copy.")
+		self.buffers = [Buffer(usage=usage) for _ in range(copies)]
+		self.fences = [None] * copies
+		self.index = 0
+		self.observers = {}
+
+	@property
+	def current(self):
+		'''The copy being used for the current frame.
+
+		:rtype: :py:class:`.Buffer`
+		'''
+		return self.buffers[self.index]
+
+	@property
+	def handle(self):
+		return self.current.handle
+
+	@property
+	def dtype(self):
+		return self.current.dtype
+
+	@property
+	def nbytes(self):
+		return self.current.nbytes
+
+	@property
+	def stride(self):
+		return self.current.stride
+
+	@property
+	def active_bindings(self):
+		return self.current.active_bindings
+
+	@property
+	def items(self):
+		'''The items in the buffer, suitable for passing to a :py:class:`.VAOAttribute`. Vertex
+		attributes using them follow the current copy.'''
+		return BufferItem.fromBuffer(self)
+
+	def __setitem__(self, idxs, data):
+		'''Set the datatype (and optionally the contents) of all copies. See
+		:py:meth:`.Buffer.__setitem__`. The current copy must be bound.
+		'''
+		target = next(iter(self.current.active_bindings), GL.GL_COPY_WRITE_BUFFER)
+		for buf in self.buffers:
+			with buf.bind(target):
+				buf[idxs] = data
+
+	def __getitem__(self, idxs):
+		''':returns: A sub-buffer of the current copy
+		:rtype: :py:class:`.SubBuffer`
+		'''
+		if not isinstance(idxs, tuple):
+			idxs = (idxs,)
+		return SubBuffer(self.current, *idxs)
+
+	def bind(self, target, index=None, offset=None, size=None):
+		'''Bind the current copy, see :py:meth:`.Buffer.bind`.'''
+		return self.current.bind(target, index, offset, size)
+
+	@property
+	def data(self):
+		'''The contents of the current copy, see :py:attr:`.Buffer.data`.'''
+		return self.current.data
+
+	@data.setter
+	def data(self, value):
+		self.current.data = value
+
+	def observe(self, key, callback):
+		'''Call a function each time the current copy changes.
+
+		:param key: Identifies the observer. Observing again with the same key replaces the
+		  callback.
+		:param callback: The function, called with no arguments
+		'''
+		self.observers[key] = callback
+
+	def unobserve(self, key):
+		self.observers.pop(key, None)
+
+	def advance(self):
+		'''Finish using the current copy for this frame, and move on to the next copy. Blocks
+		only if the GPU has not finished the commands using the next copy yet.
+		'''
+		self.fences[self.index] = Fence()
+		self.index = (self.index + 1) % len(self.buffers)
+		fence = self.fences[self.index]
+		if fence is not None:
+			fence.wait()
+			fence.delete()
+			self.fences[self.index] = None
+		for callback in list(self.observers.values()):
+			callback()
+
+	def delete(self):
+		for fence in self.fences:
+			if fence is not None:
+				fence.delete()
+		deleteBuffers(self.buffers)
+		self.buffers = []
+		self.fences = []
+		self.observers = {}
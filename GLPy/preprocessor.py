@@ -0,0 +1,191 @@
+from .program import Program, shader_types
+
+import os
+import re
+
+include_pattern = re.compile(r'^\s*#\s*include\s*[<"]([^>"]+)[>"]\s*$')
+version_pattern = re.compile(r'^\s*#\s*version\s+(\d+)(?:\s+(\w+))?\s*$')
+pragma_once_pattern = re.compile(r'^\s*#\s*pragma\s+once\s*$')
+# Extensions allowing #include in the driver are not needed once includes are resolved
+include_extension_pattern = re.compile(
+	r'^\s*#\s*extension\s+GL_(?:ARB_shading_language_include|GOOGLE_include_directive)\b')
+
+def defineLine(name, value=None):
+	'''The ``#define`` directive for a macro. Booleans are defined as ``1`` or ``0``, so they can
+	be tested with ``#if``.
+
+	:rtype: :py:obj:`str`
+	'''
+	if value is None:
+		return '#define {}'.format(name)
+	if isinstance(value, bool):
+		value = int(value)
+	return '#define {} {}'.format(name, value)
+
+class Preprocessor:
+	'''Expands GLSL sources before they are compiled.
+
+	- ``#include "file"`` and ``#include <file>`` directives are replaced with the contents of
+	  the file. Files are searched for relative to the including file (if it has a path), then in
+	  each of the search paths. Files containing ``#pragma once`` are included only once.
+	- The ``#version`` directive is moved to the first line of the source, and other
+	  ``#version`` directives (e.g. in included files) are removed.
+	- Macros are defined directly after the ``#version`` directive.
+
+	Expanded sources, and programs compiled with :py:meth:`program`, are cached by source and set
+	of defines. The contents of included files are cached too, :py:meth:`clear` must be called if
+	they change.
+
+	:param search_paths: The directories to search for included files
+	:type search_paths: [:py:obj:`str`]
+	:param defines: Macros to define in all sources, mapping names to values (or :py:obj:`None`
+	  for an empty macro)
+	:type defines: {:py:obj:`str`: :py:obj:`object`}
+	:param version: The version to use for all sources, e.g. ``'330 core'``. If it is
+	  :py:obj:`None`, the ``#version`` directive of each source is kept.
+	:type version: :py:obj:`str` or :py:obj:`None`
+	'''
+
+	def __init__(self, search_paths=(), defines=None, version=None):
+		self.search_paths = list(search_paths)
+		self.defines = dict(defines or {})
+		self.version = version
+		self.files = {}
+		self.expanded = {}
+		self.programs = {}
+
+	def clear(self):
+		'''Clear the cached files, expanded sources and programs. The programs are not deleted.'''
+		self.files = {}
+		self.expanded = {}
+		self.programs = {}
+
+	def defineSet(self, defines=None):
+		'''The combined global and additional defines, in a hashable form.
+
+		:rtype: :py:obj:`frozenset`
+		'''
+		combined = dict(self.defines)
+		combined.update(defines or {})
+		return frozenset(combined.items())
+
+	def find(self, name, directory=None):
+		'''Find an included file.
+
+		:param str name: The name given in the ``#include`` directive
+		:param directory: The directory containing the including file
+		:type directory: :py:obj:`str` or :py:obj:`None`
+		:raises FileNotFoundError: If the file is not in any of the search paths
+		:returns: The absolute path to the file
+		:rtype: :py:obj:`str`
+		'''
+		directories = ([] if directory is None else [directory]) + self.search_paths
+		for d in directories:
+			path = os.path.join(d, name)
+			if os.path.isfile(path):
+				return os.path.abspath(path)
+		raise FileNotFoundError("Could not find included file {!r} in {}"
+		                        .format(name, directories))
+
+	def read(self, path):
+		try:
+			return self.files[path]
+		except KeyError:
+			with open(path) as f:
+				source = self.files[path] = f.read()
+			return source
+
+	def resolve(self, source, directory=None, stack=(), included=None):
+		'''Resolve the includes in a source.
+
+		:returns: The lines of the source and the version given in it (if any)
+		:rtype: ([:py:obj:`str`], :py:obj:`str` or :py:obj:`None`)
+		'''
+		if included is None:
+			included = set()
+		lines = []
+		version = None
+		for line in source.splitlines():
+			match = include_pattern.match(line)
+			if match:
+				path = self.find(match.group(1), directory)
+				if path in stack:
+					raise RuntimeError("Recursive include of {!r}: {}"
+					                   .format(path, ' -> '.join(stack + (path,))))
+				if path in included:
+					continue
+				included_source = self.read(path)
+				if any(pragma_once_pattern.match(l) for l in included_source.splitlines()):
+					included.add(path)
+				included_lines, included_version = self.resolve(
+					included_source, os.path.dirname(path), stack + (path,), included)
+				lines.extend(included_lines)
+				version = version or included_version
+				continue
+
+			match = version_pattern.match(line)
+			if match:
+				version = version or ' '.join(g for g in match.groups() if g)
+				continue
+			if pragma_once_pattern.match(line) or include_extension_pattern.match(line):
+				continue
+			lines.append(line)
+		return lines, version
+
+	def expand(self, source, defines=None, path=None):
+		'''Expand a source.
+
+		:param str source: The GLSL source
+		:param defines: Macros to define in addition to the global defines
+		:type defines: {:py:obj:`str`: :py:obj:`object`}
+		:param path: The path of the source file, if it has one. Includes are searched for
+		  relative to it first.
+		:type path: :py:obj:`str` or :py:obj:`None`
+		:rtype: :py:obj:`str`
+		'''
+		define_set = self.defineSet(defines)
+		key = (source, path, define_set)
+		try:
+			return self.expanded[key]
+		except KeyError:
+			pass
+
+		if path is None:
+			lines, version = self.resolve(source)
+		else:
+			path = os.path.abspath(path)
+			lines, version = self.resolve(source, os.path.dirname(path), (path,))
+		version = self.version or version
+		header = [] if version is None else ['#version {}'.format(version)]
+		header.extend(defineLine(name, value) for name, value in sorted(define_set))
+		expanded = self.expanded[key] = '\n'.join(header + lines) + '\n'
+		return expanded
+
+	def expandFile(self, path, defines=None):
+		'''Expand the source in a file. See :py:meth:`expand`.
+
+		:rtype: :py:obj:`str`
+		'''
+		return self.expand(self.read(os.path.abspath(path)), defines, path)
+
+	def program(self, sources, defines=None, **kwargs):
+		'''Expand sources and compile them into a program. The program is cached by sources and
+		defines, so requesting it again does not compile anything.
+
+		:param sources: The source of each shader stage, keyed by shader type
+		:type sources: {:py:obj:`str` or :py:obj:`int`: :py:obj:`str`}
+		:param defines: Macros to define in addition to the global defines
+		:type defines: {:py:obj:`str`: :py:obj:`object`}
+		:param \\*\\*kwargs: Passed on to :py:meth:`.Program.fromSources` when the program is
+		  first compiled. They are not part of the cache key.
+		:rtype: :py:class:`.Program`
+		'''
+		define_set = self.defineSet(defines)
+		key = (frozenset((int(shader_types[t]), s) for t, s in sources.items()), define_set)
+		try:
+			return self.programs[key]
+		except KeyError:
+			pass
+		expanded = {t: self.expand(s, defines) for t, s in sources.items()}
+		program = self.programs[key] = Program.fromSources(expanded, **kwargs)
+		return program
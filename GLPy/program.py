@@ -1,21 +1,97 @@
 from OpenGL import GL
+from OpenGL.GL.KHR import parallel_shader_compile
 
 from .vertex import ProgramVertexAttribute
 from .uniform_block import ProgramUniformBlock
+from .shader_storage_block import ProgramShaderStorageBlock
+from .reflection import ProgramReflection
+from .uniform import ProgramUniform
+from . import state
 
 from contextlib import contextmanager
+from itertools import chain
+from enum import IntFlag
 
 import ctypes as c
+import hashlib
 
 shader_types = { 'vertex': GL.GL_VERTEX_SHADER
 			   , 'fragment': GL.GL_FRAGMENT_SHADER
 			   , 'geometry': GL.GL_GEOMETRY_SHADER
 			   , 'tesselation control': GL.GL_TESS_CONTROL_SHADER
-			   , 'tesselation evaluation': GL.GL_TESS_EVALUATION_SHADER }
+			   , 'tesselation evaluation': GL.GL_TESS_EVALUATION_SHADER
+			   , 'compute': GL.GL_COMPUTE_SHADER }
 shader_types.update({t: t for t in shader_types.values()})
 
+class Barrier(IntFlag):
+	'''The kinds of memory access that can be synchronized with :py:func:`memoryBarrier`. Each
+	names the way data written by shaders (e.g. to shader storage buffers or images) will be
+	*read* after the barrier. They can be combined with ``|``.'''
+
+	vertex_attrib_array = GL.GL_VERTEX_ATTRIB_ARRAY_BARRIER_BIT
+	element_array = GL.GL_ELEMENT_ARRAY_BARRIER_BIT
+	uniform = GL.GL_UNIFORM_BARRIER_BIT
+	texture_fetch = GL.GL_TEXTURE_FETCH_BARRIER_BIT
+	shader_image_access = GL.GL_SHADER_IMAGE_ACCESS_BARRIER_BIT
+	command = GL.GL_COMMAND_BARRIER_BIT
+	pixel_buffer = GL.GL_PIXEL_BUFFER_BARRIER_BIT
+	texture_update = GL.GL_TEXTURE_UPDATE_BARRIER_BIT
+	buffer_update = GL.GL_BUFFER_UPDATE_BARRIER_BIT
+	framebuffer = GL.GL_FRAMEBUFFER_BARRIER_BIT
+	transform_feedback = GL.GL_TRANSFORM_FEEDBACK_BARRIER_BIT
+	atomic_counter = GL.GL_ATOMIC_COUNTER_BARRIER_BIT
+	shader_storage = GL.GL_SHADER_STORAGE_BARRIER_BIT
+	all = GL.GL_ALL_BARRIER_BITS
+
+def memoryBarrier(*barriers):
+	'''Order memory accesses by shaders before the barrier with the accesses after it.
+
+	.. code-block:: python
+
+	   program.dispatch(64)
+	   memoryBarrier(Barrier.shader_storage, Barrier.buffer_update)
+
+	:param barriers: The accesses to synchronize. All accesses are synchronized if none are given.
+	:type barriers: [:py:class:`Barrier`]
+	'''
+	bits = Barrier.all
+	if barriers:
+		bits = Barrier(0)
+		for barrier in barriers:
+			bits |= Barrier(barrier)
+	GL.glMemoryBarrier(int(bits))
+
+def parallelCompilation():
+	'''Whether the current context supports ``KHR_parallel_shader_compile``, which allows the
+	completion of shader compilation and program linking to be polled.
+
+	:rtype: :py:obj:`bool`
+	'''
+	return bool(parallel_shader_compile.glInitParallelShaderCompileKHR())
+
+def setCompilerThreads(count=0xFFFFFFFF):
+	'''Set the number of threads the OpenGL implementation may use to compile shaders. The default
+	leaves this choice to the implementation.
+
+	:returns: Whether the setting is supported by the current context
+	:rtype: :py:obj:`bool`
+	'''
+	if not parallelCompilation():
+		return False
+	parallel_shader_compile.glMaxShaderCompilerThreadsKHR(count)
+	return True
+
 class Shader:
-	def __init__(self, source, shader_type):
+	'''An OpenGL shader.
+
+	:param str source: The GLSL source of the shader
+	:param shader_type: The type of shader, see :py:obj:`shader_types`
+	:type shader_type: :py:obj:`str` or :py:obj:`int`
+	:param bool check: Whether to wait for compilation to finish and check that it was successful.
+	  Otherwise, :py:meth:`check` must be called before the shader is used.
+	'''
+
+	def __init__(self, source, shader_type, check=True):
 		self.shader_type = shader_types[shader_type]
 		self.handle = GL.glCreateShader(self.shader_type)
 		if self.handle == 0:
@@ -23,6 +99,28 @@ class Shader:
 
 		GL.glShaderSource(self.handle, source)
 		GL.glCompileShader(self.handle)
+		if check:
+			self.check()
+
+	@property
+	def done(self):
+		'''Whether compilation has finished. This is always :py:obj:`True` if the implementation
+		does not support :py:func:`parallelCompilation`.
+
+		:rtype: :py:obj:`bool`
+		'''
+		if not parallelCompilation():
+			return True
+		status = GL.GLint()
+		GL.glGetShaderiv(self.handle, parallel_shader_compile.GL_COMPLETION_STATUS_KHR,
+		                 c.byref(status))
+		return bool(status.value)
+
+	def check(self):
+		'''Wait for compilation to finish, and check that it was successful.
+
+		:raises RuntimeError: If the shader failed to compile.
+		'''
 		if GL.glGetShaderiv(self.handle, GL.GL_COMPILE_STATUS) == GL.GL_FALSE:
 			log = GL.glGetShaderInfoLog(self.handle).decode()
 			raise RuntimeError("Failed to compile {}: \n\n{}".format(self.shader_type, log))
@@ -37,6 +135,53 @@ class Shader:
 
 		GL.glDeleteShader(self.handle)
 
+class ShaderCache:
+	'''A cache of compiled shaders, so that stages shared by several programs are only compiled
+	once. Shaders are reference counted, and deleted when the last user releases them.
+
+	Pass it to :py:meth:`Program.fromSources` to share stages between programs. Shaders will then
+	be released when the program is deleted with :py:meth:`Program.delete`.
+	'''
+
+	def __init__(self):
+		self.shaders = {}
+		self.references = {}
+
+	@staticmethod
+	def key(source, shader_type):
+		''':rtype: (:py:obj:`int`, :py:obj:`str`)'''
+		return shader_types[shader_type], hashlib.sha256(source.encode()).hexdigest()
+
+	def __len__(self):
+		return len(self.shaders)
+
+	def __contains__(self, key):
+		return key in self.shaders
+
+	def acquire(self, source, shader_type, check=True):
+		'''Return a compiled shader, compiling it if it is not in the cache. Every call must be
+		matched by a call to :py:meth:`release`.
+
+		:param bool check: See :py:class:`Shader`
+		:rtype: :py:class:`Shader`
+		'''
+		key = self.key(source, shader_type)
+		try:
+			shader = self.shaders[key]
+		except KeyError:
+			shader = self.shaders[key] = Shader(source, shader_type, check)
+			self.references[key] = 0
+		self.references[key] += 1
+		return shader
+
+	def release(self, shader):
+		'''Release a shader obtained from :py:meth:`acquire`, deleting it if it is no longer used.'''
+		key = next(k for k, s in self.shaders.items() if s is shader)
+		self.references[key] -= 1
+		if not self.references[key]:
+			del self.shaders[key], self.references[key]
+			shader.delete()
+
 class Program:
 	"""An OpenGL program.
 	
@@ -46,34 +191,72 @@ class Program:
 	:type attributes: [:py:class:`.VertexAttribute`]
 	:param uniform_blocks: The uniform blocks defined in the program
 	:type uniform_blocks: [:py:class:`.UniformBlock`]
-	"""
+	:param uniforms: The uniforms in the default uniform block of the program
+	:type uniforms: [:py:class:`.Variable`]
+	:param shader_storage_blocks: The shader storage blocks defined in the program
+	:type shader_storage_blocks: [:py:class:`.ShaderStorageBlock`]
+	:param bool retrievable: Whether the program binary will be retrieved (see :py:attr:`binary`)
+	:param bool reflect: Whether to discover the active resources of the program (see
+	  :py:class:`.ProgramReflection`). Vertex attributes, uniforms and uniform blocks that are not
+	  passed explicitly are then taken from the program, along with the memory layout of the
+	  blocks.
+	:param binding_registry: A registry assigning the bindings of blocks without a binding
+	  declared in the shader, each time the program is linked
+	:type binding_registry: :py:class:`.BindingRegistry` or :py:obj:`None`
+	:param handle: The handle of an already linked program to use. One will be created and linked
+	  from the shaders if it is :py:obj:`None`.
+	:type handle: :py:obj:`int` or :py:obj:`None`
 
-	def __init__(self, shaders, vertex_attributes=None, uniform_blocks=None,
-	             xfb_varyings=None, xfb_mode=GL.GL_INTERLEAVED_ATTRIBS):
-		self.handle = GL.glCreateProgram()
-		if self.handle == 0:
-			raise RuntimeError("Failed to create OpenGL program.")
-
-		for shader in shaders:
-			GL.glAttachShader(self.handle, shader.handle)
+	:ivar int link_generation: Incremented each time the program is relinked, so that properties
+	  queried from the program can be cached until they are invalidated.
+	"""
 
+	def __init__(self, shaders, vertex_attributes=None, uniform_blocks=None, uniforms=None,
+	             xfb_varyings=None, xfb_mode=GL.GL_INTERLEAVED_ATTRIBS, retrievable=False,
+	             reflect=False, shader_storage_blocks=None, binding_registry=None, handle=None):
 		self.xfb_varyings = xfb_varyings
-		if xfb_varyings is not None:
-			varyings = (c.c_char_p * len(xfb_varyings))(*(v.name.encode() for v in self.xfb_varyings))
-			varyings = c.cast(varyings, c.POINTER(c.POINTER(c.c_char)))
-			GL.glTransformFeedbackVaryings(self.handle, len(xfb_varyings), varyings, xfb_mode)
+		self.binding_registry = binding_registry
 		self._xfb_mode = xfb_mode
+		self.shader_cache = None
+		self.shaders = []
+		self._previous = []
+		self.link_generation = 0
 
-		GL.glLinkProgram(self.handle)
-		if GL.glGetProgramiv(self.handle, GL.GL_LINK_STATUS) == GL.GL_FALSE:
-			log = GL.glGetProgramInfoLog(self.handle).decode()
+		if handle is None:
+			handle = self.link(shaders, xfb_varyings, xfb_mode, retrievable)
+		self.handle = handle
+
+		try:
+			self.checkLink()
+		except RuntimeError:
 			GL.glDeleteProgram(self.handle)
-			raise RuntimeError("Failed to link program: \n\n{}".format(log))
+			raise
+
+		self.reflection = ProgramReflection(self.handle) if reflect else None
+		block_dtypes = {}
+		self.uniform_locations = {}
+		self.uniform_values = {}
+		if self.reflection is not None:
+			self.uniform_locations.update(self.reflection.uniform_locations)
+			if uniforms is None:
+				uniforms = self.reflection.uniforms
+			if vertex_attributes is None:
+				vertex_attributes = self.reflection.vertex_attributes
+			if uniform_blocks is None:
+				uniform_blocks = self.reflection.uniform_blocks
+				block_dtypes = self.reflection.uniform_block_dtypes
 
-		self.uniform_blocks = { ub.name: ProgramUniformBlock.fromUniformBlock(self, ub)
+		self.uniform_blocks = { ub.name: ProgramUniformBlock.fromUniformBlock(
+		                            self, ub, block_dtypes.get(ub.name))
 		                        for ub in uniform_blocks or []}
 		self.vertex_attributes = { v.name: ProgramVertexAttribute.fromVertexAttribute(self, v)
 		                           for v in vertex_attributes or [] }
+		self.uniforms = { u.name: ProgramUniform.fromVariable(self, u) for u in uniforms or [] }
+		self.shader_storage_blocks = { b.name: ProgramShaderStorageBlock.fromShaderStorageBlock(
+		                                   self, b)
+		                               for b in shader_storage_blocks or [] }
+		if binding_registry is not None:
+			binding_registry.assign(self)
 
 	@property
 	def xfb_mode(self):
@@ -81,40 +264,338 @@ class Program:
 
 	@xfb_mode.setter
 	def xfb_mode(self, xfb_mode):
-		varyings = (c.c_char_p * len(xfb_varyings))(*(v.name for v in self.xfb_varyings))
+		'''Changing the transform feedback mode relinks the program.'''
+		xfb_varyings = self.xfb_varyings
+		varyings = (c.c_char_p * len(xfb_varyings))(*(v.name.encode() for v in xfb_varyings))
 		varyings = c.cast(varyings, c.POINTER(c.POINTER(c.c_char)))
 		GL.glTransformFeedbackVaryings(self.handle, len(xfb_varyings), varyings, xfb_mode)
 		self._xfb_mode = xfb_mode
+		self.relink()
+
+	def checkLink(self):
+		'''Check that the program was linked successfully.
+
+		:raises RuntimeError: If the program failed to link.
+		'''
+		if GL.glGetProgramiv(self.handle, GL.GL_LINK_STATUS) == GL.GL_FALSE:
+			log = GL.glGetProgramInfoLog(self.handle).decode()
+			raise RuntimeError("Failed to link program: \n\n{}".format(log))
+
+	def relink(self):
+		'''Link the program again, e.g. after changing the transform feedback varyings. Layouts
+		and other properties queried from the program are invalidated (see
+		:py:attr:`link_generation`).
+
+		:raises RuntimeError: If the program failed to link.
+		'''
+		GL.glLinkProgram(self.handle)
+		self.link_generation += 1
+		self.checkLink()
+		# Linking resets uniforms to their initial values, and may move them
+		self.uniform_locations.clear()
+		self.uniform_values.clear()
+		# The layout of blocks may change too, so reflected layouts are queried again
+		block_dtypes = {}
+		if self.reflection is not None:
+			self.reflection = ProgramReflection(self.handle)
+			self.uniform_locations.update(self.reflection.uniform_locations)
+			block_dtypes = self.reflection.uniform_block_dtypes
+		for block in self.uniform_blocks.values():
+			if block.reflected_dtype is not None:
+				block.reflected_dtype = block_dtypes.get(block.name)
+		# Linking resets block bindings that are not declared in the shader
+		for block in chain(self.uniform_blocks.values(), self.shader_storage_blocks.values()):
+			block.dynamic_binding = None
+		if self.binding_registry is not None:
+			self.binding_registry.assign(self)
+
+	@staticmethod
+	def link(shaders, xfb_varyings=None, xfb_mode=GL.GL_INTERLEAVED_ATTRIBS, retrievable=False):
+		'''Create a program object and start linking it, without waiting for the result.
+
+		:returns: The handle of the new program object
+		:rtype: :py:obj:`int`
+		'''
+		handle = GL.glCreateProgram()
+		if handle == 0:
+			raise RuntimeError("Failed to create OpenGL program.")
+
+		for shader in shaders:
+			GL.glAttachShader(handle, shader.handle)
+
+		if xfb_varyings is not None:
+			varyings = (c.c_char_p * len(xfb_varyings))(*(v.name.encode() for v in xfb_varyings))
+			varyings = c.cast(varyings, c.POINTER(c.POINTER(c.c_char)))
+			GL.glTransformFeedbackVaryings(handle, len(xfb_varyings), varyings, xfb_mode)
+		if retrievable:
+			GL.glProgramParameteri(handle, GL.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL.GL_TRUE)
+
+		GL.glLinkProgram(handle)
+		return handle
+
+	@classmethod
+	def fromSources(cls, sources, cache=None, shader_cache=None, **kwargs):
+		'''Compile and link a program from GLSL sources.
+
+		:param sources: The source of each shader stage, keyed by shader type
+		:type sources: {:py:obj:`str` or :py:obj:`int`: :py:obj:`str`}
+		:param cache: A cache to load the linked program from, or to store it in if it is not
+		  present.
+		:type cache: :py:class:`.ProgramBinaryCache` or :py:obj:`None`
+		:param shader_cache: A cache of compiled shaders to share with other programs.
+		:type shader_cache: :py:class:`ShaderCache` or :py:obj:`None`
+		:param \\*\\*kwargs: Passed on to :py:class:`Program`
+		'''
+		return cls.fromSourcesAsync(sources, cache, shader_cache, **kwargs).result()
 
 	@classmethod
-	def fromSources(cls, sources, **kwargs):
+	def fromSourcesAsync(cls, sources, cache=None, shader_cache=None, **kwargs):
+		'''Start compiling and linking a program, without waiting for the result. The parameters
+		are identical to :py:meth:`fromSources`.
+
+		Creating many programs this way before using any of them allows the OpenGL implementation
+		to compile them in parallel (see :py:func:`parallelCompilation`).
+
+		:rtype: :py:class:`ProgramFuture`
+		'''
+		key = None
+		if cache is not None:
+			key = cache.key(sources, kwargs.get('xfb_varyings'),
+			                kwargs.get('xfb_mode', GL.GL_INTERLEAVED_ATTRIBS))
+			binary = cache.load(key)
+			if binary is not None:
+				try:
+					return ProgramFuture.fromResult(cls.fromBinary(*binary, **kwargs))
+				except RuntimeError:
+					# Rejected by the driver, fall back to compiling from source
+					cache.remove(key)
+			kwargs['retrievable'] = True
+
 		shaders = []
 		try:
-			for shader_type, shader in sources.items():
-				shaders.append(Shader(shader, shader_type))
-			program = cls(shaders, **kwargs)
-		finally:
+			for shader_type, source in sources.items():
+				if shader_cache is None:
+					shaders.append(Shader(source, shader_type, check=False))
+				else:
+					shaders.append(shader_cache.acquire(source, shader_type, check=False))
+			handle = cls.link(shaders, kwargs.get('xfb_varyings'),
+			                  kwargs.get('xfb_mode', GL.GL_INTERLEAVED_ATTRIBS),
+			                  kwargs.get('retrievable', False))
+		except Exception:
 			for shader in shaders:
-				shader.delete()
-		return program
+				if shader_cache is None:
+					shader.delete()
+				else:
+					shader_cache.release(shader)
+			raise
+		return ProgramFuture(cls, handle, shaders, shader_cache, cache, key, **kwargs)
+
+	@classmethod
+	def fromBinary(cls, binary_format, binary, **kwargs):
+		'''Create a program from a binary, as returned by :py:attr:`binary`.
+
+		:param int binary_format: The format of the program binary
+		:param bytes binary: The program binary
+		:param \\*\\*kwargs: Passed on to :py:class:`Program`
+		:raises RuntimeError: If the binary is rejected by the OpenGL implementation
+		'''
+		handle = GL.glCreateProgram()
+		if handle == 0:
+			raise RuntimeError("Failed to create OpenGL program.")
+		try:
+			GL.glProgramBinary(handle, binary_format, binary, len(binary))
+		except GL.GLError as e:
+			GL.glDeleteProgram(handle)
+			raise RuntimeError("Invalid program binary.") from e
+		kwargs.pop('retrievable', None)
+		return cls([], handle=handle, **kwargs)
+
+	@property
+	def binary(self):
+		'''The binary format and binary representation of the linked program. The program should be
+		created with ``retrievable=True``, so the OpenGL implementation can prepare for this.
+
+		:rtype: (:py:obj:`int`, :py:obj:`bytes`)
+		'''
+		length = int(GL.glGetProgramiv(self.handle, GL.GL_PROGRAM_BINARY_LENGTH))
+		binary = c.create_string_buffer(length)
+		binary_format = GL.GLenum()
+		written = GL.GLsizei()
+		GL.glGetProgramBinary(self.handle, length, c.byref(written), c.byref(binary_format), binary)
+		return binary_format.value, binary.raw[:written.value]
+
+	def delete(self):
+		'''Delete the program to free up GL resources.
+
+		.. warning::
+
+		   Do not use the program object after running this method.
+		'''
+
+		GL.glDeleteProgram(self.handle)
+		state.current().forget(GL.GL_PROGRAM, self.handle)
+		if self.shader_cache is not None:
+			for shader in self.shaders:
+				self.shader_cache.release(shader)
+		self.shaders = []
 
 	def __enter__(self):
-		'''Programs provide a context manager that binds and then unbinds them.
+		'''Programs provide a context manager that binds them, and restores the previously bound
+		program on exit (unless :py:attr:`.State.unbind` is unset). Binding a program that is
+		already bound does not call OpenGL.
 
 		.. _program-bind-warning:
 		.. warning::
 
-		   It is not allowed to bind multiple programs (or one program multiple times).
+		   Contexts binding programs must be nested, and the bound program must not be changed
+		   outside of GLPy (see :py:meth:`.State.invalidate`).
 		   
 		   Methods that bind a program will be documented.
 		'''
-		GL.glUseProgram(self.handle)
+		self._previous.append(state.current().useProgram(self.handle))
 	
 	def __exit__(self, ty, val, tr):
-		GL.glUseProgram(0)
+		previous = self._previous.pop()
+		current = state.current()
+		if current.unbind:
+			current.useProgram(previous or 0)
 
 	@contextmanager
 	def feedback(self, mode=GL.GL_POINTS):
 		GL.glBeginTransformFeedback(mode)
-		yield
-		GL.glEndTransformFeedback()
+		try:
+			yield
+		finally:
+			GL.glEndTransformFeedback()
+
+	@property
+	def work_group_size(self):
+		'''The local work group size declared by the compute shader of the program.
+
+		:rtype: (:py:obj:`int`, :py:obj:`int`, :py:obj:`int`)
+		:raises RuntimeError: If the program does not contain a compute shader
+		'''
+		size = (GL.GLint * 3)()
+		try:
+			GL.glGetProgramiv(self.handle, GL.GL_COMPUTE_WORK_GROUP_SIZE, size)
+		except GL.GLError as e:
+			raise RuntimeError("The program has no compute shader.") from e
+		return tuple(size)
+
+	def dispatch(self, x, y=1, z=1, barriers=()):
+		'''Run the compute shader of the program over a grid of work groups.
+
+		:param int x: The number of work groups in the first dimension
+		:param int y: The number of work groups in the second dimension
+		:param int z: The number of work groups in the third dimension
+		:param barriers: Memory barriers to insert after the dispatch, see :py:func:`memoryBarrier`.
+		  No barrier is inserted if it is empty.
+		:type barriers: [:py:class:`Barrier`]
+
+		.. warning:: |program-bind|
+		'''
+		with self:
+			GL.glDispatchCompute(x, y, z)
+		if barriers:
+			memoryBarrier(*barriers)
+
+	def dispatchIndirect(self, buffer, offset=0, barriers=()):
+		'''Run the compute shader of the program, reading the number of work groups from a buffer.
+		This allows the grid size to be computed on the GPU without reading it back.
+
+		:param buffer: The buffer containing the number of work groups in each dimension, as three
+		  consecutive unsigned integers. It is bound to :py:obj:`GL.GL_DISPATCH_INDIRECT_BUFFER`.
+		:type buffer: :py:class:`.Buffer`
+		:param int offset: The offset (in bytes) of the work group counts in the buffer
+		:param barriers: See :py:meth:`dispatch`
+
+		.. warning:: |program-bind|
+		'''
+		with self, buffer.bind(GL.GL_DISPATCH_INDIRECT_BUFFER):
+			GL.glDispatchComputeIndirect(offset)
+		if barriers:
+			memoryBarrier(*barriers)
+
+class ProgramFuture:
+	'''A program that is being compiled and linked, as returned by
+	:py:meth:`Program.fromSourcesAsync`.
+
+	No errors are reported until :py:meth:`result` is called.
+	'''
+
+	def __init__(self, program_type, handle, shaders, shader_cache=None, cache=None, key=None,
+	             **kwargs):
+		self.program_type = program_type
+		self.handle = handle
+		self.shaders = shaders
+		self.shader_cache = shader_cache
+		self.cache = cache
+		self.key = key
+		self.kwargs = kwargs
+		self._result = None
+		self._exception = None
+
+	@classmethod
+	def fromResult(cls, program):
+		'''Create a future that has already completed.'''
+		future = cls(type(program), program.handle, [])
+		future._result = program
+		return future
+
+	def done(self):
+		'''Whether compiling and linking has finished, so that :py:meth:`result` will not block.
+		This is always :py:obj:`True` if the implementation does not support
+		:py:func:`parallelCompilation`.
+
+		:rtype: :py:obj:`bool`
+		'''
+		if self._result is not None or self._exception is not None:
+			return True
+		if not parallelCompilation():
+			return True
+		status = GL.GLint()
+		GL.glGetProgramiv(self.handle, parallel_shader_compile.GL_COMPLETION_STATUS_KHR,
+		                  c.byref(status))
+		return bool(status.value)
+
+	def result(self):
+		'''Wait for the program to be linked, and return it.
+
+		:rtype: :py:class:`Program`
+		:raises RuntimeError: If any shader failed to compile, or the program failed to link.
+		'''
+		if self._exception is not None:
+			raise self._exception
+		if self._result is None:
+			try:
+				self._result = self._finish()
+			except Exception as e:
+				self._exception = e
+				raise
+		return self._result
+
+	def _finish(self):
+		try:
+			try:
+				for shader in self.shaders:
+					shader.check()
+			except RuntimeError:
+				GL.glDeleteProgram(self.handle)
+				raise
+			program = self.program_type(self.shaders, handle=self.handle, **self.kwargs)
+		except Exception:
+			if self.shader_cache is not None:
+				for shader in self.shaders:
+					self.shader_cache.release(shader)
+			raise
+		finally:
+			if self.shader_cache is None:
+				for shader in self.shaders:
+					shader.delete()
+
+		if self.shader_cache is not None:
+			program.shader_cache = self.shader_cache
+			program.shaders = self.shaders
+		if self.cache is not None:
+			self.cache.store(self.key, *program.binary)
+		return program
@@ -0,0 +1,274 @@
+from OpenGL import GL
+from numpy import dtype
+
+from .GLSL import ( Scalar, Vector, Matrix, Sampler, BasicType, Array, Struct, Variable,
+                    UniformBlock, VertexAttribute )
+
+from collections import OrderedDict
+import ctypes as c
+import re
+
+def glTypeName(datatype):
+	'''The name of the OpenGL enum representing a GLSL basic type (e.g. ``GL_FLOAT_VEC3`` for
+	``vec3``).
+
+	:rtype: :py:obj:`str`
+	'''
+	scalar_names = { Scalar.bool: 'BOOL', Scalar.int: 'INT', Scalar.uint: 'UNSIGNED_INT'
+	               , Scalar.float: 'FLOAT', Scalar.double: 'DOUBLE' }
+	if isinstance(datatype, Scalar):
+		return 'GL_{}'.format(scalar_names[datatype])
+	elif isinstance(datatype, Vector):
+		return 'GL_{}_VEC{}'.format(scalar_names[datatype.scalar_type], *datatype.shape)
+	elif isinstance(datatype, Matrix):
+		columns, rows = datatype.shape
+		shape = str(columns) if columns == rows else '{}x{}'.format(columns, rows)
+		return 'GL_{}_MAT{}'.format(scalar_names[datatype.scalar_type], shape)
+	elif isinstance(datatype, Sampler):
+		prefix, dims = datatype.name.split('sampler')
+		prefix = {'': '', 'i': 'INT_', 'u': 'UNSIGNED_INT_'}[prefix]
+		return 'GL_{}SAMPLER_{}'.format(prefix, dims)
+	raise TypeError("{} is not a basic type.".format(datatype))
+
+gl_types = {}
+'''The GLSL basic type represented by each OpenGL type enum.'''
+for basic_type in (Scalar, Vector, Matrix, Sampler):
+	for t in basic_type:
+		# Prefer the short names of square matrices (e.g. mat4 over mat4x4)
+		gl_types.setdefault(getattr(GL, glTypeName(t)), t)
+
+resource_properties = { GL.GL_PROGRAM_INPUT: ( GL.GL_TYPE, GL.GL_ARRAY_SIZE, GL.GL_LOCATION )
+                      , GL.GL_UNIFORM: ( GL.GL_TYPE, GL.GL_ARRAY_SIZE, GL.GL_OFFSET
+                                       , GL.GL_BLOCK_INDEX, GL.GL_ARRAY_STRIDE
+                                       , GL.GL_MATRIX_STRIDE, GL.GL_IS_ROW_MAJOR
+                                       , GL.GL_LOCATION )
+                      , GL.GL_UNIFORM_BLOCK: ( GL.GL_BUFFER_BINDING, GL.GL_BUFFER_DATA_SIZE ) }
+
+def programResources(handle, interface):
+	'''Query the names and properties of all active resources of a program interface. One query is
+	made per resource for all properties.
+
+	:rtype: [(:py:obj:`str`, {:py:obj:`int`: :py:obj:`int`})]
+	'''
+	count, max_name_length = c.c_int(), c.c_int()
+	GL.glGetProgramInterfaceiv(handle, interface, GL.GL_ACTIVE_RESOURCES, c.byref(count))
+	GL.glGetProgramInterfaceiv(handle, interface, GL.GL_MAX_NAME_LENGTH, c.byref(max_name_length))
+
+	properties = resource_properties[interface]
+	props = (GL.GLenum * len(properties))(*properties)
+	params = (GL.GLint * len(properties))()
+	name = c.create_string_buffer(max_name_length.value)
+	length = GL.GLsizei()
+
+	resources = []
+	for index in range(count.value):
+		GL.glGetProgramResourceName(handle, interface, index, len(name), c.byref(length), name)
+		GL.glGetProgramResourceiv(handle, interface, index, len(props), props, len(params), None,
+		                          params)
+		resources.append((name.value.decode(), dict(zip(properties, params))))
+	return resources
+
+name_component = re.compile(r'(\w+)((?:\[\d+\])*)')
+
+def parseName(name):
+	'''Split a resource name into its components and their array indices, e.g.
+	``'a.b[1][2].c'`` into ``[('a', ()), ('b', (1, 2)), ('c', ())]``.'''
+	return [(m.group(1), tuple(int(i) for i in re.findall(r'\d+', m.group(2))))
+	        for m in name_component.finditer(name)]
+
+class ResourceNode:
+	'''A node in the tree of variables reconstructed from resource names. Leaves are resources
+	(basic types or arrays thereof), other nodes are structs.
+
+	The properties of each resource are stored on its leaf, keyed by the array indices of all of
+	its ancestors (as reflection enumerates every element of an array of structs).
+	'''
+
+	def __init__(self, name):
+		self.name = name
+		self.shape = ()
+		self.members = OrderedDict()
+		self.resources = {}
+
+	def add(self, components, properties, indices=()):
+		name, idxs = components[0]
+		if len(components) == 1 and idxs:
+			# The last index of a basic array is described by GL_ARRAY_SIZE
+			idxs = idxs[:-1]
+			properties = dict(properties, array=True)
+		try:
+			node = self.members[name]
+		except KeyError:
+			node = self.members[name] = ResourceNode(name)
+		node.shape = tuple(max(s, i + 1) for s, i in zip(node.shape or (0,) * len(idxs), idxs))
+		indices = indices + idxs
+		if len(components) == 1:
+			node.resources[indices] = properties
+		else:
+			node.add(components[1:], properties, indices)
+
+	@property
+	def leaves(self):
+		if not self.members:
+			yield self
+		for member in self.members.values():
+			yield from member.leaves
+
+	@property
+	def element_datatype(self):
+		'''The datatype of one element of this node, if it is an array of structs or arrays.'''
+		if self.members:
+			return Struct(self.name, *(Variable(m.name, m.datatype) for m in self.members.values()))
+		properties = next(iter(self.resources.values()))
+		datatype = gl_types[properties[GL.GL_TYPE]]
+		if properties.get('array'):
+			datatype = Array(datatype, properties[GL.GL_ARRAY_SIZE])
+		return datatype
+
+	@property
+	def datatype(self):
+		if self.shape:
+			return Array(self.element_datatype, self.shape)
+		return self.element_datatype
+
+	def properties(self, indices=()):
+		'''The properties of the first resource of a leaf, with the given array indices.'''
+		return min(( properties for idxs, properties in self.resources.items()
+		             if idxs[:len(indices)] == indices ), key=lambda p: p[GL.GL_OFFSET])
+
+	def offset(self, indices=()):
+		'''The offset of the first resource under this node, with the given array indices.'''
+		return min( properties[GL.GL_OFFSET] for leaf in self.leaves
+		            for idxs, properties in leaf.resources.items()
+		            if idxs[:len(indices)] == indices )
+
+	def dtype(self, indices=()):
+		'''The memory layout of this node, calculated from the queried offsets and strides.'''
+		element_indices = indices + (0,) * len(self.shape)
+		if self.members:
+			base = self.offset(element_indices)
+			members = list(self.members.values())
+			element = dtype({ 'names': [m.name for m in members]
+			                , 'formats': [m.dtype(element_indices) for m in members]
+			                , 'offsets': [m.offset(element_indices) - base for m in members] })
+		else:
+			element = resourceDtype(self.element_datatype, self.properties(element_indices))
+
+		if not self.shape:
+			return element
+		if self.shape[-1] > 1:
+			stride = self.offset(element_indices[:-1] + (1,)) - self.offset(element_indices)
+		else:
+			stride = element.itemsize
+		if element.names is None:
+			name = getattr(self.element_datatype, 'name', str(self.element_datatype))
+			element = dtype({'names': [name], 'formats': [element], 'itemsize': stride})
+		else:
+			element = dtype({ 'names': element.names
+			                , 'formats': [element.fields[n][0] for n in element.names]
+			                , 'offsets': [element.fields[n][1] for n in element.names]
+			                , 'itemsize': stride })
+		return dtype((element, self.shape))
+
+def resourceDtype(datatype, properties):
+	'''The memory layout of a basic type, or an array of basic types, from its queried properties.
+
+	:rtype: :py:class:`numpy.dtype`
+	'''
+	if isinstance(datatype, Array):
+		element = resourceDtype(datatype.element, properties)
+		element = dtype({'names': [datatype.element.name], 'formats': [element],
+		                 'itemsize': properties[GL.GL_ARRAY_STRIDE]})
+		return dtype((element, len(datatype)))
+	elif isinstance(datatype, Matrix):
+		if properties[GL.GL_IS_ROW_MAJOR]:
+			item_dim = 'row'
+			components, items = datatype.shape
+		else:
+			item_dim = 'column'
+			items, components = datatype.shape
+		item_dtype = Vector.fromType(datatype.scalar_type, components).machine_type
+		item_dtype = dtype({'names': ['-'.join((datatype.name, item_dim))],
+		                    'formats': [item_dtype], 'itemsize': properties[GL.GL_MATRIX_STRIDE]})
+		return dtype((item_dtype, items))
+	return datatype.machine_type
+
+class ProgramReflection:
+	'''The active vertex attributes, uniforms and uniform blocks of a linked program, discovered
+	using program interface queries. Requires OpenGL 4.3 or ``ARB_program_interface_query``.
+
+	The original names of structs and of uniform block instances are not available through the
+	OpenGL API. Structs are named after the variable they are the type of, and instanced uniform
+	blocks use the block name as the instance name.
+
+	:param int handle: The handle of the program to reflect
+
+	:ivar vertex_attributes: The active vertex attributes, with their locations
+	:vartype vertex_attributes: [:py:class:`.VertexAttribute`]
+	:ivar uniforms: The active uniforms of the default uniform block
+	:vartype uniforms: [:py:class:`.Variable`]
+	:ivar uniform_locations: The locations of the resources of :py:attr:`uniforms`, by name
+	:vartype uniform_locations: {:py:obj:`str`: :py:obj:`int`}
+	:ivar uniform_blocks: The active uniform blocks and their active members
+	:vartype uniform_blocks: [:py:class:`.UniformBlock`]
+	:ivar uniform_block_dtypes: The memory layout of each uniform block, by block name
+	:vartype uniform_block_dtypes: {:py:obj:`str`: :py:class:`numpy.dtype`}
+	:ivar uniform_block_bindings: The binding of each uniform block, by block name
+	:vartype uniform_block_bindings: {:py:obj:`str`: :py:obj:`int`}
+	'''
+
+	def __init__(self, handle):
+		self.vertex_attributes = []
+		for name, properties in programResources(handle, GL.GL_PROGRAM_INPUT):
+			if name.startswith('gl_'):
+				continue
+			datatype = gl_types[properties[GL.GL_TYPE]]
+			if name.endswith('[0]'):
+				name = name[:-len('[0]')]
+				datatype = Array(datatype, properties[GL.GL_ARRAY_SIZE])
+			self.vertex_attributes.append(VertexAttribute(name, datatype,
+			                                              properties[GL.GL_LOCATION]))
+
+		default_block = ResourceNode('')
+		block_properties = OrderedDict(programResources(handle, GL.GL_UNIFORM_BLOCK))
+		blocks = OrderedDict((name, ResourceNode(name)) for name in block_properties)
+		block_names = list(blocks)
+		instanced = set()
+		self.uniform_locations = {}
+		for name, properties in programResources(handle, GL.GL_UNIFORM):
+			if name.startswith('gl_'):
+				continue
+			block_index = properties[GL.GL_BLOCK_INDEX]
+			if block_index < 0:
+				default_block.add(parseName(name), properties)
+				self.uniform_locations[name] = properties[GL.GL_LOCATION]
+				if name.endswith('[0]'):
+					self.uniform_locations[name[:-len('[0]')]] = properties[GL.GL_LOCATION]
+				continue
+			block_name = block_names[block_index]
+			prefix = ''.join((block_name, '.'))
+			if name.startswith(prefix):
+				name = name[len(prefix):]
+				instanced.add(block_name)
+			blocks[block_name].add(parseName(name), properties)
+
+		self.uniforms = [Variable(m.name, m.datatype) for m in default_block.members.values()]
+
+		self.uniform_blocks = []
+		self.uniform_block_dtypes = {}
+		self.uniform_block_bindings = {}
+		for name, block in blocks.items():
+			members = sorted(block.members.values(), key=lambda m: m.offset())
+			variables = [Variable(m.name, m.datatype) for m in members]
+			row_major = all( p[GL.GL_IS_ROW_MAJOR] for leaf in block.leaves
+			                 for p in leaf.resources.values()
+			                 if isinstance(gl_types[p[GL.GL_TYPE]], Matrix) )
+			self.uniform_blocks.append(UniformBlock(
+				name, *variables, instance_name=name if name in instanced else '',
+				layout='shared', matrix_layout='row_major' if row_major else 'column_major' ))
+
+			self.uniform_block_dtypes[name] = dtype({
+				'names': [m.name for m in members], 'formats': [m.dtype() for m in members],
+				'offsets': [m.offset() for m in members],
+				'itemsize': block_properties[name][GL.GL_BUFFER_DATA_SIZE] })
+			self.uniform_block_bindings[name] = block_properties[name][GL.GL_BUFFER_BINDING]
@@ -0,0 +1,85 @@
+from OpenGL import GL
+
+from .GLSL import ShaderStorageBlock
+
+import ctypes as c
+
+class ProgramShaderStorageBlock(ShaderStorageBlock):
+	'''A shader storage block of a linked program.
+
+	The memory layout of blocks with a standardized layout (usually ``std430``) is calculated
+	without querying the program. The layout of ``shared`` and ``packed`` blocks is not described.
+
+	:param program: The program this block belongs to
+	:type program: :py:class:`.Program`
+	'''
+
+	def __init__(self, program, name, *members, unsized=None, instance_name='', layout='shared',
+	             matrix_layout='column_major', binding=None):
+		self.program = program
+		self.dynamic_binding = None
+		super().__init__(name, *members, unsized=unsized, instance_name=instance_name,
+		                 layout=layout, matrix_layout=matrix_layout, binding=binding)
+
+	@classmethod
+	def fromShaderStorageBlock(cls, program, block):
+		return cls(program, block.name, *block.members.values(), unsized=block.unsized,
+		           instance_name=block.instance_name, layout=block.layout,
+		           matrix_layout=block.matrix_layout, binding=block.shader_binding)
+
+	@property
+	def index(self):
+		'''The index of the block in the program, or :py:obj:`None` if it is not active.
+
+		:rtype: :py:obj:`int` or :py:obj:`None`
+		'''
+		index = GL.glGetProgramResourceIndex(self.program.handle, GL.GL_SHADER_STORAGE_BLOCK,
+		                                     self.name.encode())
+		return index if index != GL.GLuint(GL.GL_INVALID_INDEX).value else None
+
+	@property
+	def data_size(self):
+		'''The minimum size (in bytes) of a buffer bound to the block, as reported by the program.
+		An unsized array counts as a single element.
+
+		:rtype: :py:obj:`int`
+		'''
+		prop = GL.GLenum(GL.GL_BUFFER_DATA_SIZE)
+		size = GL.GLint()
+		GL.glGetProgramResourceiv(self.program.handle, GL.GL_SHADER_STORAGE_BLOCK, self.index, 1,
+		                          c.byref(prop), 1, None, c.byref(size))
+		return size.value
+
+	@property
+	def binding(self):
+		'''The index of the :py:obj:`GL.GL_SHADER_STORAGE_BUFFER` binding the block reads from.
+		It can only be set if the block has no binding declared in the shader.
+
+		:rtype: :py:obj:`int` or :py:obj:`None`
+		'''
+		if self.shader_binding is not None:
+			return self.shader_binding
+		return self.dynamic_binding
+
+	@binding.setter
+	def binding(self, binding_index):
+		if self.shader_binding is not None:
+			raise TypeError("This shader storage block has an explicit binding.")
+		GL.glShaderStorageBlockBinding(self.program.handle, self.index, binding_index)
+		self.dynamic_binding = binding_index
+
+	def bind(self, buffer):
+		'''Bind a buffer to the binding of the block, see :py:meth:`.Buffer.bind`.
+
+		.. code-block:: python
+
+		   with program.shader_storage_blocks['Particles'].bind(buffer):
+		       program.dispatch(groups)
+
+		:param buffer: The buffer to bind
+		:type buffer: :py:class:`.Buffer`
+		:raises RuntimeError: If the block has no binding
+		'''
+		if self.binding is None:
+			raise RuntimeError("The shader storage block '{}' has no binding.".format(self.name))
+		return buffer.bind(GL.GL_SHADER_STORAGE_BUFFER, self.binding)
@@ -0,0 +1,171 @@
+from OpenGL import GL, contextdata
+
+class State:
+	'''Tracks the OpenGL bindings of one context, so that binding an object that is already bound
+	does not call OpenGL. All GLPy classes bind objects through the state of the current context
+	(see :py:func:`current`).
+
+	If OpenGL state is modified outside of GLPy, :py:meth:`invalidate` must be called before GLPy
+	is used again.
+
+	:ivar bool unbind: Whether leaving a context that binds an object (e.g. ``with program:``)
+	  restores the previous binding. If this is :py:obj:`False`, objects are left bound, so that
+	  binding the same object again is free.
+	'''
+
+	def __init__(self):
+		self.unbind = True
+		self.invalidate()
+
+	def invalidate(self):
+		'''Forget all tracked bindings, so they are set unconditionally next time.'''
+		self.program = None
+		self.vertex_array = None
+		self.buffers = {}
+		self.indexed_buffers = {}
+		self.active_texture = None
+		self.textures = {}
+		self.transform_feedback = None
+
+	def forget(self, target, *handles):
+		'''Forget the bindings of deleted objects. Must be called when objects are deleted, as
+		their names may be reused by new objects.
+
+		.. code-block:: python
+
+		   GL.glDeleteBuffers(len(handles), handles)
+		   state.current().forget(GL.GL_BUFFER, *handles)
+
+		:param target: The type of the objects: :py:obj:`GL.GL_BUFFER`,
+		  :py:obj:`GL.GL_TEXTURE`, :py:obj:`GL.GL_VERTEX_ARRAY`, :py:obj:`GL.GL_PROGRAM` or
+		  :py:obj:`GL.GL_TRANSFORM_FEEDBACK`
+		:param int handles: The deleted objects
+		:raises ValueError: If the type of object is not tracked
+		'''
+		handles = set(handles)
+		if target == GL.GL_BUFFER:
+			self.buffers = {t: h for t, h in self.buffers.items() if h not in handles}
+			self.indexed_buffers = {k: b for k, b in self.indexed_buffers.items()
+			                        if b[0] not in handles}
+		elif target == GL.GL_TEXTURE:
+			self.textures = {k: h for k, h in self.textures.items() if h not in handles}
+		elif target == GL.GL_VERTEX_ARRAY:
+			if self.vertex_array in handles:
+				self.vertex_array = None
+				self.buffers.pop(GL.GL_ELEMENT_ARRAY_BUFFER, None)
+		elif target == GL.GL_PROGRAM:
+			if self.program in handles:
+				self.program = None
+		elif target == GL.GL_TRANSFORM_FEEDBACK:
+			if self.transform_feedback in handles:
+				self.transform_feedback = None
+				self.buffers.pop(GL.GL_TRANSFORM_FEEDBACK_BUFFER, None)
+				for key in [k for k in self.indexed_buffers
+				            if k[0] == GL.GL_TRANSFORM_FEEDBACK_BUFFER]:
+					del self.indexed_buffers[key]
+		else:
+			raise ValueError("Bindings of target {} are not tracked.".format(target))
+
+	def useProgram(self, handle):
+		''':returns: The previously bound program, or :py:obj:`None` if it is unknown'''
+		previous = self.program
+		if handle != previous:
+			GL.glUseProgram(handle)
+			self.program = handle
+		return previous
+
+	def bindVertexArray(self, handle):
+		''':returns: The previously bound vertex array, or :py:obj:`None` if it is unknown'''
+		previous = self.vertex_array
+		if handle != previous:
+			GL.glBindVertexArray(handle)
+			self.vertex_array = handle
+			# The element array buffer binding is part of the vertex array state
+			self.buffers.pop(GL.GL_ELEMENT_ARRAY_BUFFER, None)
+		return previous
+
+	def bindBuffer(self, target, handle):
+		''':returns: The buffer previously bound to the target, or :py:obj:`None` if it is
+		  unknown'''
+		previous = self.buffers.get(target)
+		if handle != previous:
+			GL.glBindBuffer(target, handle)
+			self.buffers[target] = handle
+		return previous
+
+	def bindBufferRange(self, target, index, handle, offset=None, size=None):
+		'''Bind a buffer to an indexed target. The whole buffer is bound (with
+		``glBindBufferBase``) if ``offset`` and ``size`` are not given.
+
+		:returns: The previous ``(handle, offset, size)`` bound to the target, or :py:obj:`None`
+		  if it is unknown
+		'''
+		binding = (handle, offset, size)
+		previous = self.indexed_buffers.get((target, index))
+		if binding != previous:
+			if offset is None:
+				GL.glBindBufferBase(target, index, handle)
+			else:
+				GL.glBindBufferRange(target, index, handle, offset, size)
+			self.indexed_buffers[target, index] = binding
+			# Indexed binding also binds to the generic target
+			self.buffers[target] = handle
+		else:
+			# The generic target may have been rebound since, and buffers map and upload through it
+			self.bindBuffer(target, handle)
+		return previous
+
+	def bindTransformFeedback(self, handle):
+		''':returns: The previously bound transform feedback object, or :py:obj:`None` if it is
+		  unknown'''
+		previous = self.transform_feedback
+		if handle != previous:
+			GL.glBindTransformFeedback(GL.GL_TRANSFORM_FEEDBACK, handle)
+			self.transform_feedback = handle
+			# Transform feedback buffer bindings are part of the transform feedback object state
+			self.buffers.pop(GL.GL_TRANSFORM_FEEDBACK_BUFFER, None)
+			for target, index in list(self.indexed_buffers):
+				if target == GL.GL_TRANSFORM_FEEDBACK_BUFFER:
+					del self.indexed_buffers[target, index]
+		return previous
+
+	def activeTexture(self, unit):
+		''':returns: The previously active texture unit, or :py:obj:`None` if it is unknown'''
+		previous = self.active_texture
+		if unit != previous:
+			GL.glActiveTexture(GL.GL_TEXTURE0 + unit)
+			self.active_texture = unit
+		return previous
+
+	def bindTexture(self, target, handle, unit=None):
+		'''Bind a texture to a texture unit, or the active texture unit if ``unit`` is
+		:py:obj:`None`.
+
+		:returns: The texture previously bound to the target of the texture unit, or
+		  :py:obj:`None` if it is unknown
+		'''
+		if unit is None:
+			unit = self.active_texture
+			if unit is None:
+				unit = 0
+				self.activeTexture(unit)
+		else:
+			self.activeTexture(unit)
+		previous = self.textures.get((unit, target))
+		if handle != previous:
+			GL.glBindTexture(target, handle)
+			self.textures[unit, target] = handle
+		return previous
+
+def current():
+	'''The tracked state of the current OpenGL context. It is stored with
+	:py:mod:`OpenGL.contextdata`, so :py:func:`OpenGL.contextdata.cleanupContext` should be called
+	before the context is destroyed.
+
+	:rtype: :py:class:`State`
+	'''
+	state = contextdata.getValue('GLPy.state')
+	if state is None:
+		state = State()
+		contextdata.setValue('GLPy.state', state)
+	return state
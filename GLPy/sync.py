@@ -0,0 +1,49 @@
+from OpenGL import GL
+
+class Fence:
+	'''A sync object, signalled once all OpenGL commands issued before it was created have
+	completed. Used to find out if asynchronous operations (e.g. readbacks) are finished without
+	blocking.
+
+	:param handle: The sync object to use. One is inserted into the command stream if it is
+	  :py:obj:`None`.
+	'''
+
+	def __init__(self, handle=None):
+		self.handle = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0) if handle is None else handle
+		if not self.handle:
+			raise RuntimeError("Failed to create sync object.")
+		self.signalled = False
+
+	def wait(self, timeout=None):
+		'''Wait for the fence to be signalled.
+
+		:param timeout: The maximum time to wait (in seconds), or :py:obj:`None` to wait
+		  indefinitely.
+		:type timeout: :py:obj:`float` or :py:obj:`None`
+		:returns: Whether the fence was signalled
+		:rtype: :py:obj:`bool`
+		'''
+		if self.signalled:
+			return True
+		if timeout is None:
+			nanoseconds = GL.GL_TIMEOUT_IGNORED
+		else:
+			nanoseconds = int(timeout * 1e9)
+		# Flush, otherwise the fence might never be reached
+		result = GL.glClientWaitSync(self.handle, GL.GL_SYNC_FLUSH_COMMANDS_BIT, nanoseconds)
+		if result == GL.GL_WAIT_FAILED:
+			raise RuntimeError("Failed to wait for sync object.")
+		self.signalled = result in (GL.GL_ALREADY_SIGNALED, GL.GL_CONDITION_SATISFIED)
+		return self.signalled
+
+	def done(self):
+		'''Check whether the fence is signalled, without blocking.
+
+		:rtype: :py:obj:`bool`
+		'''
+		return self.wait(0)
+
+	def delete(self):
+		GL.glDeleteSync(self.handle)
+		self.handle = None
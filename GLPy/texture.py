@@ -1,9 +1,18 @@
 from itertools import chain
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 from OpenGL import GL
+from OpenGL.GL.EXT import texture_compression_s3tc as s3tc
+# UPSTREAM: The PyOpenGL wrapper always reads level 0
+from OpenGL.raw.GL.VERSION.GL_1_3 import glGetCompressedTexImage
+from ctypes import c_void_p
 import numpy
 
-from .buffers import numpy_buffer_types
+from .buffers import Buffer, deleteBuffers, numpy_buffer_types
+from .sync import Fence
+from . import state
 
 create_storage = {getattr(GL, 'GL_TEXTURE_{}D'.format(d)):
                   getattr(GL, 'glTexStorage{}D'.format(d))
@@ -26,35 +35,215 @@ set_texture.update({getattr(GL, 'GL_TEXTURE_{}D_ARRAY'.format(d)):
                     getattr(GL, 'glTexImage{}D'.format(d + 1))
                     for d in range(1, 3)})
 
+set_compressed_sub_texture = {getattr(GL, 'GL_TEXTURE_{}D'.format(d)):
+                              getattr(GL, 'glCompressedTexSubImage{}D'.format(d))
+                              for d in range(1, 4)}
+set_compressed_sub_texture.update({getattr(GL, 'GL_TEXTURE_{}D_ARRAY'.format(d)):
+                                   getattr(GL, 'glCompressedTexSubImage{}D'.format(d + 1))
+                                   for d in range(1, 3)})
+
+# Components and bytes per 4x4 block of compressed formats
+compressed_formats = { GL.GL_COMPRESSED_RED_RGTC1: (1, 8)
+                     , GL.GL_COMPRESSED_SIGNED_RED_RGTC1: (1, 8)
+                     , GL.GL_COMPRESSED_RG_RGTC2: (2, 16)
+                     , GL.GL_COMPRESSED_SIGNED_RG_RGTC2: (2, 16)
+                     , GL.GL_COMPRESSED_RGBA_BPTC_UNORM: (4, 16)
+                     , GL.GL_COMPRESSED_SRGB_ALPHA_BPTC_UNORM: (4, 16)
+                     , GL.GL_COMPRESSED_RGB_BPTC_SIGNED_FLOAT: (3, 16)
+                     , GL.GL_COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT: (3, 16)
+                     , s3tc.GL_COMPRESSED_RGB_S3TC_DXT1_EXT: (3, 8)
+                     , s3tc.GL_COMPRESSED_RGBA_S3TC_DXT1_EXT: (4, 8)
+                     , s3tc.GL_COMPRESSED_RGBA_S3TC_DXT3_EXT: (4, 16)
+                     , s3tc.GL_COMPRESSED_RGBA_S3TC_DXT5_EXT: (4, 16)
+                     , GL.GL_COMPRESSED_RGB8_ETC2: (3, 8)
+                     , GL.GL_COMPRESSED_RGB8_PUNCHTHROUGH_ALPHA1_ETC2: (4, 8)
+                     , GL.GL_COMPRESSED_RGBA8_ETC2_EAC: (4, 16)
+                     , GL.GL_COMPRESSED_R11_EAC: (1, 8)
+                     , GL.GL_COMPRESSED_SIGNED_R11_EAC: (1, 8)
+                     , GL.GL_COMPRESSED_RG11_EAC: (2, 16)
+                     , GL.GL_COMPRESSED_SIGNED_RG11_EAC: (2, 16) }
+
+def compressedFormats(target=GL.GL_TEXTURE_2D, components=None):
+	'''The compressed internal formats supported by the context, in order of decreasing quality
+	(RGTC and BPTC, then S3TC, then ETC2).
+
+	:param target: The texture target the formats are used with
+	:param components: Only return formats with this number of components
+	:type components: :py:obj:`int` or :py:obj:`None`
+	:rtype: [:py:obj:`int`]
+	'''
+	return [f for f, (n, _) in compressed_formats.items()
+	        if (components is None or n == components)
+	        and GL.glGetInternalformativ(target, f, GL.GL_INTERNALFORMAT_SUPPORTED, 1) == GL.GL_TRUE]
+
 pixel_components = {range(i, i+1): '_'.join(('GL', n))
                     for i, n in enumerate(['RED', 'GREEN', 'BLUE'])}
 pixel_components.update({range(i): '_'.join(('GL', 'RGBA'[:i])) for i in range(2,5)})
 
+TextureRegion = namedtuple('TextureRegion', ['layers', 'size', 'components', 'shape'])
+TextureRegion.__doc__ = '''A region of a texture level selected by indexing.
+
+:ivar layers: The selected array layers, or :py:obj:`None` if the texture is not an array texture
+:ivar size: The selected range along each dimension of the texture, in OpenGL order (x, y, z)
+:ivar components: The selected components
+:ivar shape: The shape of a numpy array holding the region, see
+  :py:meth:`ImmutableTexture.__setitem__`
+'''
+
+@contextmanager
+def pixelStore(pname, value):
+	'''Set a pixel storage parameter (e.g. :py:obj:`GL.GL_PACK_ALIGNMENT`) within the context.'''
+	previous = int(GL.glGetIntegerv(pname))
+	GL.glPixelStorei(pname, value)
+	try:
+		yield
+	finally:
+		GL.glPixelStorei(pname, previous)
+
+@contextmanager
+def clientMemory(target):
+	'''Unbind the buffer bound to a pixel buffer target (e.g. :py:obj:`GL.GL_PIXEL_PACK_BUFFER`)
+	within the context, so pixel transfers use client memory rather than offsets into a buffer left
+	bound (see :py:attr:`.State.unbind`).'''
+	current = state.current()
+	previous = current.bindBuffer(target, 0)
+	try:
+		yield
+	finally:
+		if current.unbind and previous:
+			current.bindBuffer(target, previous)
+
+def indexRange(idx, length):
+	'''The contiguous range of elements selected by an index.
+
+	:type idx: :py:obj:`int` or :py:obj:`slice`
+	:rtype: :py:obj:`range`
+	:raises IndexError: If the index is out of bounds, or the slice has a step
+	'''
+	if isinstance(idx, slice):
+		selected = range(*idx.indices(length))
+		if selected.step != 1:
+			raise IndexError("Texture regions must be contiguous.")
+		return selected
+	if not -length <= idx < length:
+		raise IndexError("Index {} is out of bounds for size {}.".format(idx, length))
+	idx %= length
+	return range(idx, idx + 1)
+
+def mipmapLevels(size):
+	'''The number of levels in a complete mipmap chain.
+
+	:param size: The size of the base level
+	:type size: [:py:obj:`int`]
+	:rtype: :py:obj:`int`
+	'''
+	return max(size).bit_length()
+
+def boxDownsample(image, axes, factors):
+	'''Downsample an image by averaging boxes of pixels. Elements left over along an axis that
+	is not a multiple of its factor are dropped. Integer images are rounded to the nearest
+	integer.
+
+	:param image: The image
+	:type image: :py:class:`numpy.ndarray`
+	:param axes: The axes to downsample
+	:type axes: [:py:obj:`int`]
+	:param factors: The size of the box along each axis
+	:type factors: [:py:obj:`int`]
+	:rtype: :py:class:`numpy.ndarray`
+	'''
+	factors = dict(zip(axes, factors))
+	shape = []
+	trim = []
+	for axis, length in enumerate(image.shape):
+		factor = factors.get(axis, 1)
+		shape.extend((length // factor, factor))
+		trim.append(slice(0, length // factor * factor))
+	boxes = image[tuple(trim)].reshape(shape)
+	box_axes = tuple(range(1, len(shape), 2))
+	count = int(numpy.prod(list(factors.values())))
+	if image.dtype.kind in 'iub':
+		total = boxes.sum(box_axes, dtype='int64')
+		return ((total + count // 2) // count).astype(image.dtype)
+	return boxes.mean(box_axes, dtype='float64').astype(image.dtype)
+
+def downsampleTile(image, out, axes, factors):
+	out[...] = boxDownsample(image, axes, factors)
+
+def mipmapPyramid(image, levels, axes=(0, 1), executor=None, tile_rows=64):
+	'''Build a mipmap chain on the CPU, e.g. for integer textures, which OpenGL cannot generate
+	mipmaps for.
+
+	Each level is box-filtered directly from the base level, so levels do not depend on each
+	other. The work is split into tiles of rows of each level, which are filtered in parallel (numpy
+	releases the GIL while filtering).
+
+	:param image: The base level
+	:type image: :py:class:`numpy.ndarray`
+	:param int levels: The number of levels, including the base level
+	:param axes: The axes of the image along the dimensions of the texture, e.g. ``(1, 2)`` for a
+	  2D array texture
+	:type axes: [:py:obj:`int`]
+	:param executor: The executor to run the tiles with. A thread pool is used if it is
+	  :py:obj:`None`.
+	:type executor: :py:class:`concurrent.futures.Executor` or :py:obj:`None`
+	:param int tile_rows: The number of rows (along the first axis) of a level per tile
+	:returns: The levels, starting with the base level
+	:rtype: [:py:class:`numpy.ndarray`]
+	'''
+	if executor is None:
+		with ThreadPoolExecutor() as executor:
+			return mipmapPyramid(image, levels, axes, executor, tile_rows)
+
+	pyramid = [image]
+	tiles = []
+	for level in range(1, levels):
+		shape = list(image.shape)
+		factors = []
+		for axis in axes:
+			shape[axis] = max(1, image.shape[axis] >> level)
+			factors.append(image.shape[axis] // shape[axis])
+		out = numpy.empty(shape, image.dtype)
+		pyramid.append(out)
+
+		row_axis, row_factor = axes[0], factors[0]
+		for start in range(0, shape[row_axis], tile_rows):
+			stop = min(start + tile_rows, shape[row_axis])
+			source = (slice(None),) * row_axis + (slice(start * row_factor, stop * row_factor),)
+			dest = (slice(None),) * row_axis + (slice(start, stop),)
+			tiles.append(executor.submit(downsampleTile, image[source], out[dest], axes, factors))
+	for tile in tiles:
+		tile.result()
+	return pyramid
+
 class ImmutableTexture:
 	'''A class for textures (using immutable storage). These textures are
 	created with an explicit size, type and number of mipmap levels, and cannot
 	be resized.
-	
+
 	:param size: The size of the texture
 	:type size: [:py:obj:`int`]
 	:param int components: Number of components per pixel
 	:param count: Number of slices (will create an array texture if this is not
 		None)
 	:type count: :py:obj:`int` or :py:obj:`None`
-	:param int levels: Number of mipmap levels. Only ``1`` is currently
-		supported.
+	:param int levels: Number of mipmap levels, see :py:func:`mipmapLevels`
 	:param int bits: Bits per pixel
 	:param bool integer: Use an integer texture type (instead of a float)
 	:param bool normalized: Create a normalized texture (if integer)
 	:param bool signed: Create a signed texture (if integer)
+	:param compression: A compressed internal format to use instead of the format described by
+	  the type parameters (see :py:func:`compressedFormats`). The type parameters still describe
+	  the uncompressed image data, which the driver compresses when it is written.
+	:type compression: :py:obj:`int` or :py:obj:`None`
 	:param handle: The OpenGL handle to use for the texture
 	:type handle: :py:obj:`int` or :py:obj:`None`
 	:param tex_params: The texture parameters to be set'''
 
 	def __init__(self, size, components=4, count=None, levels=1
 	            , bits=8, integer=True, normalized=True, signed=False
-				, handle=None, **tex_params):
-		self.bound = 0
+				, compression=None, handle=None, **tex_params):
+		self._previous = []
 
 		self.handle = handle or GL.glGenTextures(1)
 		self.levels = levels
@@ -69,20 +258,24 @@ class ImmutableTexture:
 		self.signed = signed
 		self.normalized = normalized
 		self.bits = bits
+		self.compression = compression
 
 		for param, value in tex_params.items():
 			pname = getattr(GL, param)
 			glTexParameterfv(self.handle, pname, value)
 
+		size = self.size if self.count is None else self.size + (self.count,)
 		with self:
-			create_storage[self.target](self.target, self.levels, self.internal_format, *self.size)
-	
+			create_storage[self.target](self.target, self.levels, self.internal_format, *size)
+
 	@property
 	def target(self):
 		return getattr(GL, 'GL_TEXTURE_{}D{}'.format(len(self.size), '_ARRAY' if self.count is not None else ''))
-	
+
 	@property
 	def internal_format(self):
+		if self.compression is not None:
+			return self.compression
 		if self.integer:
 			if self.normalized:
 				if self.signed:
@@ -99,34 +292,203 @@ class ImmutableTexture:
 
 		format_str = 'GL_{}{}{}'.format('RGBA'[:self.components], self.bits, internal_type)
 		return getattr(GL, format_str)
-	
+
+	@property
+	def compressed(self):
+		return self.compression is not None
+
+	@property
+	def dtype(self):
+		'''The numpy datatype of one component of a pixel, as read from the texture.
+
+		:rtype: :py:class:`numpy.dtype`
+		'''
+		if not self.integer:
+			return numpy.dtype('float{}'.format(self.bits))
+		return numpy.dtype('{}int{}'.format('' if self.signed else 'u', self.bits))
+
+	def levelSize(self, level=0):
+		'''The size of a mipmap level.
+
+		:rtype: (:py:obj:`int`)
+		:raises IndexError: If the texture has no such level
+		'''
+		if not 0 <= level < self.levels:
+			raise IndexError("No mipmap level {} in a texture with {} levels."
+			                 .format(level, self.levels))
+		return tuple(max(1, s >> level) for s in self.size)
+
+	def pixelFormat(self, components):
+		'''The OpenGL pixel format used to transfer some components of the texture.
+
+		:param components: The components
+		:type components: :py:obj:`range`
+		:raises IndexError: If the component selection is not supported by OpenGL pixel transfers
+		'''
+		try:
+			pixel_format = pixel_components[components]
+		except KeyError as e:
+			raise IndexError("Invalid component selection: {}".format(components)) from e
+		if self.integer and not self.normalized:
+			pixel_format = '_'.join((pixel_format, 'INTEGER'))
+		return getattr(GL, pixel_format)
+
+	def region(self, idxs, level=0):
+		'''Find the region of a texture level selected by indices, see :py:meth:`__setitem__`.
+		Integer indices select a single element, but do not remove the dimension.
+
+		:rtype: :py:class:`TextureRegion`
+		:raises IndexError: If the indices are not valid for the texture
+		'''
+		if not isinstance(idxs, tuple):
+			idxs = (idxs,)
+		dims = len(self.size)
+		if idxs in ((), (Ellipsis,)):
+			idxs = (slice(None),) * dims
+		layers = components = slice(None)
+		if len(idxs) == dims:
+			size = idxs
+		elif len(idxs) == dims + 1:
+			if self.count is None:
+				size, components = idxs[:-1], idxs[-1]
+			else:
+				layers, size = idxs[0], idxs[1:]
+		elif len(idxs) == dims + 2:
+			layers, size, components = idxs[0], idxs[1:-1], idxs[-1]
+		else:
+			raise IndexError("Incorrect number of indices.")
+
+		components = indexRange(components, self.components)
+		# Indices are in numpy order, so the last one is along x
+		size = [indexRange(i, length) for i, length in zip(size, reversed(self.levelSize(level)))]
+		shape = [len(s) for s in size]
+		size.reverse()
+		if self.count is None:
+			layers = None
+		else:
+			layers = indexRange(layers, self.count)
+			shape.insert(0, len(layers))
+		if len(components) > 1:
+			shape.append(len(components))
+		return TextureRegion(layers, size, components, tuple(shape))
+
+	def levelRegion(self, level, components):
+		'''The region covering a whole level, with some components.
+
+		:rtype: :py:class:`TextureRegion`
+		'''
+		idxs = (slice(None),) * len(self.size)
+		if self.count is not None:
+			idxs = (slice(None),) + idxs
+		return self.region(idxs + (slice(components.start, components.stop),), level)
+
+	@staticmethod
+	def regionBox(region):
+		'''The offset and size of a region in three dimensions, with array layers as the last
+		dimension (as passed to e.g. ``glGetTextureSubImage``).
+
+		:rtype: ([:py:obj:`int`], [:py:obj:`int`])
+		'''
+		ranges = list(region.size)
+		if region.layers is not None:
+			ranges.append(region.layers)
+		ranges += [range(1)] * (3 - len(ranges))
+		return [r.start for r in ranges], [len(r) for r in ranges]
+
+	@staticmethod
+	def regionSlices(region):
+		'''Slices selecting a region from an array holding a whole level (see
+		:py:meth:`levelRegion`).'''
+		slices = [slice(r.start, r.stop) for r in reversed(region.size)]
+		if region.layers is not None:
+			slices.insert(0, slice(region.layers.start, region.layers.stop))
+		return tuple(slices)
+
 	def __enter__(self):
-		"""Texture objects provide a context manager. This keeps track of how
-		many times the texture has been bound and unbound. Grouping operations
-		on a texture within a context where it is bound prevents repeated
-		binding and un-binding.
+		"""Texture objects provide a context manager that binds them to texture
+		unit 0, and restores the previously bound texture on exit (unless
+		:py:attr:`.State.unbind` is unset). Binding a texture that is already
+		bound does not call OpenGL, so grouping operations on a texture within a
+		context where it is bound prevents repeated binding and un-binding.
 
 		.. _texture-bind-warning:
 		.. warning::
-		   It is not allowed to bind two textures with the same target
-		   simultaneously. It is allowed to bind the *same* texture multiple times.
-		   
+		   Contexts binding textures must be nested, and texture bindings must not
+		   be changed outside of GLPy (see :py:meth:`.State.invalidate`).
+
 		   Methods that bind a texture will be documented"""
-		if not self.bound:
-			GL.glBindTexture(self.target, self.handle)
-		self.bound += 1
-	
+		self._previous.append(state.current().bindTexture(self.target, self.handle, 0))
+
 	def __exit__(self, ex, val, tb):
-		self.bound -= 1
-		if not self.bound:
-			GL.glBindTexture(self.target, 0)
-	
+		previous = self._previous.pop()
+		current = state.current()
+		if current.unbind:
+			current.bindTexture(self.target, previous or 0, 0)
+
 	def __getitem__(self, idxs):
-		raise NotImplementedError("Texture data access is not yet implemented.")
-	
-	# TODO: Allow setting of multiple mipmap levels
+		"""Read image data from the base level, see :py:meth:`read`."""
+		return self.read(idxs)
+
+	def read(self, idxs=Ellipsis, level=0, out=None):
+		"""Read image data, waiting for it to be available. Reading a region uses
+		``glGetTextureSubImage`` if it is available, otherwise the whole level is read.
+
+		:param idxs: The region to read, see :py:meth:`__setitem__`
+		:param int level: The mipmap level to read
+		:param out: An array to read into, with the shape of the region and the datatype of the
+		  texture (see :py:attr:`dtype`). One is allocated if it is :py:obj:`None`.
+		:type out: :py:class:`numpy.ndarray` or :py:obj:`None`
+		:returns: The image data
+		:rtype: :py:class:`numpy.ndarray`
+
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture it belongs to, if ``glGetTextureSubImage`` is not
+		  available
+		"""
+		region = self.region(idxs, level)
+		if out is None:
+			out = numpy.empty(region.shape, self.dtype)
+		elif out.shape != region.shape or out.dtype != self.dtype:
+			raise ValueError("Expected an array of shape {} and type {}."
+			                 .format(region.shape, self.dtype))
+		pixel_format = self.pixelFormat(region.components)
+		pixel_type = numpy_buffer_types[self.dtype]
+		with clientMemory(GL.GL_PIXEL_PACK_BUFFER), pixelStore(GL.GL_PACK_ALIGNMENT, 1):
+			if GL.glGetTextureSubImage and out.flags.c_contiguous:
+				offset, size = self.regionBox(region)
+				GL.glGetTextureSubImage(self.handle, level, *offset, *size, pixel_format,
+				                        pixel_type, out.nbytes, out)
+			else:
+				level_region = self.levelRegion(level, region.components)
+				data = numpy.empty(level_region.shape, self.dtype)
+				with self:
+					GL.glGetTexImage(self.target, level, pixel_format, pixel_type, data)
+				out[...] = data[self.regionSlices(region)]
+		return out
+
+	def readAsync(self, idxs=Ellipsis, level=0, out=None, buffer=None):
+		"""Start reading image data into a pixel pack buffer, without waiting for it.
+
+		.. code-block:: python
+
+		   readback = texture.readAsync(out=frame, buffer=pack_buffer)
+		   # Render the next frame...
+		   frame = readback.result()
+
+		:param idxs: The region to read, see :py:meth:`__setitem__`
+		:param int level: The mipmap level to read
+		:param out: The array to copy the result into, see :py:meth:`read`
+		:type out: :py:class:`numpy.ndarray` or :py:obj:`None`
+		:param buffer: The pixel pack buffer to read into, e.g. the buffer of a previous readback.
+		  It is only reallocated if it is too small. One is created if it is :py:obj:`None`.
+		:type buffer: :py:class:`.Buffer` or :py:obj:`None`
+		:rtype: :py:class:`TextureReadback`
+		"""
+		return TextureReadback(self, idxs, level, out, buffer)
+
 	def __setitem__(self, idxs, value):
-		"""Set the image data. The behaviour changes depending on how many
+		"""Set the image data of the base level, see :py:meth:`write`. The behaviour changes depending on how many
 		indices are provided and the type of the texture:
 
 		- Equal to the number of dimensions: All components and array elements are set.
@@ -136,6 +498,10 @@ class ImmutableTexture:
 		- Two greater than the number of dimensions: The first index defines which array elements
 		  are set, the last index defines which components are set.
 
+		Indices into the dimensions of the texture are in numpy order, i.e. the last one is along
+		the x axis. The image data has a dimension per texture dimension (preceded by the array
+		layers for array textures), followed by the components if more than one is selected.
+
 		:param idxs: The indices to be set
 		:param value: The new image data
 		:raises IndexError: If the number of indices is not between the number of texture dimensions
@@ -147,52 +513,197 @@ class ImmutableTexture:
 
 		  This method binds the texture it belongs to
 		"""
-		value = numpy.asarray(value)
-		tex_count = 1 if self.count is None else self.count
-		level = 0 # TODO: Support for setting mipmap levels
+		self.write(idxs, value)
 
-		if len(idxs) == len(self.size):
-			count = slice(None, tex_count)
-			components = slice(None, self.components)
-			size = idxs
-		elif len(idxs) == len(self.size) + 1:
-			if tex_count is None:
-				components = idxs[-1]
-				size = idxs[:-1]
-				count = slice(None, tex_count)
-			else:
-				components = slice(None, self.components)
-				count = idxs[0]
-				size = idxs[1:]
-		elif len(idxs) == len(self.size) + 2:
-			components = idxs[-1]
-			count = idxs[0]
-			size = idxs[1:-1]
-		else:
-			raise IndexError("Incorrect number of indices.")
+	def write(self, idxs, value, level=0):
+		"""Set the image data of a mipmap level.
 
-		components = range(*components.indices(self.components))
-		value.dtype = numpy.dtype(value.dtype.base, len(components))
-		value_type = numpy_buffer_types[value.dtype.base]
+		:param idxs: The indices to be set, see :py:meth:`__setitem__`
+		:param value: The new image data
+		:param int level: The mipmap level to set
 
-		try:
-			value_format = pixel_components[components]
-		except KeyError as e:
-			raise IndexError("Invalid component selection: {}".format(components)) from e
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture it belongs to
+		"""
+		region = self.region(idxs, level)
+		value = self.imageData(region, value)
+		with clientMemory(GL.GL_PIXEL_UNPACK_BUFFER):
+			self.subImage(region, level, numpy_buffer_types[value.dtype], value)
+
+	def generateMipmap(self):
+		"""Generate all mipmap levels from the base level with ``glGenerateMipmap``.
+
+		:raises RuntimeError: For integer textures (that are not normalized), which OpenGL cannot
+		  generate mipmaps for. Use :py:meth:`buildMipmaps` instead.
+
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture it belongs to
+		"""
 		if self.integer and not self.normalized:
-			value_format = '_'.join((value_format, 'INTEGER'))
-		value_format = getattr(GL, value_format)
+			raise RuntimeError("Cannot generate mipmaps of integer textures, use buildMipmaps.")
+		with self:
+			GL.glGenerateMipmap(self.target)
+
+	def buildMipmaps(self, image, executor=None):
+		"""Set the base level to an image, and all other levels to downsampled copies built on the
+		CPU (see :py:func:`mipmapPyramid`).
+
+		:param image: The image data of the base level, see :py:meth:`__setitem__`
+		:param executor: The executor to downsample with
+		:type executor: :py:class:`concurrent.futures.Executor` or :py:obj:`None`
+
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture it belongs to
+		"""
+		region = self.levelRegion(0, range(self.components))
+		image = self.imageData(region, image)
+		first_axis = 0 if self.count is None else 1
+		axes = tuple(range(first_axis, first_axis + len(self.size)))
+		for level, data in enumerate(mipmapPyramid(image, self.levels, axes, executor)):
+			self.write(Ellipsis, data, level)
+
+	def imageData(self, region, value):
+		'''Convert image data for upload to a region, see :py:meth:`__setitem__`.
+
+		:returns: A contiguous array with the shape of the region. Values that are not arrays are
+		  converted to the datatype of the texture.
+		:rtype: :py:class:`numpy.ndarray`
+		'''
+		value = numpy.ascontiguousarray(value, getattr(value, 'dtype', self.dtype))
+		return value.reshape(region.shape)
 
-		count = range(*count.indices(tex_count))
-		size = [range(*s.indices(size_dim)) for s, size_dim in zip(size, self.size)]
-		new_shape = [count.stop - count.start] + [s.stop - s.start for s in size]
-		value.shape = new_shape if tex_count > 1 else new_shape[1:]
+	def subImage(self, region, level, pixel_type, pixels):
+		'''Upload image data to a region with ``glTexSubImage*``.
 
+		:param region: The region to set
+		:type region: :py:class:`TextureRegion`
+		:param int level: The mipmap level to set
+		:param pixel_type: The OpenGL type of the image data
+		:param pixels: The image data, or an offset into the buffer bound to
+		  :py:obj:`GL.GL_PIXEL_UNPACK_BUFFER`
+
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture it belongs to
+		'''
+		offset, size = self.regionBox(region)
+		dims = len(self.size) + (region.layers is not None)
 		# UPSTREAM: PyOpenGL functions do not take keyword arguments
-		args = tuple(i.start for i in reversed(size)) + value.shape[::-1] + (value_format, value_type, value)
-		with self:
+		args = (tuple(offset[:dims]) + tuple(size[:dims])
+		        + (self.pixelFormat(region.components), pixel_type, pixels))
+		with self, pixelStore(GL.GL_UNPACK_ALIGNMENT, 1):
 			set_sub_texture[self.target](self.target, level, *args)
-	
+
+	def compressedSize(self, level=0):
+		'''The size (in bytes) of the compressed data of a level.
+
+		:rtype: :py:obj:`int`
+		'''
+		self.levelSize(level)
+		with self:
+			return int(GL.glGetTexLevelParameteriv(self.target, level,
+			                                       GL.GL_TEXTURE_COMPRESSED_IMAGE_SIZE))
+
+	def readCompressed(self, level=0, out=None):
+		"""Read the compressed data of a whole level, e.g. to store it after the driver has
+		compressed it.
+
+		:param int level: The mipmap level to read
+		:param out: An array of bytes to read into, with the size of the compressed level
+		:type out: :py:class:`numpy.ndarray` or :py:obj:`None`
+		:rtype: :py:class:`numpy.ndarray`
+		:raises RuntimeError: If the texture is not compressed
+
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture it belongs to
+		"""
+		if not self.compressed:
+			raise RuntimeError("Texture is not compressed.")
+		nbytes = self.compressedSize(level)
+		if out is None:
+			out = numpy.empty(nbytes, 'uint8')
+		elif out.nbytes != nbytes or not out.flags.c_contiguous:
+			raise ValueError("Expected a contiguous array of {} bytes.".format(nbytes))
+		with self, clientMemory(GL.GL_PIXEL_PACK_BUFFER):
+			glGetCompressedTexImage(self.target, level, c_void_p(out.ctypes.data))
+		return out
+
+	def writeCompressed(self, idxs, data, level=0):
+		"""Set image data from compressed data, with ``glCompressedTexSubImage*``. The region must
+		be aligned to the compression blocks, and include all components.
+
+		:param idxs: The indices to be set, see :py:meth:`__setitem__`
+		:param data: The compressed data, in the internal format of the texture
+		:type data: :py:obj:`bytes` or :py:class:`numpy.ndarray`
+		:param int level: The mipmap level to set
+		:raises RuntimeError: If the texture is not compressed
+		:raises IndexError: If the region does not include all components
+
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture it belongs to
+		"""
+		if not self.compressed:
+			raise RuntimeError("Texture is not compressed.")
+		region = self.region(idxs, level)
+		if len(region.components) != self.components:
+			raise IndexError("Compressed data must include all components.")
+		data = numpy.frombuffer(data, 'uint8') if isinstance(data, bytes) else data
+		data = numpy.ascontiguousarray(data).reshape(-1).view('uint8')
+
+		offset, size = self.regionBox(region)
+		dims = len(self.size) + (region.layers is not None)
+		# The size of the data is passed by PyOpenGL
+		args = tuple(offset[:dims]) + tuple(size[:dims]) + (self.compression, data)
+		with self, clientMemory(GL.GL_PIXEL_UNPACK_BUFFER):
+			set_compressed_sub_texture[self.target](self.target, level, *args)
+
+	def compress(self, image, cache=None, generate_mipmap=False):
+		"""Set the base level from uncompressed image data, compressed by the driver. If a cache
+		is given, the compressed levels are read back and stored in it, and later calls with the
+		same image and texture format upload them without compressing again.
+
+		.. code-block:: python
+
+		   cache = CompressedTextureCache()
+		   texture = ImmutableTexture(image.shape[1::-1], levels=mipmapLevels(image.shape[:2]),
+		                              compression=GL.GL_COMPRESSED_RGBA_BPTC_UNORM)
+		   texture.compress(image, cache, generate_mipmap=True)
+
+		:param image: The image data of the base level, see :py:meth:`__setitem__`
+		:param cache: The cache to load the compressed data from, or store it in
+		:type cache: :py:class:`.CompressedTextureCache` or :py:obj:`None`
+		:param bool generate_mipmap: Generate the other levels (see :py:meth:`generateMipmap`)
+		:returns: Whether the compressed data was loaded from the cache
+		:rtype: :py:obj:`bool`
+		:raises RuntimeError: If the texture is not compressed
+
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture it belongs to
+		"""
+		if not self.compressed:
+			raise RuntimeError("Texture is not compressed.")
+		levels = self.levels if generate_mipmap else 1
+		if cache is not None:
+			key = cache.key(self, image, levels)
+			cached = cache.load(key)
+			if cached is not None and len(cached) == levels:
+				for level, data in enumerate(cached):
+					self.writeCompressed(Ellipsis, data, level)
+				return True
+
+		self[...] = image
+		if generate_mipmap:
+			self.generateMipmap()
+		if cache is not None:
+			cache.store(key, [self.readCompressed(level) for level in range(levels)])
+		return False
+
 	def activate(self, *units):
 		'''Binds the texture to the specified image units.
 
@@ -207,8 +718,150 @@ class ImmutableTexture:
 
 		if any(u <= 0 for u in units):
 			raise ValueError("Cannot bind to texture units under 1.")
+		current = state.current()
 		for u in units:
-			GL.glActiveTexture(GL.GL_TEXTURE0 + u)
-			GL.glBindTexture(self.target, self.handle)
-		GL.glActiveTexture(GL.GL_TEXTURE0)
-		GL.glBindTexture(self.target, 0)
+			current.bindTexture(self.target, self.handle, u)
+		current.activeTexture(0)
+
+class TextureReadback:
+	'''An asynchronous read of texture data into a pixel pack buffer, as returned by
+	:py:meth:`ImmutableTexture.readAsync`. The data is copied to client memory when the result is
+	requested, once the GPU has written it.
+
+	:ivar buffer: The pixel pack buffer, which can be reused once the result has been read
+	:vartype buffer: :py:class:`.Buffer`
+	'''
+
+	def __init__(self, texture, idxs=Ellipsis, level=0, out=None, buffer=None):
+		region = texture.region(idxs, level)
+		if out is not None and (out.shape != region.shape or out.dtype != texture.dtype):
+			raise ValueError("Expected an array of shape {} and type {}."
+			                 .format(region.shape, texture.dtype))
+		self.out = out
+		self.dtype = texture.dtype
+		if GL.glGetTextureSubImage:
+			self.slices = Ellipsis
+			read_region = region
+		else:
+			# The whole level is read, and the region selected from it
+			self.slices = texture.regionSlices(region)
+			read_region = texture.levelRegion(level, region.components)
+		self.shape = read_region.shape
+		self.nbytes = int(numpy.prod(self.shape)) * self.dtype.itemsize
+
+		self.buffer = Buffer(usage=GL.GL_STREAM_READ) if buffer is None else buffer
+		pixel_format = texture.pixelFormat(region.components)
+		pixel_type = numpy_buffer_types[self.dtype]
+		with self.buffer.bind(GL.GL_PIXEL_PACK_BUFFER), pixelStore(GL.GL_PACK_ALIGNMENT, 1):
+			if self.buffer.dtype is None or self.buffer.nbytes < self.nbytes:
+				self.buffer[...] = numpy.dtype(('uint8', (self.nbytes,)))
+			if GL.glGetTextureSubImage:
+				offset, size = texture.regionBox(read_region)
+				GL.glGetTextureSubImage(texture.handle, level, *offset, *size, pixel_format,
+				                        pixel_type, self.nbytes, GL.GLvoidp(0))
+			else:
+				with texture:
+					GL.glGetTexImage(texture.target, level, pixel_format, pixel_type,
+					                 GL.GLvoidp(0))
+		self.fence = Fence()
+		self._result = None
+
+	def done(self):
+		''':returns: Whether the result is available without blocking
+		:rtype: :py:obj:`bool`
+		'''
+		return self._result is not None or self.fence.done()
+
+	def result(self):
+		'''Wait for the read to complete, and copy the data to client memory (into the ``out``
+		array, if one was given).
+
+		:rtype: :py:class:`numpy.ndarray`
+		'''
+		if self._result is None:
+			self.fence.wait()
+			with self.buffer.bind(GL.GL_PIXEL_PACK_BUFFER):
+				mapping = self.buffer.map(GL.GL_MAP_READ_BIT)
+				try:
+					data = mapping[:self.nbytes].view(self.dtype).reshape(self.shape)[self.slices]
+					if self.out is None:
+						self._result = numpy.array(data)
+					else:
+						self.out[...] = data
+						self._result = self.out
+				finally:
+					self.buffer.unmap()
+			self.fence.delete()
+		return self._result
+
+class UnpackBufferRing:
+	'''A ring of pixel unpack buffers, for streaming image data (e.g. video frames) to textures
+	without waiting for the driver to copy it.
+
+	Each upload writes the image data to the next buffer in the ring, mapped without
+	synchronization, and starts the transfer to the texture from the buffer. A fence is inserted
+	after the transfer, and only waited for when the ring comes back around to the buffer, so the
+	copy overlaps with the following frames.
+
+	.. code-block:: python
+
+	   ring = UnpackBufferRing(copies=3)
+	   while running:
+	       ring.upload(texture, Ellipsis, camera.frame())
+	       draw()
+
+	:param int copies: The number of buffers
+	:param usage: The usage of the buffers
+	'''
+
+	def __init__(self, copies=3, usage=GL.GL_STREAM_DRAW):
+		if copies < 1:
+			raise ValueError("A buffer ring needs at least one buffer.")
+		self.buffers = [Buffer(usage=usage) for _ in range(copies)]
+		self.fences = [None] * copies
+		self.index = 0
+
+	def upload(self, texture, idxs, value, level=0):
+		'''Upload image data to a texture through the next buffer in the ring. Blocks only if
+		the upload that last used the buffer has not finished.
+
+		:param texture: The texture
+		:type texture: :py:class:`ImmutableTexture`
+		:param idxs: The region to set, see :py:meth:`ImmutableTexture.__setitem__`
+		:param value: The image data
+		:param int level: The mipmap level to set
+
+		.. admonition:: |texture-bind|
+
+		  This method binds the texture
+		'''
+		region = texture.region(idxs, level)
+		value = texture.imageData(region, value)
+		buffer = self.buffers[self.index]
+		fence = self.fences[self.index]
+		if fence is not None:
+			fence.wait()
+			fence.delete()
+			self.fences[self.index] = None
+
+		with buffer.bind(GL.GL_PIXEL_UNPACK_BUFFER):
+			if buffer.dtype is None or buffer.nbytes < value.nbytes:
+				buffer[...] = numpy.dtype(('uint8', (value.nbytes,)))
+			# The fence guarantees the GPU is done with the buffer
+			mapping = buffer.map(GL.GL_MAP_WRITE_BIT | GL.GL_MAP_UNSYNCHRONIZED_BIT)
+			try:
+				mapping[:value.nbytes] = value.reshape(-1).view('uint8')
+			finally:
+				buffer.unmap()
+			texture.subImage(region, level, numpy_buffer_types[value.dtype], GL.GLvoidp(0))
+
+		self.fences[self.index] = Fence()
+		self.index = (self.index + 1) % len(self.buffers)
+
+	def delete(self):
+		for fence in self.fences:
+			if fence is not None:
+				fence.delete()
+		deleteBuffers(self.buffers)
+		self.buffers = []
+		self.fences = []
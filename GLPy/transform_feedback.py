@@ -0,0 +1,322 @@
+from OpenGL import GL
+from numpy import dtype
+import numpy
+
+from .buffers import Buffer, deleteBuffers
+from .vertex import VAO
+from .sync import Fence
+from . import state
+
+from contextlib import contextmanager
+
+def feedbackDtype(varyings):
+	'''The numpy datatype of one vertex captured with interleaved transform feedback.
+
+	:param varyings: The captured varyings
+	:type varyings: [:py:class:`.FeedbackVarying`]
+	:rtype: :py:class:`numpy.dtype`
+	'''
+	return dtype([(v.name, v.dtype) for v in varyings])
+
+def feedbackGroups(varyings, xfb_mode):
+	'''The varyings captured into each transform feedback buffer index.
+
+	:rtype: [[:py:class:`.FeedbackVarying`]]
+	'''
+	if xfb_mode == GL.GL_SEPARATE_ATTRIBS:
+		return [[v] for v in varyings]
+	return [list(varyings)]
+
+class Readback:
+	'''An asynchronous copy of buffer contents to client memory. The data is copied to a
+	staging buffer on the GPU when the readback is created, and only read once it is complete.
+
+	:param buffer: The buffer to read
+	:type buffer: :py:class:`.Buffer`
+	'''
+
+	def __init__(self, buffer):
+		self.dtype = buffer.dtype
+		self.staging = Buffer(usage=GL.GL_STREAM_READ)
+		with self.staging.bind(GL.GL_COPY_WRITE_BUFFER), buffer.bind(GL.GL_COPY_READ_BUFFER):
+			self.staging[...] = self.dtype
+			GL.glCopyBufferSubData(GL.GL_COPY_READ_BUFFER, GL.GL_COPY_WRITE_BUFFER, 0, 0,
+			                       self.dtype.itemsize)
+		self.fence = Fence()
+		self._result = None
+
+	def done(self):
+		''':returns: Whether the result is available without blocking
+		:rtype: :py:obj:`bool`
+		'''
+		return self._result is not None or self.fence.done()
+
+	def result(self):
+		'''Wait for the copy, and return the buffer contents.
+
+		:rtype: :py:class:`numpy.ndarray`
+		'''
+		if self._result is None:
+			self.fence.wait()
+			with self.staging.bind(GL.GL_COPY_READ_BUFFER):
+				self._result = self.staging.data
+			self.fence.delete()
+			deleteBuffers([self.staging])
+			self.staging = None
+		return self._result
+
+class TransformFeedback:
+	'''A transform feedback object, with buffers to capture varyings into.
+
+	The object records the buffers bound to each transform feedback buffer index, and how many
+	vertices were captured. Captured vertices can be drawn with :py:meth:`draw`, which does not
+	require reading the number of captured vertices back from the GPU.
+
+	:param varyings: The varyings to capture, as passed to the program
+	:type varyings: [:py:class:`.FeedbackVarying`]
+	:param int count: The number of vertices the buffers can hold
+	:param xfb_mode: The transform feedback mode of the program, either
+	  :py:obj:`GL.GL_INTERLEAVED_ATTRIBS` (one buffer containing all varyings) or
+	  :py:obj:`GL.GL_SEPARATE_ATTRIBS` (one buffer per varying)
+	:param usage: The usage of the buffers
+	:param handle: The OpenGL handle to use. One will be created if it is :py:obj:`None`
+	:type handle: :py:obj:`int` or :py:obj:`None`
+	'''
+
+	def __init__(self, varyings, count, xfb_mode=GL.GL_INTERLEAVED_ATTRIBS,
+	             usage=GL.GL_DYNAMIC_COPY, handle=None):
+		self.handle = GL.glGenTransformFeedbacks(1) if handle is None else handle
+		if not self.handle:
+			raise RuntimeError("Failed to generate transform feedback object.")
+		self.count = count
+		self.varyings = list(varyings)
+		self.groups = feedbackGroups(self.varyings, xfb_mode)
+		self.dtype = feedbackDtype(self.varyings)
+		self._previous = []
+
+		self.buffers = []
+		self.items = {}
+		for group in self.groups:
+			buf = Buffer(usage=usage)
+			with buf.bind(GL.GL_ARRAY_BUFFER):
+				buf[...] = dtype((feedbackDtype(group), (count,)))
+			self.buffers.append(buf)
+			self.items.update((v.name, buf.items[v.name]) for v in group)
+
+		with self:
+			current = state.current()
+			for index, buf in enumerate(self.buffers):
+				current.bindBufferRange(GL.GL_TRANSFORM_FEEDBACK_BUFFER, index, buf.handle)
+
+	@classmethod
+	def fromProgram(cls, program, count, **kwargs):
+		'''Create a transform feedback object capturing the varyings of a program.
+
+		:param program: The program
+		:type program: :py:class:`.Program`
+		:param int count: The number of vertices the buffers can hold
+		:rtype: :py:class:`TransformFeedback`
+		'''
+		return cls(program.xfb_varyings, count, program.xfb_mode, **kwargs)
+
+	def __enter__(self):
+		'''Bind the transform feedback object, restoring the previous binding on exit (unless
+		:py:attr:`.State.unbind` is unset).'''
+		self._previous.append(state.current().bindTransformFeedback(self.handle))
+
+	def __exit__(self, ty, val, tr):
+		previous = self._previous.pop()
+		current = state.current()
+		if current.unbind:
+			current.bindTransformFeedback(previous or 0)
+
+	@contextmanager
+	def feedback(self, mode=GL.GL_POINTS):
+		'''Capture the vertices drawn in the context into the buffers of the transform feedback
+		object, replacing the previous contents. The program must be bound.
+
+		:param mode: The primitive mode, one of :py:obj:`GL.GL_POINTS`, :py:obj:`GL.GL_LINES` or
+		  :py:obj:`GL.GL_TRIANGLES`
+		'''
+		with self:
+			GL.glBeginTransformFeedback(mode)
+			try:
+				yield self
+			finally:
+				GL.glEndTransformFeedback()
+
+	def pause(self):
+		'''Pause capturing, e.g. to draw with a different program. Must be called within
+		:py:meth:`feedback`.'''
+		GL.glPauseTransformFeedback()
+
+	def resume(self):
+		'''Resume capturing after :py:meth:`pause`.'''
+		GL.glResumeTransformFeedback()
+
+	def draw(self, mode=GL.GL_POINTS, instances=1, stream=None):
+		'''Draw the vertices captured by the last :py:meth:`feedback`, without reading the number
+		of vertices back. The program and VAO to draw with must be bound.
+
+		:param mode: The primitive mode to draw
+		:param int instances: The number of instances to draw
+		:param stream: The vertex stream to draw the vertices of, if the vertices were captured
+		  from a geometry shader with multiple streams
+		:type stream: :py:obj:`int` or :py:obj:`None`
+		'''
+		if stream is None:
+			if instances == 1:
+				GL.glDrawTransformFeedback(mode, self.handle)
+			else:
+				GL.glDrawTransformFeedbackInstanced(mode, self.handle, instances)
+		else:
+			if instances == 1:
+				GL.glDrawTransformFeedbackStream(mode, self.handle, stream)
+			else:
+				GL.glDrawTransformFeedbackStreamInstanced(mode, self.handle, stream, instances)
+
+	@property
+	def data(self):
+		'''The contents of the buffers, as a record array with a field per varying. Reading it
+		waits for all captures to complete, see :py:meth:`read` for a non-blocking alternative.
+
+		:rtype: :py:class:`numpy.ndarray`
+		'''
+		return self.combine(r.result() for r in self.read())
+
+	@data.setter
+	def data(self, value):
+		for buf, group in zip(self.buffers, self.groups):
+			group_data = numpy.empty(self.count, dtype=feedbackDtype(group))
+			for varying in group:
+				group_data[varying.name] = value[varying.name]
+			with buf.bind(GL.GL_ARRAY_BUFFER):
+				buf.data = group_data
+
+	def read(self):
+		'''Start reading the buffers without waiting for them.
+
+		:returns: A readback of each buffer, which can be combined into a single array with
+		  :py:meth:`combine`
+		:rtype: [:py:class:`Readback`]
+		'''
+		return [Readback(buf) for buf in self.buffers]
+
+	def combine(self, results):
+		'''Combine the contents of each buffer into a single record array.
+
+		:rtype: :py:class:`numpy.ndarray`
+		'''
+		data = numpy.empty(self.count, dtype=self.dtype)
+		for result in results:
+			for name in result.dtype.names:
+				data[name] = result[name]
+		return data
+
+	def delete(self):
+		GL.glDeleteTransformFeedbacks(1, [self.handle])
+		state.current().forget(GL.GL_TRANSFORM_FEEDBACK, self.handle)
+		deleteBuffers(self.buffers)
+		self.buffers = []
+		self.items = {}
+
+class FeedbackSimulation:
+	'''Repeatedly runs a program over a state, using transform feedback to write the next state.
+
+	The state is kept in two :py:class:`TransformFeedback` objects that are swapped after each
+	step: the current state is read as vertex attributes, and the varyings captured by transform
+	feedback become the next state. Rasterization is disabled while stepping, so only the vertex
+	(and geometry) shaders run, and the state never leaves the GPU unless it is read.
+
+	:param program: The program to run. It must capture transform feedback varyings, and each
+	  varying must have a matching vertex attribute.
+	:type program: :py:class:`.Program`
+	:param attributes: The names of the vertex attributes reading the state, in the same order as
+	  the transform feedback varyings of the program.
+	:type attributes: [:py:obj:`str`]
+	:param int count: The number of vertices in the state
+	:param data: The initial state, a record array with a field per transform feedback varying. The
+	  state is not initialized if it is :py:obj:`None`.
+	:type data: :py:class:`numpy.ndarray` or :py:obj:`None`
+
+	.. warning:: |program-bind|
+	'''
+
+	def __init__(self, program, attributes, count, data=None):
+		if not program.xfb_varyings:
+			raise ValueError("The program does not capture any transform feedback varyings.")
+		if len(attributes) != len(program.xfb_varyings):
+			raise ValueError("Expected {} attributes, one per transform feedback varying, got {}."
+			                 .format(len(program.xfb_varyings), len(attributes)))
+		self.program = program
+		self.count = count
+		self.attributes = dict(zip((v.name for v in program.xfb_varyings), attributes))
+
+		self.feedbacks = []
+		self.vaos = []
+		for _ in range(2):
+			feedback = TransformFeedback.fromProgram(program, count)
+			vao = VAO(*(program.vertex_attributes[a] for a in attributes))
+			for varying, attribute in self.attributes.items():
+				vao[attribute].data = feedback.items[varying]
+			self.feedbacks.append(feedback)
+			self.vaos.append(vao)
+		self.current = 0
+
+		if data is not None:
+			self.data = data
+
+	@property
+	def state(self):
+		'''The transform feedback object containing the current state.
+
+		:rtype: :py:class:`TransformFeedback`
+		'''
+		return self.feedbacks[self.current]
+
+	@property
+	def dtype(self):
+		return self.state.dtype
+
+	def swap(self):
+		self.current = 1 - self.current
+
+	def step(self, steps=1):
+		'''Advance the state.
+
+		:param int steps: The number of times to run the program.
+		'''
+		GL.glEnable(GL.GL_RASTERIZER_DISCARD)
+		try:
+			for _ in range(steps):
+				target = self.feedbacks[1 - self.current]
+				with self.vaos[self.current], self.program, target.feedback(GL.GL_POINTS):
+					GL.glDrawArrays(GL.GL_POINTS, 0, self.count)
+				self.swap()
+		finally:
+			GL.glDisable(GL.GL_RASTERIZER_DISCARD)
+
+	@property
+	def data(self):
+		'''The current state. Reading it waits for all steps to complete, see :py:meth:`read` for
+		a non-blocking alternative.
+
+		:rtype: :py:class:`numpy.ndarray`
+		'''
+		return self.state.data
+
+	@data.setter
+	def data(self, value):
+		self.state.data = value
+
+	def read(self):
+		'''Start reading the current state without waiting for it. See
+		:py:meth:`TransformFeedback.read`.
+
+		:rtype: [:py:class:`Readback`]
+		'''
+		return self.state.read()
+
+	def combine(self, results):
+		'''See :py:meth:`TransformFeedback.combine`'''
+		return self.state.combine(results)
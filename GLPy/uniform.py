@@ -0,0 +1,128 @@
+from OpenGL import GL
+import numpy
+
+from .GLSL import Variable, Scalar, Matrix, Sampler, BasicType
+
+from util.misc import product
+
+scalar_suffixes = { Scalar.bool: 'i', Scalar.int: 'i', Scalar.uint: 'ui'
+                  , Scalar.float: 'f', Scalar.double: 'd' }
+upload_types = { Scalar.bool: numpy.dtype('int32'), Scalar.int: numpy.dtype('int32')
+               , Scalar.uint: numpy.dtype('uint32'), Scalar.float: numpy.dtype('float32')
+               , Scalar.double: numpy.dtype('float64') }
+
+def uniformFunctionName(datatype, separate=True):
+	'''The name of the ``glUniform*`` (or ``glProgramUniform*`` if ``separate`` is set) function
+	used to set a uniform of a basic type.
+
+	:rtype: :py:obj:`str`
+	'''
+	prefix = 'glProgramUniform' if separate else 'glUniform'
+	if isinstance(datatype, Sampler):
+		return '{}1iv'.format(prefix)
+	suffix = scalar_suffixes[datatype.scalar_type]
+	if isinstance(datatype, Matrix):
+		columns, rows = datatype.shape
+		shape = str(columns) if columns == rows else '{}x{}'.format(columns, rows)
+		return '{}Matrix{}{}v'.format(prefix, shape, suffix)
+	components = getattr(datatype, 'shape', (1,))[0]
+	return '{}{}{}v'.format(prefix, components, suffix)
+
+class ProgramUniform(Variable):
+	'''A uniform in the default uniform block of a program.
+
+	The location of the uniform is resolved once per program, and the last value uploaded to each
+	location is kept. Setting a value identical to the last uploaded one does not call OpenGL.
+
+	:param program: The program the uniform belongs to
+	:type program: :py:class:`.Program`
+	'''
+
+	def __init__(self, program, name, datatype):
+		super().__init__(name, datatype)
+		self.program = program
+
+	@classmethod
+	def fromVariable(cls, program, var):
+		return cls(program, var.name, var.datatype)
+
+	def __getitem__(self, idx):
+		var = super().__getitem__(idx)
+		return ProgramUniform(self.program, var.name, var.datatype)
+
+	def __iter__(self):
+		yield from (ProgramUniform(self.program, var.name, var.datatype)
+		            for var in super().__iter__())
+
+	@property
+	def location(self):
+		'''The location of the uniform, or ``-1`` if it is not active.
+
+		:rtype: :py:obj:`int`
+		'''
+		locations = self.program.uniform_locations
+		try:
+			return locations[self.name]
+		except KeyError:
+			location = locations[self.name] = GL.glGetUniformLocation(self.program.handle,
+			                                                           self.name)
+			return location
+
+	@property
+	def data(self):
+		'''The value of the uniform, as last set through GLPy.
+
+		Matrices are given as numpy arrays of shape ``(rows, columns)``, arrays of basic types
+		with an additional leading dimension. Arrays of structs and structs must be set one member
+		at a time, by indexing the uniform.
+
+		.. warning:: |program-bind|
+
+		   Setting this property binds the program, unless the context supports
+		   ``glProgramUniform*`` (OpenGL 4.1 or ``ARB_separate_shader_objects``).
+
+		:rtype: :py:class:`numpy.ndarray`
+		'''
+		full_shape = getattr(self.datatype, 'full_shape', ())
+		values = [self.program.uniform_values.get(self.location + i)
+		          for i in range(product(full_shape))]
+		if any(v is None for v in values):
+			return None
+		if not full_shape:
+			return values[0]
+		return numpy.stack(values).reshape(full_shape + values[0].shape)
+
+	@data.setter
+	def data(self, value):
+		base = getattr(self.datatype, 'base', self.datatype)
+		if not isinstance(base, BasicType):
+			raise TypeError("Only basic types or arrays thereof can be set directly.")
+		location = self.location
+		if location < 0:
+			return
+
+		if isinstance(base, Matrix):
+			columns, rows = base.shape
+			element_shape = (rows, columns)
+		else:
+			element_shape = getattr(base, 'shape', ())
+		scalar_type = Scalar.int if isinstance(base, Sampler) else base.scalar_type
+		count = product(getattr(self.datatype, 'full_shape', (1,)))
+		# Copy, so that modifying the passed array does not modify the stored values
+		value = numpy.array(value, dtype=upload_types[scalar_type]).reshape((count,) + element_shape)
+
+		values = self.program.uniform_values
+		if all(numpy.array_equal(values.get(location + i), v) for i, v in enumerate(value)):
+			return
+
+		separate = bool(GL.glProgramUniform1fv)
+		setter = getattr(GL, uniformFunctionName(base, separate))
+		args = (count, GL.GL_TRUE, value) if isinstance(base, Matrix) else (count, value)
+		if separate:
+			setter(self.program.handle, location, *args)
+		else:
+			with self.program:
+				setter(location, *args)
+
+		for i, v in enumerate(value):
+			values[location + i] = v
@@ -2,10 +2,40 @@ from OpenGL import GL
 from numpy import dtype
 
 from .GLSL import ( UniformBlock, UniformBlockMember, BlockLayout,
-                    Scalar, Vector, Matrix, BasicType, Struct, Array )
+                    Scalar, Vector, Matrix, BasicType, Struct, Array, Variable )
 
+from collections import namedtuple
+from itertools import chain
 import ctypes as c
 
+ResourceProperties = namedtuple('ResourceProperties',
+                                ['index', 'offset', 'array_stride', 'matrix_stride'])
+'''The properties of an active uniform block member, as queried from the program.'''
+
+def sampledIndices(length):
+	'''The elements of an array that determine its layout: the first two (for the stride) and
+	the last (to check the stride holds for the whole array).
+
+	:rtype: [:py:obj:`int`]
+	'''
+	return sorted({0, min(1, length - 1), length - 1})
+
+def sampledResources(variable):
+	'''The resources of the elements of a variable that determine its layout. Unlike
+	:py:attr:`.Variable.resources`, arrays of structs (or of arrays) only include the resources of
+	the elements given by :py:func:`sampledIndices`, so the number of resources does not depend on
+	the length of arrays.
+
+	:rtype: [:py:class:`.Variable`]
+	'''
+	datatype = variable.datatype
+	if isinstance(datatype, Array) and not isinstance(datatype.element, BasicType):
+		elements = (Variable.__getitem__(variable, i) for i in sampledIndices(len(datatype)))
+		return list(chain.from_iterable(sampledResources(e) for e in elements))
+	if isinstance(datatype, Struct):
+		return list(chain.from_iterable(sampledResources(m) for m in Variable.__iter__(variable)))
+	return Variable.resources.fget(variable)
+
 class ProgramUniformBlockMember(UniformBlockMember):
 	def __init__(self, block, name, datatype, matrix_layout=None):
 		super().__init__(block, name, datatype, matrix_layout)
@@ -23,15 +53,27 @@ class ProgramUniformBlockMember(UniformBlockMember):
 	@property
 	def active(self):
 		if isinstance(getattr(self.datatype, 'base', self.datatype), Struct):
-			return any(m.active is not None for m in self)
+			if isinstance(self.datatype, Array):
+				# Usually decided by the sampled elements, without expanding the array
+				if any(self[i].active for i in sampledIndices(len(self))):
+					return True
+			return any(m.active for m in self)
 		return self.index is not None
 
 	@property
 	def program(self):
 		return self.block.program
-	
-	# Query index of one member at a time, this is the approach in GL.glGetProgramResourceIndex
-	# which superseeds GL.glGetUniform* interface
+
+	@property
+	def properties(self):
+		'''The queried properties of the block member, or :py:obj:`None` if it is not a resource
+		(i.e. a :py:class:`.Struct` type), or if it is not active. See
+		:py:attr:`ProgramUniformBlock.resources`.
+
+		:rtype: :py:class:`ResourceProperties` or :py:obj:`None`
+		'''
+		return self.block.resource(self.api_name)
+
 	@property
 	def index(self):
 		'''The uniform index of the block member. Will return :py:obj:`None` if it is not a resource
@@ -41,13 +83,8 @@ class ProgramUniformBlockMember(UniformBlockMember):
 		'''
 		if isinstance(getattr(self.datatype, 'base', self.datatype), Struct):
 			return None
-
-		names = c.pointer(c.c_char_p(self.api_name.encode()))
-		names = c.cast(names, c.POINTER(c.POINTER(c.c_char)))
-
-		out = GL.GLuint()
-		GL.glGetUniformIndices(self.program.handle, 1, names, c.byref(out))
-		return out.value if out.value != GL.GLuint(GL.GL_INVALID_INDEX).value else None
+		properties = self.properties
+		return None if properties is None else properties.index
 
 	@property
 	def offset(self):
@@ -62,28 +99,23 @@ class ProgramUniformBlockMember(UniformBlockMember):
 			return min(m.offset for m in self)
 		elif isinstance(self.datatype, Array):
 			return self[0].offset
-
-		offset = GL.GLint()
-		GL.glGetActiveUniformsiv(self.program.handle, 1, self.index,
-		                         GL.GL_UNIFORM_OFFSET, c.byref(offset))
-		return offset.value
+		return self.properties.offset
 	
 	@property
 	def matrix_stride(self):
 		if not self.layout.standardized:
-			stride = GL.GLint()
-			stride = GL.glGetActiveUniformsiv(self.program.handle, 1, self.index,
-											GL.GL_UNIFORM_MATRIX_STRIDE, c.byref(matrix_stride))
-			return stride.value
+			return self.properties.matrix_stride
 		return super().matrix_stride
 
 	@property
 	def array_stride(self):
 		if not self.layout.standardized:
-			stride = GL.GLint()
-			stride = GL.glGetActiveUniformsiv(self.program.handle, 1, self.index,
-			                                  GL.GL_UNIFORM_ARRAY_STRIDE, c.byref(matrix_stride))
-			return stride.value
+			if isinstance(self.datatype.element, BasicType):
+				return self.properties.array_stride
+			# Only arrays of basic types have a queryable stride
+			if len(self) > 1 and self[1].active:
+				return self[1].offset - self[0].offset
+			return self[0].dtype.itemsize
 		return super().array_stride
 
 	@property
@@ -94,29 +126,79 @@ class ProgramUniformBlockMember(UniformBlockMember):
 
 		:rtype: :py:class:`numpy.dtype`
 		'''
+		if self.layout.standardized:
+			return super().dtype
+		if isinstance(self.datatype, Array) and not isinstance(self.datatype.element, BasicType):
+			array_dtype = self.strideDtype()
+			if array_dtype is not None:
+				return array_dtype
 		if isinstance(getattr(self.datatype, 'base', self.datatype), Struct):
 			# Have to process each member separately, as members can be removed in optimization pass
 			# TODO: Is layout of array elements guaranteed to be identical for shared uniforms?
 			names, formats, offsets = zip(*((m.name, m.dtype, m.offset) for m in self))
+			if isinstance(self.datatype, Struct):
+				# Struct fields are named by member, as in standardized layouts
+				names = (n[len(self.name) + 1:] for n in names)
 			offsets = (o - self.offset for o in offsets)
 			return dtype({'names': list(names), 'formats': list(formats), 'offsets': list(offsets)})
 		else:
 			return super().dtype
 
+	def strideDtype(self):
+		'''The datatype of an array of structs (or of arrays) from the layout of its first
+		element and the array stride, without expanding the other elements. The stride is checked
+		against the offset of the last element.
+
+		:returns: The datatype, or :py:obj:`None` if the sampled elements are not active, or their
+		  offsets are not consistent with a single stride.
+		:rtype: :py:class:`numpy.dtype` or :py:obj:`None`
+		'''
+		length = len(self)
+		first, last = self[0], self[length - 1]
+		if not (first.active and last.active):
+			return None
+		stride = self.array_stride
+		if last.offset != first.offset + (length - 1) * stride:
+			return None
+		element = first.dtype
+		if element.names is not None:
+			element = dtype({'names': list(element.names),
+			                 'formats': [element.fields[n][0] for n in element.names],
+			                 'offsets': [element.fields[n][1] for n in element.names],
+			                 'itemsize': stride})
+		return dtype((element, (length,)))
+
 class ProgramUniformBlock(UniformBlock):
+	'''A uniform block of a linked program.
+
+	:param program: The program this block belongs to
+	:type program: :py:class:`.Program`
+	:param reflected_dtype: The memory layout of the block, if it is already known (e.g. from
+	  :py:class:`.ProgramReflection`). Otherwise, it is queried from the program when required.
+	:type reflected_dtype: :py:class:`numpy.dtype` or :py:obj:`None`
+
+	Queried properties and the memory layout are cached until the program is relinked (see
+	:py:meth:`.Program.relink`).
+	'''
+
 	member_type = ProgramUniformBlockMember
 
 	def __init__(self, program, name, *members, instance_name='', layout='shared',
-	             matrix_layout='row_major', binding=None):
+	             matrix_layout='column_major', binding=None, reflected_dtype=None):
 		self.program = program
 		self.dynamic_binding = None
+		self.reflected_dtype = reflected_dtype
+		self._cache = {}
+		self._cache_generation = None
 		super().__init__(name, *members, instance_name=instance_name, layout=layout,
 		                 matrix_layout=matrix_layout, binding=binding)
 
 	@classmethod
-	def fromUniformBlock(cls, program, block):
+	def fromUniformBlock(cls, program, block, reflected_dtype=None):
 		return cls(program, block.name, *block.members.values(), instance_name=block.instance_name,
-		           layout=block.layout, binding=block.shader_binding)
+		           layout=block.layout, matrix_layout=block.matrix_layout,
+		           binding=block.shader_binding,
+		           reflected_dtype=reflected_dtype)
 	
 	def __getitem__(self, idx):
 		member =  self.members[idx]
@@ -134,20 +216,118 @@ class ProgramUniformBlock(UniformBlock):
 	def __eq__(self, other):
 		return super.__eq__(other) and self.program == other.program and self.binding == other.binding
 
+	def cached(self, key, compute):
+		'''Return a cached value, computing it if the program was relinked since it was cached.'''
+		if self._cache_generation != self.program.link_generation:
+			self._cache = {}
+			self._cache_generation = self.program.link_generation
+		try:
+			return self._cache[key]
+		except KeyError:
+			value = self._cache[key] = compute()
+			return value
+
 	@property
 	def dtype(self):
+		if self.reflected_dtype is not None:
+			return self.reflected_dtype
 		if self.layout.standardized:
 			return super().dtype
-		else:
-			names, formats, offsets = zip(*((m.name, m.dtype, m.offset) for m in self))
-			nbytes = GL.glGetActiveUniformBlockiv(self.program.handle, self.index,
-		                                          GL.GL_UNIFORM_BLOCK_DATA_SIZE)
-			return dtype({'names': list(names), 'formats': list(formats), 'offsets': list(offsets),
-			              'itemsize': nbytes})
+		return self.cached('dtype', self.queryDtype)
+
+	def queryDtype(self):
+		names, formats, offsets = zip(*((m.name, m.dtype, m.offset) for m in self))
+		nbytes = GL.GLint()
+		GL.glGetActiveUniformBlockiv(self.program.handle, self.index,
+		                             GL.GL_UNIFORM_BLOCK_DATA_SIZE, c.byref(nbytes))
+		return dtype({'names': list(names), 'formats': list(formats), 'offsets': list(offsets),
+		              'itemsize': nbytes.value})
 
 	@property
 	def index(self):
-		return GL.glGetUniformBlockIndex(self.program.handle, self.name)
+		return self.cached('index', lambda: GL.glGetUniformBlockIndex(self.program.handle,
+		                                                              self.name))
+
+	@property
+	def resources(self):
+		'''The properties of the active resources that determine the layout of the block, by API
+		name (see :py:func:`sampledResources`). Arrays of basic types are also included under their
+		name without the ``[0]`` suffix.
+
+		All resources are queried at once: one call to resolve the uniform indices, and one call
+		per property.
+
+		:rtype: {:py:obj:`str`: :py:class:`ResourceProperties`}
+		'''
+		return self.cached('resources', lambda: self.queryResources(self.sampled_names))
+
+	@property
+	def sampled_names(self):
+		'''The API names of the resources in :py:attr:`resources`, active or not.
+
+		:rtype: [:py:obj:`str`]
+		'''
+		return self.cached('sampled_names', lambda: self.resourceNames(sampledResources))
+
+	@property
+	def all_resources(self):
+		'''The properties of every active resource in the block, including all elements of arrays
+		of structs. See :py:attr:`resources`.
+
+		:rtype: {:py:obj:`str`: :py:class:`ResourceProperties`}
+		'''
+		return self.cached('all_resources',
+		                   lambda: self.queryResources(self.resourceNames(lambda m: m.resources)))
+
+	def resource(self, name):
+		'''The properties of a resource, querying all resources only if it is not one of the
+		sampled resources.
+
+		:param str name: The API name of the resource
+		:returns: The properties, or :py:obj:`None` if the resource is not active
+		:rtype: :py:class:`ResourceProperties` or :py:obj:`None`
+		'''
+		resources = self.resources
+		if name in resources:
+			return resources[name]
+		sampled = self.cached('sampled_set', lambda: set(chain(
+			self.sampled_names, (n[:-len('[0]')] for n in self.sampled_names if n.endswith('[0]')))))
+		if name in sampled:
+			return None
+		return self.all_resources.get(name)
+
+	def resourceNames(self, resources):
+		prefix = '{}.'.format(self.name) if self.instance_name else ''
+		return [''.join((prefix, r.name)) for m in self.members.values() for r in resources(m)]
+
+	def queryResources(self, names):
+		if not names:
+			return {}
+
+		c_names = (c.c_char_p * len(names))(*(n.encode() for n in names))
+		c_names = c.cast(c_names, c.POINTER(c.POINTER(c.c_char)))
+		indices = (GL.GLuint * len(names))()
+		GL.glGetUniformIndices(self.program.handle, len(names), c_names, indices)
+
+		invalid = GL.GLuint(GL.GL_INVALID_INDEX).value
+		active = [(name, index) for name, index in zip(names, indices) if index != invalid]
+		if not active:
+			return {}
+		active_indices = (GL.GLuint * len(active))(*(index for _, index in active))
+		properties = []
+		for pname in (GL.GL_UNIFORM_OFFSET, GL.GL_UNIFORM_ARRAY_STRIDE,
+		              GL.GL_UNIFORM_MATRIX_STRIDE):
+			values = (GL.GLint * len(active))()
+			GL.glGetActiveUniformsiv(self.program.handle, len(active), active_indices, pname,
+			                         values)
+			properties.append(values)
+
+		resources = {}
+		for (name, index), *values in zip(active, *properties):
+			resources[name] = ResourceProperties(index, *values)
+			if name.endswith('[0]'):
+				resources.setdefault(name[:-len('[0]')], resources[name])
+		return resources
 
 	@property
 	def binding(self):
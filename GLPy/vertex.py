@@ -2,6 +2,7 @@ from OpenGL import GL
 
 from .GLSL import Scalar, BasicType, VertexAttribute
 from .buffers import numpy_buffer_types, buffer_numpy_types
+from . import state
 
 from util.misc import product
 
@@ -54,6 +55,7 @@ class VAO:
 
 	def __init__(self, *attributes, handle=None):
 		self.handle = GL.glGenVertexArrays(1) if handle is None else handle
+		self._previous = []
 		self.attributes = {a.name: VAOAttribute.fromVertexAttribute(self, a) for a in attributes}
 		self._element_buffer = None
 
@@ -87,28 +89,32 @@ class VAO:
 		if value.dtype.base not in element_buffer_dtypes:
 			raise ValueError("Invalid dtype for an element buffer")
 		with self:
-			GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, value.handle)
-		GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 0)
+			state.current().bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, value.handle)
 		self._element_buffer = value
 
 	def __getitem__(self, i):
 		return self.attributes[i]
 
 	def __enter__(self):
-		'''VAO objects provide a context manager. This keeps track of how many times the VAO has
-		been bound and unbound. Grouping operations on a VAO within a context where it is bound
-		prevents repeated binding and un-binding.
+		'''VAO objects provide a context manager that binds them, and restores the previously bound
+		VAO on exit (unless :py:attr:`.State.unbind` is unset). Binding a VAO that is already
+		bound does not call OpenGL, so grouping operations on a VAO within a context where it is
+		bound prevents repeated binding and un-binding.
 
 		.. _vao-bind-warning:
 		.. warning::
 
-		   It is not allowed to bind two VAOs (or the same VAO twice) simultaneously.
+		   Contexts binding VAOs must be nested, and the bound VAO must not be changed outside of
+		   GLPy (see :py:meth:`.State.invalidate`).
 		'''
 
-		GL.glBindVertexArray(self.handle)
+		self._previous.append(state.current().bindVertexArray(self.handle))
 
 	def __exit__(self, ex, val, tr):
-		GL.glBindVertexArray(0)
+		previous = self._previous.pop()
+		current = state.current()
+		if current.unbind:
+			current.bindVertexArray(previous or 0)
 
 # So they take the same number of paremeters as GL.glVertexAttribPointer
 def glVertexAttribIPointer(idx, components, type, normalized, stride, offset):
@@ -212,7 +218,8 @@ class VAOAttribute:
 
 		   Setting to this attribute binds the VAO containing it.
 
-		:param value: The data for the attribute.
+		:param value: The data for the attribute. If it is from a :py:class:`.MultiBuffer`, the
+		  attribute follows the current copy of the buffer.
 		:type value: :py:class:`.BufferItem`
 		'''
 		return self._data
@@ -223,12 +230,21 @@ class VAOAttribute:
 			# Never allow, GL_ARB_vertex_attrib_64bit suggests default values are for compatability
 			raise ValueError("Specified only {} components for a vertex attribute expecting {}."
 			                 .format(value.components, self.components))
+		observer = (self.vao, self.location)
+		if self._data is not None and hasattr(self._data.buffer, 'unobserve'):
+			self._data.buffer.unobserve(observer)
+		self.point(value)
+		if hasattr(value.buffer, 'observe'):
+			value.buffer.observe(observer, lambda: self.point(value))
+		self._data = value
+
+	def point(self, value):
+		'''Point the attribute at the buffer providing its data.'''
 		with self.vao, value.buffer.bind(GL.GL_ARRAY_BUFFER):
 			setter = self.gl_pointer_functions[self.datatype.scalar_type]
 			for location in self.locations:
 				setter(location, self.components, numpy_buffer_types[value.dtype.base],
 					   self.normalized, value.buffer.stride, GL.GLvoidp(value.offset))
-		self._data = value
 
 	@property
 	def divisor(self):
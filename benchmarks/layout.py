@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+'''Benchmark the memory layout calculation of interface blocks containing deeply nested arrays of
+structs.
+
+Run with ``python3 -m benchmarks.layout [depth]``.
+'''
+
+from GLPy.GLSL import Variable, Array, Struct
+from GLPy.GLSL.interface_block import InterfaceBlock, containsOpaque
+from GLPy.GLSL.layout import cachedTypeLayout
+
+import sys
+import timeit
+
+def nestedStruct(depth, width=3, length=4):
+	'''A struct nested ``depth`` levels deep, where each level contains ``width`` arrays of
+	``length`` structs of the level below.'''
+	struct = Struct('Leaf', Variable('position', 'vec3'), Variable('weight', 'float'),
+	                Variable('transform', 'mat3'))
+	for level in range(depth):
+		members = [Variable('child{}'.format(i), Array(struct, length)) for i in range(width)]
+		members.append(Variable('scale', 'vec2'))
+		struct = Struct('Level{}'.format(level), *members)
+	return struct
+
+def blockDtype(struct, layout):
+	block = InterfaceBlock('Block', Variable('root', struct), Variable('count', 'uint'),
+	                       layout=layout)
+	return block.dtype
+
+def main(depth=4, number=100):
+	for layout in ('std140', 'std430'):
+		struct = nestedStruct(depth)
+		cachedTypeLayout.cache_clear()
+		containsOpaque.cache_clear()
+		cold = timeit.timeit(lambda: blockDtype(struct, layout), number=1)
+		warm = timeit.timeit(lambda: blockDtype(struct, layout), number=number) / number
+		print("{} depth {}: first layout {:.3f} ms, cached {:.3f} ms ({:.0f}x faster), "
+		      "block size {} bytes".format(layout, depth, cold * 1e3, warm * 1e3, cold / warm,
+		                                   blockDtype(struct, layout).itemsize))
+		if warm >= cold:
+			raise RuntimeError("Cached layouts are not faster than the first layout.")
+
+if __name__ == '__main__':
+	main(*(int(a) for a in sys.argv[1:]))
@@ -1,4 +1,4 @@
-import unittest
+import unittest, pickle
 from GLPy.GLSL import Scalar, Vector, Matrix, Variable, Struct, Array, Sampler
 from numpy import dtype
 
@@ -39,6 +39,14 @@ class TestStruct(unittest.TestCase):
 		self.assertEqual(s['first'], Variable('first', 'vec3'))
 		self.assertEqual(s['second'], Variable('second', Array('float', (4, 5))))
 
+	def test_pickle_hash(self):
+		s = Struct('TheStruct', Variable('first', 'vec3'), Variable('second', 'int'))
+		hash(s)
+		unpickled = pickle.loads(pickle.dumps(s))
+		self.assertNotIn('_hash', vars(unpickled))
+		self.assertEqual(unpickled, s)
+		self.assertIn(unpickled, {s})
+
 class TestVector(unittest.TestCase):
 	def test_machine_type(self):
 		self.assertEqual(Vector('vec3').machine_type, dtype(('float32', 3)))
@@ -4,6 +4,7 @@ from numpy import dtype
 from itertools import product as cartesian
 
 from GLPy.GLSL.interface_block import *
+from GLPy.GLSL.interface_block import containsOpaque
 
 class TestInterfaceBlock(unittest.TestCase):
 	def test_naming(self):
@@ -43,6 +44,16 @@ class TestInterfaceBlockMember(unittest.TestCase):
 		with self.assertRaises(TypeError):
 			InterfaceBlockMember(block, 'foo', struct)
 
+	def test_opaque_cached(self):
+		containsOpaque.cache_clear()
+		inner = Struct('Inner', Variable('v', 'vec2'), Variable('fs', Array('float', 4)))
+		outer = Struct('Outer', Variable('inners', Array(inner, 3)), Variable('i', inner))
+		block = InterfaceBlock('Foo')
+		for _ in range(3):
+			InterfaceBlockMember(block, 'o', outer)
+		# Outer, Inner, the two arrays and vec2 are each checked once
+		self.assertEqual(containsOpaque.cache_info().misses, 5)
+
 	def test_vector_alignment(self):
 		block = InterfaceBlock('Foo', layout=BlockLayout.std140)
 		i = InterfaceBlockMember(block, 'foo', 'float')
@@ -131,13 +142,13 @@ class TestInterfaceBlockMember(unittest.TestCase):
 		block = InterfaceBlock('Foo', layout=BlockLayout.std140)
 		struct = Struct('Bar', Variable('v3', 'vec3'), Variable('f', 'float'))
 		i = InterfaceBlockMember(block, 'foo', struct)
-		expected = dtype({'names': ['foo.v3', 'foo.f'], 'offsets': [0, 12],
+		expected = dtype({'names': ['v3', 'f'], 'offsets': [0, 12],
 		                  'formats': [dtype(('float32', 3)), dtype('float32')],
 		                  'itemsize': 16})
 		self.assertEqual(i.dtype, expected)
 		struct = Struct('Bar', Variable('f', 'float'), Variable('v3', 'vec3'))
 		i = InterfaceBlockMember(block, 'foo', struct)
-		expected = dtype({'names': ['foo.f', 'foo.v3'], 'offsets': [0, 16],
+		expected = dtype({'names': ['f', 'v3'], 'offsets': [0, 16],
 		                  'formats': [dtype('float32'), dtype(('float32', 3))],
 		                  'itemsize': 32})
 		self.assertEqual(i.dtype, expected)
@@ -146,7 +157,7 @@ class TestInterfaceBlockMember(unittest.TestCase):
 		block = InterfaceBlock('Foo', layout=BlockLayout.std140)
 		struct = Struct('Bar', Variable('f', 'float'), Variable('v3', 'vec3'))
 		i = InterfaceBlockMember(block, 'foo', Array(struct, 4))
-		struct_dtype = dtype({'names': ['foo[0].f', 'foo[0].v3'], 'offsets': [0, 16],
+		struct_dtype = dtype({'names': ['f', 'v3'], 'offsets': [0, 16],
 		                      'formats': [dtype('float32'), dtype(('float32', 3))],
 		                      'itemsize': 32})
 		expected = dtype((struct_dtype, 4))
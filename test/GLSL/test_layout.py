@@ -0,0 +1,90 @@
+import unittest
+from numpy import dtype
+import numpy
+from numpy.testing import assert_array_equal
+
+from GLPy.GLSL import Variable, Array, Struct
+from GLPy.GLSL.layout import typeLayout, cachedTypeLayout, packMatrices, unpackMatrices
+from GLPy.GLSL.interface_block import InterfaceBlock
+
+class TypeLayoutTest(unittest.TestCase):
+	def setUp(self):
+		cachedTypeLayout.cache_clear()
+
+	def test_cached(self):
+		first = Struct('Light', Variable('color', 'vec3'), Variable('intensity', 'float'))
+		second = Struct('Light', Variable('color', 'vec3'), Variable('intensity', 'float'))
+		self.assertEqual(first, second)
+		self.assertNotEqual(first, Struct('Other', Variable('color', 'vec3')))
+		self.assertIs(typeLayout(Array(first, 4), 'std140', 'column_major'),
+		              typeLayout(Array(second, 4), 'std140', 'column_major'))
+		# The array, the struct and its two members
+		self.assertEqual(cachedTypeLayout.cache_info().misses, 4)
+
+	def test_nested(self):
+		inner = Struct('Inner', Variable('v', 'vec2'), Variable('f', 'float'))
+		outer = Struct('Outer', Variable('inners', Array(inner, 3)), Variable('m', 'mat2'))
+		std140 = typeLayout(outer, 'std140', 'column_major')
+		self.assertEqual(std140.dtype.fields['m'][1], 48)
+		self.assertEqual(std140.dtype.itemsize, 80)
+		self.assertEqual(std140.dtype['inners'].shape, (3,))
+		self.assertEqual(std140.dtype['inners'].base.names, ('v', 'f'))
+		std430 = typeLayout(outer, 'std430', 'column_major')
+		self.assertEqual(std430.dtype.fields['m'][1], 48)
+		self.assertEqual(std430.dtype.itemsize, 64)
+		self.assertEqual(typeLayout(Array(inner, 3), 'std430', 'column_major').array_stride, 16)
+
+	def test_single_element_array(self):
+		layout = typeLayout(Array('float', 1), 'std430', 'column_major')
+		self.assertEqual(layout.dtype.shape, (1,))
+		self.assertEqual(layout.element_dtype, dtype({'names': ['float'], 'formats': ['float32']}))
+
+	def test_row_major(self):
+		column = typeLayout(Array('mat2x3', 2), 'std430', 'column_major')
+		row = typeLayout(Array('mat2x3', 2), 'std430', 'row_major')
+		self.assertEqual(column.element_dtype.itemsize, 32)
+		self.assertEqual(row.element_dtype.itemsize, 24)
+
+	def test_errors(self):
+		with self.assertRaises(TypeError):
+			typeLayout(Array('float', 2), 'shared', 'column_major')
+		with self.assertRaises(TypeError):
+			typeLayout(Struct('S', Variable('s', 'sampler2D')), 'std140', 'column_major')
+
+	def test_block_members(self):
+		light = Struct('Light', Variable('color', 'vec3'), Variable('intensity', 'float'))
+		block = InterfaceBlock('Lights', Variable('lights', Array(light, 100)), layout='std430')
+		self.assertIs(block['lights'].type_layout, typeLayout(Array(light, 100), 'std430',
+		                                                      'column_major'))
+		self.assertEqual(block.dtype.itemsize, 1600)
+
+class MatrixPackingTest(unittest.TestCase):
+	def setUp(self):
+		self.matrices = numpy.arange(4 * 2 * 3, dtype='float64').reshape(4, 2, 3)
+
+	def test_column_major(self):
+		records = packMatrices(self.matrices, 'mat3x2')
+		self.assertEqual(records.shape, (4, 3))
+		self.assertEqual(records.dtype.itemsize, 16)
+		columns = records['mat3x2-column']
+		self.assertEqual(columns.dtype, dtype('float32'))
+		for column in range(3):
+			assert_array_equal(columns[:, column, :2], self.matrices[:, :, column])
+		assert_array_equal(unpackMatrices(records), self.matrices)
+
+	def test_row_major(self):
+		records = packMatrices(self.matrices, layout='std430', matrix_layout='row_major')
+		self.assertEqual(records.shape, (4, 2))
+		assert_array_equal(records['mat3x2-row'][..., :3], self.matrices)
+		assert_array_equal(unpackMatrices(records), self.matrices)
+
+	def test_out(self):
+		block = InterfaceBlock('Block', Variable('f', 'float'),
+		                       Variable('transforms', Array('dmat3x2', 4)), layout='std140')
+		data = numpy.zeros((), block.dtype)
+		packMatrices(self.matrices, out=data['transforms']['dmat3x2'])
+		unpacked = unpackMatrices(data['transforms']['dmat3x2'])
+		self.assertTrue(numpy.shares_memory(unpacked, data))
+		assert_array_equal(unpacked, self.matrices)
+		with self.assertRaises(TypeError):
+			unpackMatrices(data['f'])
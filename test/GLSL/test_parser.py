@@ -0,0 +1,117 @@
+import os
+import pickle
+import unittest
+
+from numpy import dtype
+
+from GLPy.GLSL import Variable, Array, Struct, UniformBlock, VertexAttribute, BasicType
+from GLPy.GLSL import BlockLayout, MatrixLayout
+from GLPy.GLSL.parser import parse, tokenize, programArguments
+
+def readShader(name):
+	with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), name)) as f:
+		return f.read()
+
+class TokenizeTest(unittest.TestCase):
+	def test_tokenize(self):
+		source = '#version 330\n// comment\nuniform /* inline */ vec3 v[2];\n#define A \\\n  1\n'
+		self.assertEqual(tokenize(source), ['uniform', 'vec3', 'v', '[', '2', ']', ';'])
+
+class ParserTest(unittest.TestCase):
+	def test_uniforms(self):
+		interface = parse(readShader('uniforms.vert'))
+		light = interface.structs['Light']
+		self.assertEqual([m.name for m in light], ['color', 'intensity'])
+		self.assertEqual([str(u) for u in interface.uniforms],
+		                 ['float scale', 'vec3[3] offsets', 'mat2x3 transform', 'Light[2] lights'])
+		self.assertIs(interface.uniforms[3].datatype.base, light)
+
+	def test_uniform_blocks(self):
+		interface = parse(readShader('uniform_block.vert'))
+		blocks = {b.name: b for b in interface.uniform_blocks}
+		self.assertEqual(set(blocks), {'AnonymousUB', 'InstancedUB', 'OptimizedUB'})
+
+		anonymous = blocks['AnonymousUB']
+		self.assertEqual(anonymous.layout, BlockLayout.std140)
+		self.assertEqual(anonymous.shader_binding, 2)
+		self.assertEqual(anonymous.instance_name, '')
+		mat4_dtype = dtype((dtype([('mat4-column', 'float32', 4)]), 4))
+		self.assertEqual(anonymous.dtype, dtype([('m4', mat4_dtype), ('b', 'uint32')]))
+
+		optimized = blocks['OptimizedUB']
+		self.assertEqual(optimized.layout, BlockLayout.packed)
+		self.assertEqual(optimized.instance_name, 'uboptimized')
+		self.assertEqual(optimized['foo'].datatype.full_shape, (2,))
+
+	def test_layouts(self):
+		interface = parse('''
+			layout(row_major) uniform;
+			const int N = 0x4;
+			layout(std140) uniform Block {
+				layout(column_major) mat3 a;
+				mat3 b[N];
+			};
+			layout(location = 3) in mat4 transform;
+			in vec2 uv;
+			out vec4 color;
+			precision highp float;
+			float helper(in float x){ return x * 2; }
+			void main(){ color = vec4(uv, 0, 1); }
+		''')
+		block, = interface.uniform_blocks
+		self.assertEqual(block.matrix_layout, MatrixLayout.row_major)
+		self.assertEqual(block['a'].matrix_layout, MatrixLayout.column_major)
+		self.assertEqual(block['b'].datatype, Array('mat3', 4))
+		self.assertEqual(interface.inputs, [VertexAttribute('transform', 'mat4', 3),
+		                                    VertexAttribute('uv', 'vec2')])
+		self.assertEqual(interface.outputs, [Variable('color', 'vec4')])
+		self.assertEqual(interface.constants, {'N': 4})
+
+	def test_shader_storage_blocks(self):
+		interface = parse('''
+			layout(std430) buffer;
+			struct Particle { vec3 position; float mass; };
+			layout(binding = 1) buffer Particles {
+				uint count;
+				Particle particles[];
+			} state;
+			buffer Grid { float cells[][4]; };
+		''')
+		particles, grid = interface.shader_storage_blocks
+		self.assertEqual(particles.shader_binding, 1)
+		self.assertEqual(particles.instance_name, 'state')
+		self.assertEqual([m.name for m in particles], ['count'])
+		self.assertEqual(particles.unsized, Variable('particles', interface.structs['Particle']))
+		self.assertEqual(particles.sizedDtype(2).itemsize, 48)
+		self.assertEqual(grid.unsized.datatype, Array('float', 4))
+		self.assertEqual(grid.length(64), 4)
+		self.assertEqual(interface.uniform_blocks, [])
+
+		with self.assertRaises(ValueError):
+			parse('buffer B { float a[]; float b; };')
+		with self.assertRaises(ValueError):
+			parse('buffer B { float a[4][]; };')
+
+	def test_errors(self):
+		with self.assertRaises(ValueError):
+			parse('uniform Unknown u;')
+		with self.assertRaises(ValueError):
+			parse('uniform float u[];')
+		with self.assertRaises(ValueError):
+			parse('uniform float u[')
+
+	def test_pickle(self):
+		interface = parse(readShader('uniform_block.vert'))
+		unpickled = pickle.loads(pickle.dumps(interface))
+		for block, unpickled_block in zip(interface.uniform_blocks, unpickled.uniform_blocks):
+			self.assertEqual(block.name, unpickled_block.name)
+			self.assertEqual(block.layout, unpickled_block.layout)
+		self.assertEqual(interface.uniform_blocks[0].dtype, unpickled.uniform_blocks[0].dtype)
+
+	def test_program_arguments(self):
+		vertex = parse('uniform float a; uniform B { float b; }; in vec3 position;')
+		fragment = parse('uniform float a; uniform float c; uniform B { float b; }; in vec3 color;')
+		arguments = programArguments(vertex, fragment)
+		self.assertEqual([u.name for u in arguments['uniforms']], ['a', 'c'])
+		self.assertEqual([b.name for b in arguments['uniform_blocks']], ['B'])
+		self.assertEqual(arguments['vertex_attributes'], [VertexAttribute('position', 'vec3')])
@@ -0,0 +1,65 @@
+import unittest
+from numpy import dtype
+
+from GLPy.GLSL import ShaderStorageBlock, Variable, Array, Struct
+
+class ShaderStorageBlockTest(unittest.TestCase):
+	def setUp(self):
+		light = Struct('Light', Variable('color', 'vec3'), Variable('intensity', 'float'))
+		self.members = [ Variable('scale', Array('float', 4)), Variable('lights', Array(light, 2))
+		               , Variable('m2', 'mat2'), Variable('uvs', Array('vec2', 3)) ]
+
+	def test_std430(self):
+		block = ShaderStorageBlock('Block', *self.members, layout='std430')
+		self.assertEqual(block['scale'].array_stride, 4)
+		self.assertEqual(block['m2'].matrix_stride, 8)
+		self.assertEqual(block['uvs'].array_stride, 8)
+		self.assertEqual([block.dtype.fields[n][1] for n in block.dtype.names], [0, 16, 48, 64])
+		self.assertEqual(block.dtype.itemsize, 88)
+
+	def test_std140(self):
+		block = ShaderStorageBlock('Block', *self.members, layout='std140')
+		self.assertEqual(block['scale'].array_stride, 16)
+		self.assertEqual(block['m2'].matrix_stride, 16)
+		self.assertEqual([block.dtype.fields[n][1] for n in block.dtype.names], [0, 64, 96, 128])
+		self.assertEqual(block.dtype.itemsize, 176)
+
+	def test_struct_padding(self):
+		small = Struct('Small', Variable('a', 'float'), Variable('b', 'vec2'))
+		members = [Variable('s', small), Variable('f', 'float')]
+		std430 = ShaderStorageBlock('Block', *members, layout='std430')
+		std140 = ShaderStorageBlock('Block', *members, layout='std140')
+		self.assertEqual(std430.dtype.fields['f'][1], 16)
+		self.assertEqual(std140.dtype.fields['f'][1], 16)
+		self.assertEqual(std430['s'].alignment, 8)
+		self.assertEqual(std140['s'].alignment, 16)
+
+	def test_unsized(self):
+		block = ShaderStorageBlock('Particles', Variable('count', 'uint'),
+		                           unsized=Variable('positions', 'vec3'), layout='std430')
+		self.assertEqual(block.array_offset, 16)
+		self.assertEqual(block['positions'].array_stride, 16)
+		self.assertEqual(block.dtype.itemsize, 16)
+		self.assertEqual(block.dtype['positions'].shape, (0,))
+		sized = block.sizedDtype(3)
+		self.assertEqual(sized.itemsize, 64)
+		self.assertEqual(sized['positions'].shape, (3,))
+		self.assertEqual(block.length(64), 3)
+		self.assertEqual(block.length(70), 3)
+		self.assertEqual(block.length(8), 0)
+
+	def test_unsized_only(self):
+		block = ShaderStorageBlock('Values', unsized=Variable('values', 'float'), layout='std430')
+		self.assertEqual(block.sizedDtype(1).itemsize, 4)
+		self.assertEqual(block.length(64), 16)
+		self.assertEqual(str(block), 'buffer Values {float values[];} ;')
+
+	def test_errors(self):
+		block = ShaderStorageBlock('Block', Variable('f', 'float'), layout='std430')
+		with self.assertRaises(TypeError):
+			block.sizedDtype(1)
+		block = ShaderStorageBlock('Block', unsized=Variable('f', 'float'))
+		with self.assertRaises(TypeError):
+			block.dtype
+		with self.assertRaises(ValueError):
+			ShaderStorageBlock('Block', Variable('f', 'float'), unsized=Variable('f', 'float'))
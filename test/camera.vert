@@ -0,0 +1,13 @@
+#version 330
+
+layout(std140) uniform Camera {
+	mat4 view_clip;
+};
+
+layout(std140) uniform Object {
+	mat4 model_view;
+};
+
+void main(){
+	gl_Position = view_clip * model_view * vec4(0, 0, 0, 1);
+}
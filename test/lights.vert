@@ -0,0 +1,21 @@
+#version 330
+
+struct Light {
+	vec3 position;
+	vec4 color;
+};
+
+layout(shared) uniform SharedLights {
+	int count;
+	Light lights[256];
+};
+
+layout(std140) uniform StandardLights {
+	Light std_lights[256];
+};
+
+void main(){
+	int i = gl_VertexID % count;
+	gl_Position = vec4(lights[i].position, 1) * lights[i].color
+	            + vec4(std_lights[i].position, 1) * std_lights[i].color;
+}
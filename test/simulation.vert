@@ -0,0 +1,12 @@
+#version 330
+
+in vec2 position;
+in vec2 velocity;
+
+out vec2 next_position;
+out vec2 next_velocity;
+
+void main(){
+	next_position = position + velocity;
+	next_velocity = velocity * 2;
+}
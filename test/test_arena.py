@@ -0,0 +1,86 @@
+from OpenGL import GL
+from OpenGL.GL.ARB import compute_shader
+import numpy
+from numpy.testing import assert_array_equal
+
+from .test_context import ContextTest, readShaders
+
+from GLPy import Program, Buffer
+from GLPy.GLSL import UniformBlock, Variable, parse, programArguments
+from GLPy.arena import BlockArena, offsetAlignment, slotDtype
+
+from unittest import mock
+
+def getInteger(pname, index):
+	return int(GL.glGetIntegeri_v(pname, index))
+
+class ArenaTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.block = UniformBlock('Object', Variable('color', 'vec4'), Variable('scale', 'float'),
+		                          layout='std140')
+		self.alignment = offsetAlignment(GL.GL_UNIFORM_BUFFER)
+		self.arena = BlockArena.fromBlock(self.block, capacity=2)
+
+	def test_slot_dtype(self):
+		slot_dtype = slotDtype(self.block.dtype, 256)
+		self.assertEqual(slot_dtype.itemsize, 256)
+		self.assertEqual(slot_dtype.fields['scale'], self.block.dtype.fields['scale'])
+		self.assertEqual(self.arena.dtype.itemsize % self.alignment, 0)
+
+	def test_allocate(self):
+		slots = self.arena.allocate(3)
+		assert_array_equal(slots, [0, 1, 2])
+		self.assertGreaterEqual(self.arena.capacity, 3)
+		self.arena.free(slots[1])
+		self.assertEqual(self.arena.allocate(), 1)
+		self.assertEqual(self.arena.allocate(), 3)
+
+	def test_write(self):
+		slots = self.arena.allocate(4)
+		colors = numpy.arange(16, dtype='float32').reshape(4, 4)
+		with mock.patch.object(GL, 'glBufferSubData', wraps=GL.glBufferSubData) as upload:
+			self.arena.write(slots, color=colors, scale=numpy.arange(4))
+			self.assertEqual(upload.call_count, 1)
+		with self.arena.buffer.bind(GL.GL_UNIFORM_BUFFER):
+			data = self.arena.buffer.data
+		assert_array_equal(data['color'], colors)
+		assert_array_equal(data['scale'], numpy.arange(4))
+
+		values = numpy.zeros(1, self.block.dtype)
+		values['scale'] = 5
+		self.arena.write(slots[2], values[0])
+		with self.arena.buffer.bind(GL.GL_UNIFORM_BUFFER):
+			assert_array_equal(self.arena.buffer[2:3].data['scale'], [5])
+
+	def test_bind(self):
+		slot = self.arena.allocate(2)[1]
+		with self.arena.bind(slot, 3):
+			self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_BINDING, 3),
+			                 self.arena.buffer.handle)
+			self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_START, 3), self.arena.offset(slot))
+			self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_SIZE, 3),
+			                 self.block.dtype.itemsize)
+		self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_BINDING, 3), 0)
+		with self.assertRaises(ValueError):
+			with Buffer().bind(GL.GL_UNIFORM_BUFFER, offset=0):
+				pass
+
+	def test_draw(self):
+		if not compute_shader.glInitComputeShaderARB():
+			self.skipTest("Compute shaders are not supported.")
+		sources = readShaders(compute='arena.comp')
+		program = Program.fromSources(sources, **programArguments(parse(sources['compute'])))
+		block = program.uniform_blocks['Object']
+		slots = self.arena.allocate(3)
+		self.arena.write(slots, color=[[1, 2, 3, 4]] * 3, scale=[1, 2, 3])
+
+		result = Buffer()
+		with result.bind(GL.GL_SHADER_STORAGE_BUFFER):
+			result[...] = numpy.zeros(1, program.shader_storage_blocks['Result'].dtype)
+		with program.shader_storage_blocks['Result'].bind(result):
+			for slot, scale in zip(slots, [1, 2, 3]):
+				with self.arena.bind(slot, block.binding):
+					program.dispatch(1)
+				GL.glMemoryBarrier(GL.GL_BUFFER_UPDATE_BARRIER_BIT)
+				assert_array_equal(result.data['result'], numpy.array([1, 2, 3, 4]) * scale)
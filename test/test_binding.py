@@ -0,0 +1,79 @@
+from OpenGL import GL
+import numpy
+
+from .test_context import ContextTest, readShaders
+
+from GLPy import Program, Buffer
+from GLPy.GLSL import UniformBlock, Variable
+from GLPy.binding import BindingRegistry
+
+from unittest import mock
+import ctypes as c
+
+def blockBinding(block):
+	binding = GL.GLint()
+	GL.glGetActiveUniformBlockiv(block.program.handle, block.index, GL.GL_UNIFORM_BLOCK_BINDING,
+	                             c.byref(binding))
+	return binding.value
+
+class BindingRegistryTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.camera = UniformBlock('Camera', Variable('view_clip', 'mat4'), layout='std140')
+		self.object = UniformBlock('Object', Variable('model_view', 'mat4'), layout='std140')
+		self.registry = BindingRegistry(reserved=[0])
+		shaders = readShaders(vertex='camera.vert', fragment='compile.frag')
+		self.programs = [Program.fromSources(shaders, uniform_blocks=[self.camera, self.object],
+		                                     binding_registry=self.registry)
+		                 for _ in range(2)]
+
+	def test_shared(self):
+		camera_bindings = {p.uniform_blocks['Camera'].binding for p in self.programs}
+		object_bindings = {p.uniform_blocks['Object'].binding for p in self.programs}
+		self.assertEqual(len(camera_bindings), 1)
+		self.assertEqual(len(object_bindings), 1)
+		self.assertNotEqual(camera_bindings, object_bindings)
+		self.assertNotIn(0, camera_bindings | object_bindings)
+		self.assertEqual(self.registry.binding(self.camera), camera_bindings.pop())
+		for program in self.programs:
+			for block in program.uniform_blocks.values():
+				self.assertEqual(blockBinding(block), block.binding)
+
+	def test_relink(self):
+		program = self.programs[0]
+		binding = program.uniform_blocks['Camera'].binding
+		program.relink()
+		self.assertEqual(blockBinding(program.uniform_blocks['Camera']), binding)
+
+	def test_bind(self):
+		buffer = Buffer()
+		with buffer.bind(GL.GL_UNIFORM_BUFFER):
+			buffer[...] = numpy.zeros(1, self.camera.dtype)
+		with mock.patch.object(GL, 'glBindBufferBase', wraps=GL.glBindBufferBase) as bind:
+			for _ in range(2):
+				self.registry.bind(self.camera, buffer)
+				for program in self.programs:
+					with program:
+						pass
+			self.assertEqual(bind.call_count, 1)
+		self.assertEqual(int(GL.glGetIntegeri_v(GL.GL_UNIFORM_BUFFER_BINDING,
+		                                        self.registry.binding(self.camera))),
+		                 buffer.handle)
+
+	def test_shader_binding(self):
+		buffer = Buffer()
+		with buffer.bind(GL.GL_UNIFORM_BUFFER):
+			buffer[...] = numpy.zeros(1, self.camera.dtype)
+		self.registry.bind(self.camera, buffer)
+		taken = self.registry.binding(self.camera)
+
+		light = UniformBlock('Light', Variable('color', 'vec4'), layout='std140', binding=taken)
+		self.assertEqual(self.registry.binding(light), taken)
+		moved = self.registry.binding(self.camera)
+		self.assertNotIn(moved, {taken, self.registry.binding(self.object), 0})
+		for program in self.programs:
+			camera = program.uniform_blocks['Camera']
+			self.assertEqual(camera.binding, moved)
+			self.assertEqual(blockBinding(camera), moved)
+		self.assertEqual(int(GL.glGetIntegeri_v(GL.GL_UNIFORM_BUFFER_BINDING, moved)),
+		                 buffer.handle)
@@ -0,0 +1,62 @@
+from OpenGL import GL
+import numpy
+from numpy.testing import assert_array_equal
+
+from .test_context import ContextTest
+
+from GLPy.GLSL import UniformBlock, Variable, Struct, Array
+from GLPy.block_view import BlockView
+
+from unittest import mock
+
+class BlockViewTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		light = Struct('Light', Variable('position', 'vec3'), Variable('color', 'vec3'))
+		self.block = UniformBlock('Scene', Variable('camera_clip', 'mat4'),
+		                          Variable('weights', Array('float', 3)),
+		                          Variable('lights', Array(light, 4)), layout='std140')
+		self.view = BlockView.fromBlock(self.block)
+
+	def read(self):
+		with self.view.buffer.bind(GL.GL_UNIFORM_BUFFER):
+			return self.view.buffer.data
+
+	def test_attributes(self):
+		camera_clip = numpy.arange(16, dtype='float32').reshape(4, 4)
+		self.view.camera_clip = camera_clip
+		self.view.weights = [1, 2, 3]
+		self.view.lights[3].color = (1, 0, 0)
+		self.view.lights[1:3] = numpy.ones(2, self.block.dtype['lights'].base)
+		assert_array_equal(self.view.camera_clip, camera_clip)
+		assert_array_equal(self.view.weights, [1, 2, 3])
+		assert_array_equal(self.view['lights'][3].color, [1, 0, 0])
+		assert_array_equal(self.view.lights[2].position, [1, 1, 1])
+		self.assertEqual(len(self.view.lights), 4)
+		with self.assertRaises(ValueError):
+			self.view.weights[0] = 2
+		with self.assertRaises(AttributeError):
+			self.view.missing = 1
+		with self.assertRaises(AttributeError):
+			self.view.lights[0].missing
+
+	def test_upload(self):
+		self.assertIsNone(self.view.dirty)
+		self.view.weights = [1, 2, 3]
+		self.view.lights[2].color = (0, 1, 0)
+		start = self.block.dtype.fields['weights'][1]
+		stop = (self.block.dtype.fields['lights'][1] + 2 * 32 + 16 + 12)
+		self.assertEqual(self.view.dirty, (start, stop))
+
+		with mock.patch.object(GL, 'glBufferSubData', wraps=GL.glBufferSubData) as upload:
+			with self.view.bind(1):
+				self.assertEqual(upload.call_count, 1)
+			self.assertIsNone(self.view.dirty)
+			self.view.upload()
+			self.assertEqual(upload.call_count, 1)
+		self.view.camera_clip = numpy.arange(16).reshape(4, 4)
+		self.view.upload()
+		data = self.read()
+		assert_array_equal(data['camera_clip']['mat4-column'], numpy.arange(16).reshape(4, 4).T)
+		assert_array_equal(data['weights']['float'], [1, 2, 3])
+		assert_array_equal(data['lights']['color'][2], [0, 1, 0])
@@ -0,0 +1,117 @@
+import os, tempfile, unittest
+
+from OpenGL import GL
+import numpy
+from numpy.testing import assert_array_equal
+
+from GLPy import Program, ImmutableTexture
+from GLPy.cache import DiskCache, ProgramBinaryCache, CompressedTextureCache
+
+from .test_context import ContextTest, readShaders
+
+class DiskCacheTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_get_put(self):
+		cache = DiskCache(self.directory.name)
+		self.assertIsNone(cache.get('foo'))
+		cache.put('foo', b'bar')
+		self.assertIn('foo', cache)
+		self.assertEqual(cache.get('foo'), b'bar')
+		cache.remove('foo')
+		self.assertNotIn('foo', cache)
+
+	def test_max_entries(self):
+		cache = DiskCache(self.directory.name, max_entries=2)
+		cache.put('a', b'a')
+		os.utime(cache.path('a'), (0, 0))
+		cache.put('b', b'b')
+		os.utime(cache.path('b'), (1, 1))
+		# Using 'a' makes 'b' the least recently used
+		cache.get('a')
+		cache.put('c', b'c')
+		self.assertEqual(len(cache), 2)
+		self.assertIn('a', cache)
+		self.assertNotIn('b', cache)
+
+	def test_max_size(self):
+		cache = DiskCache(self.directory.name, max_size=10)
+		cache.put('a', bytes(6))
+		os.utime(cache.path('a'), (0, 0))
+		cache.put('b', bytes(6))
+		self.assertNotIn('a', cache)
+		self.assertIn('b', cache)
+
+class ProgramBinaryCacheTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.directory = tempfile.TemporaryDirectory()
+		self.cache = ProgramBinaryCache(self.directory.name)
+		self.shaders = readShaders(vertex='compile.vert', fragment='compile.frag')
+
+	def tearDown(self):
+		self.directory.cleanup()
+		super().tearDown()
+
+	def test_key(self):
+		key = self.cache.key(self.shaders)
+		self.assertEqual(key, self.cache.key(dict(reversed(list(self.shaders.items())))))
+		shaders = dict(self.shaders, vertex=self.shaders['vertex'] + '\n')
+		self.assertNotEqual(key, self.cache.key(shaders))
+
+	def test_store_load(self):
+		Program.fromSources(self.shaders, cache=self.cache)
+		self.assertEqual(len(self.cache), 1)
+		key = self.cache.key(self.shaders)
+		binary = self.cache.load(key)
+		Program.fromSources(self.shaders, cache=self.cache)
+		self.assertEqual(self.cache.load(key), binary)
+
+	def test_invalid_binary(self):
+		key = self.cache.key(self.shaders)
+		self.cache.store(key, 0, b'invalid')
+		Program.fromSources(self.shaders, cache=self.cache)
+		self.assertNotEqual(self.cache.load(key), (0, b'invalid'))
+
+class CompressedTextureCacheTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.directory = tempfile.TemporaryDirectory()
+		self.cache = CompressedTextureCache(self.directory.name)
+		self.image = numpy.arange(64, dtype='uint8').reshape(8, 8)
+
+	def tearDown(self):
+		self.directory.cleanup()
+		super().tearDown()
+
+	def texture(self):
+		return ImmutableTexture((8, 8), components=1, levels=4,
+		                        compression=GL.GL_COMPRESSED_RED_RGTC1)
+
+	def test_store_load(self):
+		self.cache.store('a', [b'level0', b'', b'1'])
+		self.assertEqual(self.cache.load('a'), [b'level0', b'', b'1'])
+		self.cache.put('b', self.cache.get('a')[:-1])
+		self.assertIsNone(self.cache.load('b'))
+
+	def test_key(self):
+		texture = self.texture()
+		key = self.cache.key(texture, self.image)
+		self.assertEqual(key, self.cache.key(self.texture(), self.image.copy()))
+		self.assertNotEqual(key, self.cache.key(texture, self.image, 4))
+		self.assertNotEqual(key, self.cache.key(texture, self.image[::-1]))
+
+	def test_compress(self):
+		texture = self.texture()
+		self.assertFalse(texture.compress(self.image, self.cache, generate_mipmap=True))
+		levels = self.cache.load(self.cache.key(texture, self.image, 4))
+		self.assertEqual([len(level) for level in levels], [32, 8, 8, 8])
+
+		cached = self.texture()
+		self.assertTrue(cached.compress(self.image, self.cache, generate_mipmap=True))
+		for level in range(4):
+			assert_array_equal(cached.read(level=level), texture.read(level=level))
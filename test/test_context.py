@@ -1,12 +1,14 @@
 #!/usr/bin/python3
 
-import os, unittest
+import os, time, unittest
 
-from OpenGL import GLUT
+from OpenGL import GL, GLUT, contextdata
+from OpenGL.GL.ARB import compute_shader
 import numpy
 from numpy.testing import assert_array_equal
 
-from GLPy import ( Program, ImmutableTexture )
+from GLPy import ( Program, ImmutableTexture, Buffer, GLSL )
+from GLPy.program import ShaderCache, Barrier, memoryBarrier
 
 class ContextTest(unittest.TestCase):
 	def setUp(self):
@@ -19,6 +21,8 @@ class ContextTest(unittest.TestCase):
 		self.window = GLUT.glutCreateWindow("GLPy Test")
 	
 	def tearDown(self):
+		# Forget tracked state, in case the next context reuses the identifier
+		contextdata.cleanupContext()
 		GLUT.glutDestroyWindow(self.window)
 
 	def test_context(self):
@@ -44,7 +48,92 @@ class ProgramTest(ContextTest):
 	
 	def test_compilation(self):
 		pass
-	
+
+class ShaderCacheTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.shaders = readShaders(vertex='compile.vert', fragment='compile.frag')
+
+	def test_shared_stages(self):
+		cache = ShaderCache()
+		p1 = Program.fromSources(self.shaders, shader_cache=cache)
+		p2 = Program.fromSources(self.shaders, shader_cache=cache)
+		self.assertEqual(len(cache), 2)
+		self.assertEqual([s.handle for s in p1.shaders], [s.handle for s in p2.shaders])
+		p1.delete()
+		self.assertEqual(len(cache), 2)
+		p2.delete()
+		self.assertEqual(len(cache), 0)
+
+	def test_failed_compilation(self):
+		cache = ShaderCache()
+		shaders = dict(self.shaders, fragment='invalid')
+		with self.assertRaises(RuntimeError):
+			Program.fromSources(shaders, shader_cache=cache)
+		self.assertEqual(len(cache), 0)
+
+class ProgramFutureTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.shaders = readShaders(vertex='compile.vert', fragment='compile.frag')
+
+	def test_batch(self):
+		futures = [Program.fromSourcesAsync(self.shaders) for _ in range(4)]
+		timeout = time.monotonic() + 10
+		while not all(f.done() for f in futures):
+			self.assertLess(time.monotonic(), timeout)
+			time.sleep(0.01)
+		programs = [f.result() for f in futures]
+		self.assertEqual(len({p.handle for p in programs}), len(programs))
+		self.assertIs(futures[0].result(), programs[0])
+
+	def test_failed_compilation(self):
+		shaders = dict(self.shaders, fragment='invalid')
+		future = Program.fromSourcesAsync(shaders)
+		with self.assertRaises(RuntimeError):
+			future.result()
+		with self.assertRaises(RuntimeError):
+			future.result()
+
+class ComputeTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		if not compute_shader.glInitComputeShaderARB():
+			self.skipTest("Compute shaders are not supported.")
+		self.program = Program.fromSources(readShaders(compute='compute.comp'),
+		                                   uniforms=[GLSL.Variable('scale', 'float')])
+		self.program.uniforms['scale'].data = 2
+		self.buffer = Buffer()
+		self.values = numpy.arange(32, dtype='float32')
+		with self.buffer.bind(GL.GL_SHADER_STORAGE_BUFFER):
+			self.buffer[...] = self.values
+
+	def read(self):
+		with self.buffer.bind(GL.GL_SHADER_STORAGE_BUFFER):
+			return self.buffer.data
+
+	def test_work_group_size(self):
+		self.assertEqual(self.program.work_group_size, (4, 2, 1))
+		program = Program.fromSources(readShaders(vertex='compile.vert', fragment='compile.frag'))
+		with self.assertRaises(RuntimeError):
+			program.work_group_size
+
+	def test_dispatch(self):
+		with self.buffer.bind(GL.GL_SHADER_STORAGE_BUFFER, 0):
+			self.program.dispatch(2, 2, barriers=[Barrier.buffer_update])
+		assert_array_equal(self.read(), self.values * 2)
+
+	def test_dispatch_indirect(self):
+		groups = Buffer()
+		with groups.bind(GL.GL_DISPATCH_INDIRECT_BUFFER):
+			groups[...] = numpy.array([0, 1, 1, 2, 2, 1], dtype='uint32')
+		with self.buffer.bind(GL.GL_SHADER_STORAGE_BUFFER, 0):
+			self.program.dispatchIndirect(groups, offset=12)
+			memoryBarrier(Barrier.buffer_update, Barrier.shader_storage)
+			self.program.dispatchIndirect(groups)
+			memoryBarrier()
+		assert_array_equal(self.read(), self.values * 2)
+
 class TextureTest(unittest.TestCase):
 	def setUp(self):
 		ContextTest.setUp(self)
@@ -0,0 +1,50 @@
+from OpenGL import contextdata
+import numpy
+from numpy import testing as np_test
+
+from GLPy.kernel import Kernel, elementwise, glslType
+from GLPy.GLSL import Scalar, Vector
+
+from .test_context import ContextTest
+
+import unittest
+
+class GLSLTypeTest(unittest.TestCase):
+	def test_types(self):
+		self.assertEqual(glslType(numpy.dtype('float32')), Scalar.float)
+		self.assertEqual(glslType(numpy.dtype(('int32', 3))), Vector.ivec3)
+		with self.assertRaises(TypeError):
+			glslType(numpy.dtype('int8'))
+		with self.assertRaises(TypeError):
+			glslType(numpy.dtype(('float32', (2, 2))))
+
+class KernelTest(ContextTest):
+	def test_kernel(self):
+		kernel = Kernel('y = a * x + b; l = length(x);', inputs=[('x', 'vec3'), ('b', 'vec3')],
+		                outputs=[('y', 'vec3'), ('l', 'float')], uniforms=[('a', 'float')])
+		x = numpy.arange(30, dtype='float32').reshape(10, 3)
+		b = numpy.ones((10, 3), dtype='float32')
+		y, l = kernel(x, b, a=2)
+		np_test.assert_allclose(y, 2 * x + b)
+		np_test.assert_allclose(l, numpy.linalg.norm(x, axis=1), rtol=1e-6)
+
+	def test_chunks(self):
+		kernel = Kernel.fromExpression('x + 1u', [('x', 'uint')], 'uint', chunk_size=7)
+		x = numpy.arange(30, dtype='uint32')
+		np_test.assert_equal(kernel(x), x + 1)
+		self.assertEqual(kernel.compiled.capacity, 7)
+
+	def test_cache(self):
+		first = Kernel.fromExpression('x * 2', [('x', 'float')])
+		second = Kernel.fromExpression('x * 2', [('x', 'float')])
+		self.assertIs(first.compiled, second.compiled)
+		self.assertIn(first.signature, contextdata.getValue('GLPy.kernels'))
+
+	def test_elementwise(self):
+		x = numpy.arange(4, dtype='float32')
+		y = numpy.ones(4, dtype='float32')
+		np_test.assert_equal(elementwise('x * 2 + y', x=x, y=y), x * 2 + y)
+		np_test.assert_equal(elementwise('x', x=x[:0]), x[:0])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,51 @@
+from OpenGL import GL
+import numpy
+from numpy import dtype
+from numpy.testing import assert_array_equal
+
+from .test_context import ContextTest
+
+from GLPy import VAO, MultiBuffer, BindingRegistry
+from GLPy.GLSL import VertexAttribute, UniformBlock, Variable
+
+def getInteger(pname, index):
+	return int(GL.glGetIntegeri_v(pname, index))
+
+class MultiBufferTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.buffer = MultiBuffer(copies=3)
+		with self.buffer.bind(GL.GL_ARRAY_BUFFER):
+			self.buffer[...] = dtype((dtype([('position', 'float32', 3)]), (4,)))
+
+	def test_rotate(self):
+		handles = []
+		for frame in range(4):
+			handles.append(self.buffer.handle)
+			with self.buffer.bind(GL.GL_ARRAY_BUFFER):
+				data = numpy.full(4, frame, self.buffer.dtype.base)
+				self.buffer.data = data
+				assert_array_equal(self.buffer.data['position'], frame)
+			self.buffer.advance()
+		self.assertEqual(len(set(handles[:3])), 3)
+		self.assertEqual(handles[3], handles[0])
+		self.assertEqual(self.buffer.fences.count(None), 1)
+		self.assertEqual(self.buffer.current.dtype, self.buffer.buffers[1].dtype)
+
+	def test_vertex_attribute(self):
+		vao = VAO(VertexAttribute('position', 'vec3', location=1))
+		vao['position'].data = self.buffer.items['position']
+		for _ in range(2):
+			with vao:
+				binding = int(GL.glGetVertexAttribiv(1, GL.GL_VERTEX_ATTRIB_ARRAY_BUFFER_BINDING)[0])
+			self.assertEqual(binding, self.buffer.handle)
+			self.buffer.advance()
+
+	def test_registry(self):
+		registry = BindingRegistry()
+		block = UniformBlock('Instances', Variable('offset', 'vec4'), layout='std140')
+		registry.bind(block, self.buffer)
+		index = registry.binding(block)
+		for _ in range(2):
+			self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_BINDING, index), self.buffer.handle)
+			self.buffer.advance()
@@ -0,0 +1,71 @@
+from GLPy.preprocessor import Preprocessor, defineLine
+
+from .test_context import ContextTest, readShaders
+
+import os
+import tempfile
+import unittest
+
+class PreprocessorTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.write('common.glsl', '#pragma once\n#version 400\nfloat common;\n')
+		self.write('lib/light.glsl', '#include "common.glsl"\nfloat light;\n')
+		self.write('cycle_a.glsl', '#include "cycle_b.glsl"\n')
+		self.write('cycle_b.glsl', '#include "cycle_a.glsl"\n')
+		search_paths = [self.directory.name, os.path.join(self.directory.name, 'lib')]
+		self.preprocessor = Preprocessor(search_paths, defines={'QUALITY': 2})
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def write(self, name, source):
+		path = os.path.join(self.directory.name, name)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with open(path, 'w') as f:
+			f.write(source)
+
+	def test_define(self):
+		self.assertEqual(defineLine('A'), '#define A')
+		self.assertEqual(defineLine('A', True), '#define A 1')
+		self.assertEqual(defineLine('A', 0.5), '#define A 0.5')
+
+	def test_expand(self):
+		source = '// Header\n#version  330   core\n#include <light.glsl>\n#include "common.glsl"\nvoid main(){}\n'
+		expanded = self.preprocessor.expand(source, {'SHADOWS': None})
+		self.assertEqual(expanded.splitlines(),
+		                 [ '#version 330 core', '#define QUALITY 2', '#define SHADOWS', '// Header'
+		                 , 'float common;', 'float light;', 'void main(){}' ])
+
+	def test_version(self):
+		self.assertTrue(self.preprocessor.expand('#include "common.glsl"\n').startswith('#version 400\n'))
+		self.assertFalse(self.preprocessor.expand('float x;\n').startswith('#version'))
+		self.preprocessor.version = '450 core'
+		self.assertTrue(self.preprocessor.expand('#version 330\n').startswith('#version 450 core\n'))
+
+	def test_cache(self):
+		source = '#version 330\n#include "common.glsl"\n'
+		expanded = self.preprocessor.expand(source)
+		self.write('common.glsl', 'float changed;\n')
+		self.assertIs(self.preprocessor.expand(source), expanded)
+		self.assertNotEqual(self.preprocessor.expand(source, {'A': 1}), expanded)
+		self.preprocessor.clear()
+		self.assertIn('changed', self.preprocessor.expand(source))
+
+	def test_errors(self):
+		with self.assertRaises(FileNotFoundError):
+			self.preprocessor.expand('#include "missing.glsl"\n')
+		with self.assertRaises(RuntimeError):
+			self.preprocessor.expand('#include "cycle_a.glsl"\n')
+
+class PreprocessorProgramTest(ContextTest):
+	def test_variants(self):
+		preprocessor = Preprocessor()
+		shaders = readShaders(vertex='compile.vert', fragment='compile.frag')
+		program = preprocessor.program(shaders, {'A': 1})
+		self.assertIs(preprocessor.program(shaders, {'A': 1}), program)
+		self.assertIsNot(preprocessor.program(shaders, {'A': 2}), program)
+		self.assertEqual(len(preprocessor.programs), 2)
+
+if __name__ == '__main__':
+	unittest.main()
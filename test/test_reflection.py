@@ -0,0 +1,55 @@
+from OpenGL import GL
+from numpy import dtype
+
+from GLPy import Program
+from GLPy.GLSL import Variable, Array, Matrix, Vector, Sampler, VertexAttribute
+from GLPy.reflection import ProgramReflection, gl_types, parseName
+
+from .test_context import ContextTest, readShaders
+
+import unittest
+
+class ReflectionUtilTest(unittest.TestCase):
+	def test_gl_types(self):
+		self.assertIs(gl_types[GL.GL_FLOAT_VEC3], Vector.vec3)
+		self.assertIs(gl_types[GL.GL_FLOAT_MAT4], Matrix.mat4)
+		self.assertIs(gl_types[GL.GL_DOUBLE_MAT2x3], Matrix.dmat2x3)
+		self.assertIs(gl_types[GL.GL_UNSIGNED_INT_SAMPLER_2D], Sampler.usampler2D)
+
+	def test_parse_name(self):
+		self.assertEqual(parseName('a'), [('a', ())])
+		self.assertEqual(parseName('a.b[1][2].c[0]'), [('a', ()), ('b', (1, 2)), ('c', (0,))])
+
+class ProgramReflectionTest(ContextTest):
+	def test_uniform_blocks(self):
+		shaders = readShaders(vertex='uniform_block.vert', fragment='compile.frag')
+		program = Program.fromSources(shaders, reflect=True)
+		blocks = program.uniform_blocks
+		self.assertEqual(set(blocks), {'AnonymousUB', 'InstancedUB', 'OptimizedUB'})
+
+		mat4_dtype = dtype((dtype([('mat4-column', 'float32', 4)]), 4))
+		anonymous_ub_dtype = dtype({'names': ['m4', 'b'], 'formats': [mat4_dtype, 'uint32'],
+		                            'offsets': [0, 64], 'itemsize': blocks['AnonymousUB'].dtype.itemsize})
+		self.assertEqual(blocks['AnonymousUB'].dtype, anonymous_ub_dtype)
+		self.assertEqual(blocks['AnonymousUB'].instance_name, '')
+		self.assertEqual(program.reflection.uniform_block_bindings['AnonymousUB'], 2)
+
+		self.assertEqual(blocks['InstancedUB'].instance_name, 'InstancedUB')
+		self.assertEqual(blocks['InstancedUB'].dtype['foo'].names, ('f', 'v4'))
+		self.assertEqual(blocks['OptimizedUB'].dtype['foo'].shape[0], 2)
+
+	def test_vertex_attributes(self):
+		shaders = readShaders(vertex='vertices.vert', fragment='vertices.frag')
+		program = Program.fromSources(shaders, reflect=True)
+		attributes = program.vertex_attributes
+		self.assertEqual(set(attributes), {'position', 'color', 'foo', 'bar', 'baz'})
+		self.assertEqual(attributes['bar'].datatype, Array('mat3', 2))
+		for attribute in attributes.values():
+			self.assertEqual(attribute.location,
+			                 GL.glGetAttribLocation(program.handle, attribute.name))
+
+	def test_uniforms(self):
+		shaders = readShaders(vertex='texture.vert', fragment='texture.frag')
+		reflection = ProgramReflection(Program.fromSources(shaders).handle)
+		self.assertEqual(reflection.uniforms, [Variable('tex', 'sampler2D')])
+		self.assertIn('tex', reflection.uniform_locations)
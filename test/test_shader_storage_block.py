@@ -0,0 +1,63 @@
+from OpenGL import GL
+from OpenGL.GL.ARB import compute_shader
+import numpy
+from numpy.testing import assert_array_equal
+
+from .test_context import ContextTest, readShaders
+
+from GLPy import Program, Buffer
+from GLPy.GLSL import parse, programArguments
+
+class ShaderStorageBlockTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		if not compute_shader.glInitComputeShaderARB():
+			self.skipTest("Compute shaders are not supported.")
+		sources = readShaders(compute='storage.comp')
+		self.program = Program.fromSources(sources,
+		                                   **programArguments(parse(sources['compute'])))
+		self.particles = self.program.shader_storage_blocks['Particles']
+		self.counter = self.program.shader_storage_blocks['Counter']
+
+	def test_layout(self):
+		self.assertEqual(self.particles.index, 0)
+		self.assertEqual(self.particles.data_size, self.particles.sizedDtype(1).itemsize)
+		self.assertGreaterEqual(self.counter.data_size, self.counter.dtype.itemsize)
+
+	def test_binding(self):
+		self.assertEqual(self.particles.binding, 2)
+		with self.assertRaises(TypeError):
+			self.particles.binding = 3
+		self.assertIsNone(self.counter.binding)
+		with self.assertRaises(RuntimeError):
+			self.counter.bind(Buffer())
+		self.counter.binding = 5
+		self.assertEqual(self.counter.binding, 5)
+
+	def test_dispatch(self):
+		count = 3
+		data = numpy.zeros(1, self.particles.sizedDtype(count))
+		data['count'] = 2
+		data['transform']['mat2-column'] = [[2, 0], [0, 3]]
+		positions = numpy.arange(count * 3, dtype='float32').reshape(count, 3)
+		data['particles']['position'] = positions
+
+		particles, counter = Buffer(), Buffer()
+		with particles.bind(GL.GL_SHADER_STORAGE_BUFFER):
+			particles[...] = data
+		with counter.bind(GL.GL_SHADER_STORAGE_BUFFER):
+			counter[...] = numpy.zeros(1, self.counter.dtype)
+		self.counter.binding = 0
+
+		with self.particles.bind(particles), self.counter.bind(counter):
+			self.program.dispatch(count)
+		GL.glMemoryBarrier(GL.GL_BUFFER_UPDATE_BARRIER_BIT)
+
+		with particles.bind(GL.GL_SHADER_STORAGE_BUFFER):
+			result = particles.data
+		self.assertEqual(self.particles.length(particles.nbytes), count)
+		expected = positions * [2, 3, 1]
+		assert_array_equal(result['particles']['position'], expected)
+		assert_array_equal(result['particles']['mass'], count)
+		with counter.bind(GL.GL_SHADER_STORAGE_BUFFER):
+			self.assertEqual(int(counter.data['total']), 2 * count)
@@ -0,0 +1,139 @@
+from OpenGL import GL
+from numpy import dtype
+import numpy
+from numpy.testing import assert_array_equal
+
+from .test_context import ContextTest, readShaders
+
+from GLPy import Program, VAO, Buffer, ImmutableTexture, MultiBuffer
+from GLPy.buffers import deleteBuffers
+from GLPy import state
+
+import unittest
+from unittest import mock
+
+def getInteger(pname, index=None):
+	if index is None:
+		return int(GL.glGetIntegerv(pname))
+	return int(GL.glGetIntegeri_v(pname, index))
+
+class StateTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.state = state.current()
+		self.state.invalidate()
+
+	def tearDown(self):
+		self.state.unbind = True
+		super().tearDown()
+
+	def test_current(self):
+		self.assertIs(state.current(), self.state)
+
+	def test_redundant(self):
+		program = Program.fromSources(readShaders(vertex='compile.vert', fragment='compile.frag'))
+		with mock.patch.object(GL, 'glUseProgram', wraps=GL.glUseProgram) as use:
+			with program:
+				with program:
+					pass
+				self.assertEqual(getInteger(GL.GL_CURRENT_PROGRAM), program.handle)
+			self.assertEqual(use.call_count, 2)
+		self.assertEqual(getInteger(GL.GL_CURRENT_PROGRAM), 0)
+
+	def test_no_unbind(self):
+		self.state.unbind = False
+		program = Program.fromSources(readShaders(vertex='compile.vert', fragment='compile.frag'))
+		with mock.patch.object(GL, 'glUseProgram', wraps=GL.glUseProgram) as use:
+			for _ in range(10):
+				with program:
+					pass
+			self.assertEqual(use.call_count, 1)
+		self.assertEqual(getInteger(GL.GL_CURRENT_PROGRAM), program.handle)
+
+	def test_buffer(self):
+		outer, inner = Buffer(), Buffer()
+		with outer.bind(GL.GL_ARRAY_BUFFER):
+			with inner.bind(GL.GL_ARRAY_BUFFER):
+				self.assertEqual(getInteger(GL.GL_ARRAY_BUFFER_BINDING), inner.handle)
+			self.assertEqual(getInteger(GL.GL_ARRAY_BUFFER_BINDING), outer.handle)
+			self.assertEqual(outer.active_bindings, [GL.GL_ARRAY_BUFFER])
+		self.assertEqual(getInteger(GL.GL_ARRAY_BUFFER_BINDING), 0)
+
+		with outer.bind(GL.GL_UNIFORM_BUFFER, 1):
+			self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_BINDING, 1), outer.handle)
+			with inner.bind(GL.GL_UNIFORM_BUFFER, 1):
+				self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_BINDING, 1), inner.handle)
+			self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_BINDING, 1), outer.handle)
+		self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_BINDING, 1), 0)
+
+	def test_redundant_range(self):
+		self.state.unbind = False
+		a, b = Buffer(), Buffer()
+		for buf in (a, b):
+			with buf.bind(GL.GL_UNIFORM_BUFFER):
+				buf[...] = dtype(('float32', 4))
+				buf.data = numpy.zeros(4, dtype='float32')
+		with a.bind(GL.GL_UNIFORM_BUFFER, 0):
+			pass
+		with b.bind(GL.GL_UNIFORM_BUFFER):
+			pass
+		# The indexed binding is unchanged, but the generic target must be bound to a again
+		with a.bind(GL.GL_UNIFORM_BUFFER, 0):
+			self.assertEqual(getInteger(GL.GL_UNIFORM_BUFFER_BINDING), a.handle)
+			a.data = numpy.arange(4, dtype='float32')
+			assert_array_equal(a.data, numpy.arange(4))
+		with b.bind(GL.GL_UNIFORM_BUFFER):
+			assert_array_equal(b.data, numpy.zeros(4))
+
+	def test_element_buffer(self):
+		vao = VAO()
+		buf = Buffer()
+		with buf.bind(GL.GL_ELEMENT_ARRAY_BUFFER):
+			buf[...] = dtype(('uint32', 3))
+		vao.element_buffer = buf
+		with vao:
+			self.assertEqual(getInteger(GL.GL_ELEMENT_ARRAY_BUFFER_BINDING), buf.handle)
+		self.assertNotIn(GL.GL_ELEMENT_ARRAY_BUFFER, self.state.buffers)
+
+	def test_texture(self):
+		texture = ImmutableTexture((4, 4))
+		texture.activate(1, 2)
+		self.assertEqual(self.state.active_texture, 0)
+		for unit in (1, 2):
+			GL.glActiveTexture(GL.GL_TEXTURE0 + unit)
+			self.assertEqual(getInteger(GL.GL_TEXTURE_BINDING_2D), texture.handle)
+		GL.glActiveTexture(GL.GL_TEXTURE0)
+		self.assertEqual(self.state.textures[1, GL.GL_TEXTURE_2D], texture.handle)
+
+		with mock.patch.object(GL, 'glBindTexture', wraps=GL.glBindTexture) as bind:
+			texture.activate(1)
+			self.assertEqual(bind.call_count, 0)
+
+	def test_forget(self):
+		self.state.unbind = False
+		buf = Buffer()
+		with buf.bind(GL.GL_ARRAY_BUFFER), buf.bind(GL.GL_UNIFORM_BUFFER, 1):
+			pass
+		deleteBuffers([buf])
+		self.assertNotIn(GL.GL_ARRAY_BUFFER, self.state.buffers)
+		self.assertNotIn((GL.GL_UNIFORM_BUFFER, 1), self.state.indexed_buffers)
+		# The deleted name may be reused by a new buffer, which must be bound again
+		new = Buffer()
+		with new.bind(GL.GL_ARRAY_BUFFER):
+			self.assertEqual(getInteger(GL.GL_ARRAY_BUFFER_BINDING), new.handle)
+
+		texture = ImmutableTexture((4, 4))
+		texture.activate(1)
+		self.state.forget(GL.GL_TEXTURE, texture.handle)
+		self.assertNotIn((1, GL.GL_TEXTURE_2D), self.state.textures)
+
+		multi = MultiBuffer(copies=2)
+		with multi.bind(GL.GL_ARRAY_BUFFER):
+			pass
+		multi.delete()
+		self.assertNotIn(GL.GL_ARRAY_BUFFER, self.state.buffers)
+		with self.assertRaises(ValueError):
+			self.state.forget(GL.GL_SAMPLER, 1)
+
+if __name__ == '__main__':
+	unittest.main()
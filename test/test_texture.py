@@ -0,0 +1,256 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from OpenGL import GL
+import numpy
+from numpy.testing import assert_array_equal
+
+from .test_context import ContextTest
+
+from GLPy import ImmutableTexture, UnpackBufferRing, Buffer, state
+from GLPy.buffers import deleteBuffers
+from GLPy.texture import boxDownsample, mipmapPyramid, mipmapLevels, compressedFormats
+
+class TextureReadTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.texture = ImmutableTexture((5, 3), components=1, bits=8, normalized=False)
+		# Numpy order, so the first dimension is along y
+		self.data = numpy.arange(15, dtype='uint8').reshape(3, 5)
+		self.texture[...] = self.data
+
+	def test_read(self):
+		assert_array_equal(self.texture[...], self.data)
+		assert_array_equal(self.texture.read(), self.data)
+
+	def test_region(self):
+		assert_array_equal(self.texture[1:3, 2:5], self.data[1:3, 2:5])
+		assert_array_equal(self.texture[2, 1], self.data[2:3, 1:2])
+
+	def test_out(self):
+		out = numpy.zeros((2, 2), dtype='uint8')
+		self.assertIs(self.texture.read((slice(0, 2), slice(1, 3)), out=out), out)
+		assert_array_equal(out, self.data[0:2, 1:3])
+		with self.assertRaises(ValueError):
+			self.texture.read(out=out)
+
+	def test_write_region(self):
+		self.texture[0:2, 3:5] = [[100, 101], [102, 103]]
+		self.data[0:2, 3:5] = [[100, 101], [102, 103]]
+		assert_array_equal(self.texture[...], self.data)
+
+	def test_async(self):
+		readback = self.texture.readAsync()
+		assert_array_equal(readback.result(), self.data)
+		self.assertTrue(readback.done())
+
+		out = numpy.zeros((1, 5), dtype='uint8')
+		second = self.texture.readAsync((2, slice(None)), out=out, buffer=readback.buffer)
+		self.assertIs(second.buffer, readback.buffer)
+		self.assertIs(second.result(), out)
+		assert_array_equal(out, self.data[2:3])
+
+	def test_no_unbind(self):
+		current = state.current()
+		current.unbind = False
+		try:
+			readback = self.texture.readAsync()
+			assert_array_equal(readback.result(), self.data)
+			# The pixel pack buffer is left bound, but not used by synchronous reads
+			self.assertEqual(int(GL.glGetIntegerv(GL.GL_PIXEL_PACK_BUFFER_BINDING)),
+			                 readback.buffer.handle)
+			assert_array_equal(self.texture.read(), self.data)
+			assert_array_equal(self.texture[1:3, 0:2], self.data[1:3, 0:2])
+		finally:
+			current.unbind = True
+
+	def test_invalid(self):
+		with self.assertRaises(IndexError):
+			self.texture[0:4:2, :]
+		with self.assertRaises(IndexError):
+			self.texture[3, 0]
+		with self.assertRaises(IndexError):
+			self.texture.read(level=1)
+
+class ComponentReadTest(ContextTest):
+	def test_rgba(self):
+		texture = ImmutableTexture((4, 2), components=4, bits=8)
+		data = numpy.arange(32, dtype='uint8').reshape(2, 4, 4)
+		texture[...] = data
+		assert_array_equal(texture[...], data)
+		assert_array_equal(texture[:, :, 0:2], data[..., 0:2])
+		assert_array_equal(texture[:, :, 0], data[..., 0])
+
+	def test_float(self):
+		texture = ImmutableTexture((3, 2), components=2, bits=32, integer=False)
+		data = numpy.linspace(0, 1, 12, dtype='float32').reshape(2, 3, 2)
+		texture[...] = data
+		assert_array_equal(texture.readAsync().result(), data)
+
+	def test_array(self):
+		texture = ImmutableTexture((2, 2), components=1, count=3, bits=8, normalized=False)
+		data = numpy.arange(12, dtype='uint8').reshape(3, 2, 2)
+		texture[...] = data
+		assert_array_equal(texture[...], data)
+		assert_array_equal(texture[1, :, :], data[1:2])
+		texture[2, :, :] = [[9, 9], [9, 9]]
+		assert_array_equal(texture.readAsync((2, slice(None), slice(None))).result(), [[[9, 9], [9, 9]]])
+
+class UnpackBufferRingTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.texture = ImmutableTexture((8, 4), components=2, bits=16, normalized=False)
+		self.ring = UnpackBufferRing(copies=2)
+
+	def tearDown(self):
+		self.ring.delete()
+		super().tearDown()
+
+	def test_upload(self):
+		for frame in range(5):
+			data = numpy.full((4, 8, 2), frame, dtype='uint16')
+			data[1, 2] = (frame, 1000)
+			self.ring.upload(self.texture, Ellipsis, data)
+			assert_array_equal(self.texture[...], data)
+		self.assertEqual(self.ring.index, 1)
+		self.assertTrue(all(fence is not None for fence in self.ring.fences))
+
+	def test_region(self):
+		self.texture[...] = numpy.zeros((4, 8, 2), dtype='uint16')
+		self.ring.upload(self.texture, (slice(1, 3), slice(2, 5), 1), [[1, 2, 3], [4, 5, 6]])
+		result = self.texture[...]
+		assert_array_equal(result[1:3, 2:5, 1], [[1, 2, 3], [4, 5, 6]])
+		result[1:3, 2:5, 1] = 0
+		assert_array_equal(result, 0)
+		# Uploads without a bound unpack buffer read from client memory
+		self.texture[0, 0] = [7, 8]
+		assert_array_equal(self.texture[0, 0], [[[7, 8]]])
+
+	def test_no_unbind(self):
+		current = state.current()
+		current.unbind = False
+		try:
+			data = numpy.ones((4, 8, 2), dtype='uint16')
+			self.ring.upload(self.texture, Ellipsis, data)
+			# The pixel unpack buffer is left bound, but not used by uploads from client memory
+			self.assertEqual(int(GL.glGetIntegerv(GL.GL_PIXEL_UNPACK_BUFFER_BINDING)),
+			                 self.ring.buffers[0].handle)
+			self.texture[0:2, 0:3] = numpy.full((2, 3, 2), 5, dtype='uint16')
+			data[0:2, 0:3] = 5
+			assert_array_equal(self.texture[...], data)
+		finally:
+			current.unbind = True
+
+class MipmapPyramidTest(unittest.TestCase):
+	def test_levels(self):
+		self.assertEqual(mipmapLevels((1,)), 1)
+		self.assertEqual(mipmapLevels((5, 3)), 3)
+		self.assertEqual(mipmapLevels((256, 64)), 9)
+
+	def test_box(self):
+		image = numpy.array([[0, 1, 2, 3, 9],
+		                     [2, 1, 4, 4, 9],
+		                     [9, 9, 9, 9, 9]], dtype='uint8')
+		assert_array_equal(boxDownsample(image, (0, 1), (2, 2)), [[1, 3]])
+		assert_array_equal(boxDownsample(image.astype('float32'), (0, 1), (2, 2)), [[1, 3.25]])
+		assert_array_equal(boxDownsample(image, (1,), (5,)), [[3], [4], [9]])
+
+	def test_pyramid(self):
+		image = numpy.arange(7 * 10 * 2, dtype='uint16').reshape(7, 10, 2)
+		pyramid = mipmapPyramid(image, 4)
+		self.assertEqual([level.shape for level in pyramid],
+		                 [(7, 10, 2), (3, 5, 2), (1, 2, 2), (1, 1, 2)])
+		self.assertIs(pyramid[0], image)
+		assert_array_equal(pyramid[1], boxDownsample(image, (0, 1), (2, 2)))
+		assert_array_equal(pyramid[3], boxDownsample(image, (0, 1), (7, 10)))
+
+	def test_tiles(self):
+		image = numpy.random.RandomState(0).randint(0, 256, (3, 40, 24)).astype('uint8')
+		with ThreadPoolExecutor(4) as executor:
+			tiled = mipmapPyramid(image, 5, (1, 2), executor, tile_rows=3)
+		for tiled_level, level in zip(tiled, mipmapPyramid(image, 5, (1, 2))):
+			self.assertEqual(tiled_level.shape[0], 3)
+			assert_array_equal(tiled_level, level)
+
+class MipmapTest(ContextTest):
+	def test_write(self):
+		texture = ImmutableTexture((4, 4), components=1, levels=3, bits=8, normalized=False)
+		texture.write(Ellipsis, [[1, 2], [3, 4]], level=1)
+		texture.write(Ellipsis, [[5]], level=2)
+		assert_array_equal(texture.read(level=1), [[1, 2], [3, 4]])
+		assert_array_equal(texture.read(level=2), [[5]])
+		with self.assertRaises(IndexError):
+			texture.write(Ellipsis, [[5]], level=3)
+
+	def test_build(self):
+		texture = ImmutableTexture((8, 4), components=2, count=2, levels=mipmapLevels((8, 4)),
+		                           bits=16, normalized=False)
+		image = numpy.arange(2 * 4 * 8 * 2, dtype='uint16').reshape(2, 4, 8, 2)
+		texture.buildMipmaps(image)
+		expected = mipmapPyramid(image, texture.levels, (1, 2))
+		for level, data in enumerate(expected):
+			assert_array_equal(texture.read(level=level), data)
+		with self.assertRaises(RuntimeError):
+			texture.generateMipmap()
+
+	def test_generate(self):
+		texture = ImmutableTexture((4, 2), components=1, levels=3, bits=32, integer=False)
+		texture[...] = numpy.full((2, 4), 0.5, dtype='float32')
+		texture.generateMipmap()
+		assert_array_equal(texture.read(level=1), [[0.5, 0.5]])
+		assert_array_equal(texture.read(level=2), [[0.5]])
+
+class CompressedTextureTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.texture = ImmutableTexture((8, 8), components=1, compression=GL.GL_COMPRESSED_RED_RGTC1)
+		# A gradient, which compresses with a small error
+		self.image = numpy.add.outer(numpy.arange(8), numpy.arange(8)).astype('uint8') * 8
+
+	def test_formats(self):
+		formats = compressedFormats(components=1)
+		self.assertIn(GL.GL_COMPRESSED_RED_RGTC1, formats)
+		self.assertNotIn(GL.GL_COMPRESSED_RGBA_BPTC_UNORM, formats)
+		self.assertTrue(self.texture.compressed)
+		self.assertEqual(self.texture.internal_format, GL.GL_COMPRESSED_RED_RGTC1)
+
+	def test_driver_compression(self):
+		self.texture[...] = self.image
+		self.assertEqual(self.texture.compressedSize(), 32)
+		self.assertLessEqual(abs(self.texture[...].astype('int') - self.image).max(), 4)
+
+	def test_write_compressed(self):
+		self.texture[...] = self.image
+		data = self.texture.readCompressed()
+		copy = ImmutableTexture((8, 8), components=1, compression=GL.GL_COMPRESSED_RED_RGTC1)
+		copy.writeCompressed(Ellipsis, data)
+		assert_array_equal(copy[...], self.texture[...])
+		assert_array_equal(copy.readCompressed(), data)
+
+		# Blocks are 8 bytes, in row order
+		copy.writeCompressed((slice(4, 8), slice(0, 4)), bytes(data[:8]))
+		assert_array_equal(copy[4:8, 0:4], self.texture[0:4, 0:4])
+
+	def test_no_unbind(self):
+		self.texture[...] = self.image
+		data = self.texture.readCompressed()
+		pack, unpack = Buffer(), Buffer()
+		current = state.current()
+		current.unbind = False
+		try:
+			for buf, target in ((pack, GL.GL_PIXEL_PACK_BUFFER), (unpack, GL.GL_PIXEL_UNPACK_BUFFER)):
+				with buf.bind(target):
+					buf[...] = numpy.dtype(('uint8', 64))
+			assert_array_equal(self.texture.readCompressed(), data)
+			self.texture.writeCompressed(Ellipsis, data[::-1].copy())
+			assert_array_equal(self.texture.readCompressed(), data[::-1])
+		finally:
+			current.unbind = True
+			deleteBuffers([pack, unpack])
+
+	def test_uncompressed(self):
+		texture = ImmutableTexture((4, 4), components=1)
+		with self.assertRaises(RuntimeError):
+			texture.readCompressed()
+		with self.assertRaises(RuntimeError):
+			texture.writeCompressed(Ellipsis, bytes(8))
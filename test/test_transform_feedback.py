@@ -0,0 +1,125 @@
+from OpenGL import GL
+import numpy
+from numpy import testing as np_test
+
+from GLPy import Program, Buffer, VAO
+from GLPy.GLSL import VertexAttribute, FeedbackVarying, Array, Struct, Variable
+from GLPy.transform_feedback import ( FeedbackSimulation, TransformFeedback, Readback
+                                     , feedbackDtype )
+
+from .test_context import ContextTest, readShaders
+
+import unittest
+
+class FeedbackVaryingTest(unittest.TestCase):
+	def test_dtype(self):
+		self.assertEqual(FeedbackVarying('v', 'vec3').dtype, numpy.dtype(('float32', 3)))
+		self.assertEqual(FeedbackVarying('a', Array('float', 4)).dtype, numpy.dtype(('float32', 4)))
+		s = Struct('S', Variable('i', 'int'), Variable('v', 'vec2'))
+		self.assertEqual(FeedbackVarying('s', s).dtype,
+		                 numpy.dtype([('i', 'int32'), ('v', 'float32', 2)]))
+		self.assertEqual([v.name for v in FeedbackVarying('s', s)], ['s.i', 's.v'])
+
+	def test_interleaved_dtype(self):
+		varyings = [FeedbackVarying('a', 'float'), FeedbackVarying('b', 'vec3')]
+		self.assertEqual(feedbackDtype(varyings).itemsize, 16)
+
+class FeedbackSimulationTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		self.shaders = readShaders(vertex='simulation.vert')
+		self.attributes = [VertexAttribute('position', 'vec2'), VertexAttribute('velocity', 'vec2')]
+		self.varyings = [FeedbackVarying('next_position', 'vec2'),
+		                 FeedbackVarying('next_velocity', 'vec2')]
+		self.initial = numpy.zeros(5, dtype=feedbackDtype(self.varyings))
+		self.initial['next_position'] = numpy.arange(10).reshape(5, 2)
+		self.initial['next_velocity'] = 1
+
+	def simulation(self, xfb_mode):
+		program = Program.fromSources(self.shaders, vertex_attributes=self.attributes,
+		                              xfb_varyings=self.varyings, xfb_mode=xfb_mode)
+		return FeedbackSimulation(program, ['position', 'velocity'], 5, self.initial)
+
+	def check(self, simulation):
+		np_test.assert_equal(simulation.data, self.initial)
+		simulation.step(3)
+		expected_position = self.initial['next_position'] + 1 + 2 + 4
+		np_test.assert_equal(simulation.data['next_position'], expected_position)
+		np_test.assert_equal(simulation.data['next_velocity'], 8)
+
+	def test_interleaved(self):
+		simulation = self.simulation(GL.GL_INTERLEAVED_ATTRIBS)
+		self.assertEqual(len(simulation.state.buffers), 1)
+		self.check(simulation)
+
+	def test_separate(self):
+		simulation = self.simulation(GL.GL_SEPARATE_ATTRIBS)
+		self.assertEqual(len(simulation.state.buffers), 2)
+		self.check(simulation)
+
+	def test_read(self):
+		simulation = self.simulation(GL.GL_INTERLEAVED_ATTRIBS)
+		readbacks = simulation.read()
+		simulation.step()
+		# The readback is of the state before the step
+		np_test.assert_equal(simulation.combine(r.result() for r in readbacks), self.initial)
+		self.assertTrue(all(r.done() for r in readbacks))
+
+	def test_attributes(self):
+		program = Program.fromSources(self.shaders, vertex_attributes=self.attributes,
+		                              xfb_varyings=self.varyings)
+		with self.assertRaises(ValueError):
+			FeedbackSimulation(program, ['position'], 5)
+
+class TransformFeedbackTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		shaders = readShaders(vertex='simulation.vert')
+		attributes = [VertexAttribute('position', 'vec2'), VertexAttribute('velocity', 'vec2')]
+		varyings = [FeedbackVarying('next_position', 'vec2'),
+		            FeedbackVarying('next_velocity', 'vec2')]
+		self.program = Program.fromSources(shaders, vertex_attributes=attributes,
+		                                   xfb_varyings=varyings, xfb_mode=GL.GL_SEPARATE_ATTRIBS)
+
+	def vao(self, feedback):
+		vao = VAO(*self.program.vertex_attributes.values())
+		vao['position'].data = feedback.items['next_position']
+		vao['velocity'].data = feedback.items['next_velocity']
+		return vao
+
+	def test_buffers(self):
+		feedback = TransformFeedback.fromProgram(self.program, 8)
+		self.assertEqual(len(feedback.buffers), 2)
+		with feedback:
+			for index, buf in enumerate(feedback.buffers):
+				binding = GL.glGetIntegeri_v(GL.GL_TRANSFORM_FEEDBACK_BUFFER_BINDING, index)
+				self.assertEqual(int(binding), buf.handle)
+
+	def test_draw(self):
+		first = TransformFeedback.fromProgram(self.program, 8)
+		second = TransformFeedback.fromProgram(self.program, 8)
+		third = TransformFeedback.fromProgram(self.program, 8)
+		initial = numpy.zeros(8, dtype=first.dtype)
+		initial['next_velocity'] = 1
+		first.data = initial
+		second.data = numpy.full(8, -1, dtype=first.dtype)
+		third.data = numpy.full(8, -1, dtype=first.dtype)
+
+		GL.glEnable(GL.GL_RASTERIZER_DISCARD)
+		# Capture only 3 vertices, then draw exactly those without knowing how many there are
+		with self.vao(first), self.program, second.feedback(GL.GL_POINTS):
+			GL.glDrawArrays(GL.GL_POINTS, 0, 2)
+			second.pause()
+			second.resume()
+			GL.glDrawArrays(GL.GL_POINTS, 2, 1)
+		with self.vao(second), self.program, third.feedback(GL.GL_POINTS):
+			second.draw(GL.GL_POINTS)
+		GL.glDisable(GL.GL_RASTERIZER_DISCARD)
+
+		data = third.data
+		np_test.assert_equal(data['next_position'][:3], 3)
+		np_test.assert_equal(data['next_velocity'][:3], 4)
+		np_test.assert_equal(data['next_position'][3:], -1)
+
+if __name__ == '__main__':
+	unittest.main()
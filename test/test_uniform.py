@@ -0,0 +1,87 @@
+from OpenGL import GL
+import numpy
+from numpy import testing as np_test
+
+from GLPy import Program
+from GLPy.GLSL import Variable, Array, Struct, BasicType
+from GLPy.uniform import uniformFunctionName
+
+from .test_context import ContextTest, readShaders
+
+import unittest
+from unittest import mock
+
+def getUniform(program, location, size=1):
+	value = numpy.zeros(size, dtype='float32')
+	GL.glGetUniformfv(program.handle, location, value)
+	return value
+
+class UniformFunctionTest(unittest.TestCase):
+	def test_names(self):
+		self.assertEqual(uniformFunctionName(BasicType('float')), 'glProgramUniform1fv')
+		self.assertEqual(uniformFunctionName(BasicType('uvec3'), False), 'glUniform3uiv')
+		self.assertEqual(uniformFunctionName(BasicType('bvec2')), 'glProgramUniform2iv')
+		self.assertEqual(uniformFunctionName(BasicType('mat4')), 'glProgramUniformMatrix4fv')
+		self.assertEqual(uniformFunctionName(BasicType('dmat2x3')), 'glProgramUniformMatrix2x3dv')
+		self.assertEqual(uniformFunctionName(BasicType('isampler2D')), 'glProgramUniform1iv')
+
+class ProgramUniformTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		shaders = readShaders(vertex='uniforms.vert', fragment='compile.frag')
+		light = Struct('Light', Variable('color', 'vec3'), Variable('intensity', 'float'))
+		uniforms = [ Variable('scale', 'float'), Variable('offsets', Array('vec3', 3))
+		           , Variable('transform', 'mat2x3'), Variable('lights', Array(light, 2)) ]
+		self.program = Program.fromSources(shaders, uniforms=uniforms)
+
+	def test_set(self):
+		u = self.program.uniforms
+		u['scale'].data = 2
+		np_test.assert_equal(getUniform(self.program, u['scale'].location), 2)
+
+		offsets = numpy.arange(9).reshape(3, 3)
+		u['offsets'].data = offsets
+		np_test.assert_equal(u['offsets'].data, offsets)
+		np_test.assert_equal(getUniform(self.program, u['offsets'][2].location, 3), offsets[2])
+
+		transform = numpy.arange(6).reshape(3, 2)
+		u['transform'].data = transform
+		# Matrices are retrieved in column-major order
+		np_test.assert_equal(getUniform(self.program, u['transform'].location, 6),
+		                     transform.T.flatten())
+
+		u['lights'][1]['intensity'].data = 0.5
+		np_test.assert_equal(getUniform(self.program, u['lights'][1]['intensity'].location), 0.5)
+		with self.assertRaises(TypeError):
+			u['lights'].data = 0
+
+	def test_redundant(self):
+		u = self.program.uniforms['offsets']
+		u.data = numpy.zeros((3, 3))
+		with mock.patch.object(GL, 'glProgramUniform3fv') as setter:
+			u.data = numpy.zeros((3, 3))
+			setter.assert_not_called()
+			u.data = numpy.ones((3, 3))
+			setter.assert_called_once()
+
+	def test_relink(self):
+		u = self.program.uniforms['scale']
+		u.data = 2
+		self.program.relink()
+		self.assertIsNone(u.data)
+		np_test.assert_equal(getUniform(self.program, u.location), 0)
+		u.data = 2
+		np_test.assert_equal(getUniform(self.program, u.location), 2)
+
+	def test_location_cached(self):
+		location = self.program.uniforms['scale'].location
+		with mock.patch.object(GL, 'glGetUniformLocation') as get_location:
+			self.assertEqual(self.program.uniforms['scale'].location, location)
+			get_location.assert_not_called()
+
+	def test_reflected(self):
+		shaders = readShaders(vertex='uniforms.vert', fragment='compile.frag')
+		program = Program.fromSources(shaders, reflect=True)
+		self.assertEqual(set(program.uniforms), {'scale', 'offsets', 'transform', 'lights'})
+		self.assertEqual(program.uniforms['offsets'].datatype, Array('vec3', 3))
+		program.uniforms['lights'][0]['color'].data = [1, 2, 3]
@@ -1,7 +1,11 @@
+from OpenGL import GL
+
 from GLPy import Program
 from GLPy.GLSL import UniformBlock, UniformBlockMember, Variable, Struct, Array
+from GLPy.reflection import ProgramReflection
 
 from numpy import dtype
+from unittest import mock
 
 from .test_context import ContextTest, readShaders
 
@@ -50,3 +54,74 @@ class UniformBlockTest(ContextTest):
 		packed_dtype = self.program.uniform_blocks['InstancedUB'].dtype
 		ubo = self.program.uniform_blocks['OptimizedUB']
 		optimized_dtype = self.program.uniform_blocks['OptimizedUB'].dtype
+
+	def test_reflected_offsets(self):
+		reflected = ProgramReflection(self.program.handle).uniform_block_dtypes
+		for name in ('InstancedUB', 'OptimizedUB'):
+			block_dtype = self.program.uniform_blocks[name].dtype
+			self.assertEqual(block_dtype.itemsize, reflected[name].itemsize)
+			self.assertEqual([block_dtype.fields[n][1] for n in block_dtype.names],
+			                 [reflected[name].fields[n][1] for n in reflected[name].names])
+
+	def test_batched_queries(self):
+		block = self.program.uniform_blocks['OptimizedUB']
+		with mock.patch.object(GL, 'glGetUniformIndices', wraps=GL.glGetUniformIndices) as indices, \
+		     mock.patch.object(GL, 'glGetActiveUniformsiv', wraps=GL.glGetActiveUniformsiv) as props:
+			block.dtype
+			self.assertEqual(indices.call_count, 1)
+			self.assertEqual(props.call_count, 3)
+			self.assertIs(block.dtype, block.dtype)
+			self.assertEqual(indices.call_count, 1)
+
+	def test_relink(self):
+		block = self.program.uniform_blocks['InstancedUB']
+		block_dtype = block.dtype
+		self.program.relink()
+		self.assertEqual(self.program.link_generation, 1)
+		self.assertIsNot(block.dtype, block_dtype)
+		self.assertEqual(block.dtype, block_dtype)
+
+		shaders = readShaders(vertex='uniform_block.vert', fragment='compile.frag')
+		program = Program.fromSources(shaders, reflect=True)
+		reflection = program.reflection
+		block = program.uniform_blocks['InstancedUB']
+		block_dtype = block.dtype
+		self.assertIs(block_dtype, reflection.uniform_block_dtypes['InstancedUB'])
+		program.relink()
+		self.assertIsNot(program.reflection, reflection)
+		self.assertIs(block.dtype, program.reflection.uniform_block_dtypes['InstancedUB'])
+		self.assertEqual(block.dtype, block_dtype)
+
+class LargeArrayTest(ContextTest):
+	def setUp(self):
+		super().setUp()
+		shaders = readShaders(vertex='lights.vert', fragment='compile.frag')
+		light = Struct('Light', Variable('position', 'vec3'), Variable('color', 'vec4'))
+		uniform_blocks = [UniformBlock('SharedLights', Variable('count', 'int'),
+		                               Variable('lights', Array(light, 256))),
+		                  UniformBlock('StandardLights', Variable('std_lights', Array(light, 256)),
+		                               layout='std140')]
+		self.program = Program.fromSources(shaders, uniform_blocks=uniform_blocks)
+
+	def test_shared(self):
+		block = self.program.uniform_blocks['SharedLights']
+		with mock.patch.object(GL, 'glGetUniformIndices', wraps=GL.glGetUniformIndices) as indices:
+			block_dtype = block.dtype
+			self.assertEqual(indices.call_count, 1)
+			# The count, and both members of 3 sampled elements
+			self.assertEqual(indices.call_args[0][1], 7)
+		reflected = ProgramReflection(self.program.handle).uniform_block_dtypes['SharedLights']
+		self.assertEqual(block_dtype['lights'].shape, (256,))
+		self.assertEqual(block_dtype.itemsize, reflected.itemsize)
+		self.assertEqual(block_dtype.fields['lights'][1], reflected.fields['lights'][1])
+		self.assertEqual(block_dtype['lights'].base.itemsize, reflected['lights'].base.itemsize)
+		self.assertEqual(block_dtype['lights'].base.names, reflected['lights'].base.names)
+		self.assertEqual(block['lights'][100]['color'].offset,
+		                 block['lights'].offset + 100 * block['lights'].array_stride
+		                 + block_dtype['lights'].base.fields['color'][1])
+
+	def test_standard(self):
+		block = self.program.uniform_blocks['StandardLights']
+		with mock.patch.object(GL, 'glGetUniformIndices', wraps=GL.glGetUniformIndices) as indices:
+			self.assertEqual(block.dtype['std_lights'].shape, (256,))
+			self.assertEqual(indices.call_count, 0)
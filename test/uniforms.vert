@@ -0,0 +1,17 @@
+#version 330
+
+struct Light {
+	vec3 color;
+	float intensity;
+};
+
+uniform float scale;
+uniform vec3 offsets[3];
+uniform mat2x3 transform;
+uniform Light lights[2];
+
+void main(){
+	vec3 color = lights[0].color * lights[0].intensity + lights[1].color * lights[1].intensity;
+	vec3 offset = offsets[0] + offsets[1] + offsets[2];
+	gl_Position = vec4(transform * vec2(scale, 1) + offset + color, 1);
+}